@@ -0,0 +1,24 @@
+import Mark
+
+class Area(Mark.Mark):
+    """Area mark: the region between left/top and left/top + height
+    
+    When width is set instead of height the area is horizontal, between
+    left/top and left + width/top.  decimate and tolerance apply to both
+    edges as for Line; path_stats holds the vertex counts.
+    """
+    defaults = dict(Mark.Mark.defaults, lineWidth=1.5, fillStyle='#1f77b4', tolerance=1)
+    
+    def __init__(self, *arg):
+        Mark.Mark.__init__(self, *arg)
+        self.path_stats = None
+
+Mark.define_properties(Area, {
+    'width': 'number',
+    'height': 'number',
+    'lineWidth': 'number',
+    'strokeStyle': 'color',
+    'fillStyle': 'color',
+    'decimate': 'string',
+    'tolerance': 'number',
+})
@@ -0,0 +1,13 @@
+import Mark
+
+class Bar(Mark.Mark):
+    """Bar mark: a rectangle positioned by left/right/top/bottom/width/height"""
+    defaults = dict(Mark.Mark.defaults, lineWidth=1.5, fillStyle='#1f77b4')
+
+Mark.define_properties(Bar, {
+    'width': 'number',
+    'height': 'number',
+    'lineWidth': 'number',
+    'strokeStyle': 'color',
+    'fillStyle': 'color',
+})
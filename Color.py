@@ -1,49 +1,101 @@
 import re
+import json
 import math
+import threading
+from collections import OrderedDict, Mapping
 
 float_re = re.compile(r'^([0-9]*[.]?[0-9]*).*')
-parseFloat = lambda f: float(float_re.search(f).group(1))
+parseFloat = lambda f: float(float_re.search(f.strip()).group(1))
 
 rgb_hsl_re = re.compile(r'([a-z]+)\((.*)\)',re.IGNORECASE)
 
 class Color(object):
-    """Color object"""
+    """Color object
+    
+    Colors are immutable and use __slots__; the CSS color string of the Rgb
+    and Hsl subclasses is only built the first time it is read.  Colors
+    pickle as their constructor arguments, and to_json()/from_json()
+    round-trip them through a small JSON object.
+    """
+    __slots__ = ('_color','opacity')
+    
     def __init__(self, color, opacity):
         """color is color format string; opacity is in [0,1]"""
-        self.color = color
-        self.opacity = opacity
+        object.__setattr__(self,'_color',color)
+        object.__setattr__(self,'opacity',opacity)
     
-    def brighter(k):
-        pass
+    def __setattr__(self, name, value):
+        raise AttributeError, "%s objects are immutable" % type(self).__name__
     
-    def darker(k):
-        pass
+    __delattr__ = __setattr__
+    
+    @property
+    def color(self):
+        return self._color
+    
+    def _key(self):
+        return (self._color,self.opacity)
+    
+    def __eq__(self, other):
+        return type(self) is type(other) and self._key() == other._key()
+    
+    def __ne__(self, other):
+        return not self.__eq__(other)
+    
+    def __hash__(self):
+        return hash(self._key())
+    
+    def __reduce__(self):
+        return (type(self), self._key())
+    
+    def _state(self):
+        return {'color': self._key()}
+    
+    def to_json(self):
+        return json.dumps(self._state())
+    
+    def brighter(self,k=1):
+        return self
+    
+    def darker(self,k=1):
+        return self
 
 class Rgb(Color):
     """Class to hold RGB color objects"""
+    __slots__ = ('r','g','b','a')
+    
     def __init__(self, r, g, b, a=1):
-        self.r = r
-        self.g = g
-        self.b = b
-        self.a = a
-        
-        color = "rgb(%i,%i,%i)" % (r,g,b)
-        opacity = a
-        Color.__init__(color,opacity)
-        
-        return self
+        _set = object.__setattr__
+        _set(self,'r',r)
+        _set(self,'g',g)
+        _set(self,'b',b)
+        _set(self,'a',a)
+        _set(self,'opacity',a)
+        _set(self,'_color',None)
+    
+    @property
+    def color(self):
+        if self._color is None:
+            object.__setattr__(self,'_color',"rgb(%i,%i,%i)" % (self.r,self.g,self.b))
+        return self._color
+    
+    def _key(self):
+        return (self.r,self.g,self.b,self.a)
+    
+    def _state(self):
+        return {'rgb': self._key()}
     
     def red(self,r):
-        return Rgb(r,self.g,self.b,self.a)
+        return self if r == self.r else Rgb(r,self.g,self.b,self.a)
     
     def green(self,g):
-        return Rgb(self.r,g,self.b,self.a)
+        return self if g == self.g else Rgb(self.r,g,self.b,self.a)
     
     def blue(self,b):
-        return Rgb(self.r,self.g,b,self.a)
+        return self if b == self.b else Rgb(self.r,self.g,b,self.a)
     
     def alpha(self,a):
-        return Rgb(self.r,self.g,self.b,a)
+        return self if a == self.a else Rgb(self.r,self.g,self.b,a)
     
     def rgb(self):
         return self
@@ -63,7 +115,7 @@ class Rgb(Color):
                    min(255, math.floor(b/k)),
                    self.a)
     
-    def darker(k=1):
+    def darker(self,k=1):
         k = 0.7 ** k
         return Rgb(max(0, math.floor(k*self.r)),
                    max(0, math.floor(k*self.g)),
@@ -76,29 +128,46 @@ transparent = Rgb(0,0,0,0)
 
 class Hsl(Color):
     """Class to hold HSL color objects"""
+    __slots__ = ('h','s','l','a')
+    
     def __init__(self, h, s, l, a=1):
-        self.h = h
-        self.s = s
-        self.l = l
-        self.a = a
-        
-        color = "hsl(%i,%f%%,%f%%)" % (h,s*100,l*100)
-        opacity = a
-        Color.__init__(color,opacity)
-        
-        return self
+        _set = object.__setattr__
+        _set(self,'h',h)
+        _set(self,'s',s)
+        _set(self,'l',l)
+        _set(self,'a',a)
+        _set(self,'opacity',a)
+        _set(self,'_color',None)
+    
+    @property
+    def color(self):
+        if self._color is None:
+            object.__setattr__(self,'_color',"hsl(%i,%f%%,%f%%)" % (self.h,self.s*100,self.l*100))
+        return self._color
+    
+    def _key(self):
+        return (self.h,self.s,self.l,self.a)
     
-    def hue(h):
-        return Hsl(h,self.s,self.l,self.a)
+    def _state(self):
+        return {'hsl': self._key()}
     
-    def saturation(s):
-        return Hsl(self.h,s,self.l,self.a)
+    def hue(self,h):
+        return self if h == self.h else Hsl(h,self.s,self.l,self.a)
+    
+    def saturation(self,s):
+        return self if s == self.s else Hsl(self.h,s,self.l,self.a)
         
-    def lightness(h):
-        return Hsl(self.h,self.s,l,self.a)
+    def lightness(self,l):
+        return self if l == self.l else Hsl(self.h,self.s,l,self.a)
         
-    def alpha(h):
-        return Hsl(self.h,self.s,self.l,a)
+    def alpha(self,a):
+        return self if a == self.a else Hsl(self.h,self.s,self.l,a)
+    
+    def brighter(self,k=1):
+        return self.rgb().brighter(k)
+    
+    def darker(self,k=1):
+        return self.rgb().darker(k)
     
     def rgb(self):
         """Returns Rgb version of self"""
@@ -112,7 +181,7 @@ class Hsl(Color):
         
         s = max(0, min(s, 1))
         
-        l = max(0, min(s, 1))
+        l = max(0, min(l, 1))
         
         # from FvD 13.37, CSS Color Module Level 3
         m2 = (l*(1+s)) if (l <= 0.5) else (l+s-l*s)
@@ -135,16 +204,103 @@ class Hsl(Color):
 
 
 
+class ParseCache(object):
+    """Bounded, thread-safe LRU cache of parsed color specs.
+    
+    Pinned entries (named colors, pinned on first use) live in a separate
+    table that is never evicted.  hits and misses count lookups.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._pinned = {}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, format):
+        """Returns the cached color for format, or None."""
+        with self._lock:
+            c = self._pinned.get(format)
+            if c is None:
+                c = self._entries.pop(format, None)
+                if c is None:
+                    self.misses += 1
+                    return None
+                self._entries[format] = c   # mark most recently used
+            self.hits += 1
+            return c
+    
+    def put(self, format, c):
+        with self._lock:
+            if format in self._pinned:
+                return
+            self._entries.pop(format, None)
+            self._entries[format] = c
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def pin(self, format, c):
+        with self._lock:
+            self._entries.pop(format, None)
+            self._pinned[format] = c
+    
+    def clear(self):
+        """Drops the unpinned entries and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def info(self):
+        """Returns (hits, misses, maxsize, currsize)."""
+        return (self.hits, self.misses, self.maxsize, len(self._pinned) + len(self._entries))
+
+parse_cache = ParseCache()
+
 def color(format):
-    """Parses color specs and returns Rgb object."""
+    """Parses color specs and returns Rgb object.
+    
+    Results are memoized in parse_cache; colors are immutable, so the same
+    object is handed out for repeated specs.
+    """
     if isinstance(format,Rgb):
         return format
     
+    c = parse_cache.get(format)
+    if c is None:
+        c = _parse(format)
+        if format in names:
+            parse_cache.pin(format,c)
+        else:
+            parse_cache.put(format,c)
+    return c
+
+_state_types = {'color': Color, 'rgb': Rgb, 'hsl': Hsl}
+
+def _from_state(state):
+    """Rebuilds a color from its JSON state; other objects pass through.
+    
+    Usable as a json object_hook, so colors nested in larger documents (e.g.
+    scale ranges) are restored too.
+    """
+    if len(state) == 1:
+        (name,args), = state.items()
+        cls = _state_types.get(name)
+        if cls is not None:
+            return cls(*args)
+    return state
+
+def from_json(s):
+    """Returns the color serialized by Color.to_json."""
+    return json.loads(s, object_hook=_from_state)
+
+def _parse(format):
     # HSL or RGB specs (e.g., rgba(12,43,65))
     try:
         (space,values_string) = rgb_hsl_re.search(format).group(1,2)
         raw_values = values_string.split(',')
-        if len(raw_values) != 3 or len(raw_values) != 4:
+        if len(raw_values) not in (3,4):
             raise ValueError, "expected 3 or 4 values for RGB(A)/HSL(A) string"
         
         # determine the alpha value
@@ -164,9 +320,9 @@ def color(format):
             r = parseFloat(raw_values[0])
             g = parseFloat(raw_values[1])
             b = parseFloat(raw_values[2])
-            if raw_values[0][-1] == '%': r = r / 100.
-            if raw_values[1][-1] == '%': g = g / 100.
-            if raw_values[2][-1] == '%': b = b / 100.
+            if raw_values[0].strip()[-1] == '%': r = round(r * 2.55)
+            if raw_values[1].strip()[-1] == '%': g = round(g * 2.55)
+            if raw_values[2].strip()[-1] == '%': b = round(b * 2.55)
             return Rgb(r,g,b,a)
     except AttributeError:
         pass
@@ -181,9 +337,9 @@ def color(format):
     # Try a hexadecimal color: #rgb or #rrggbb
     if format[0] == '#':
         if len(format) == 4:
-            r = format[1]
-            g = format[2]
-            b = format[3]
+            r = format[1] * 2
+            g = format[2] * 2
+            b = format[3] * 2
         elif len(format) == 7:
             r = format[1:3]
             g = format[3:5]
@@ -195,156 +351,213 @@ def color(format):
     # Something else. pass-through unsupported colors
     return Color(format,1)
 
-names = {
-    "aliceblue":"#f0f8ff",
-    "antiquewhite":"#faebd7",
-    "aqua":"#00ffff",
-    "aquamarine":"#7fffd4",
-    "azure":"#f0ffff",
-    "beige":"#f5f5dc",
-    "bisque":"#ffe4c4",
-    "black":"#000000",
-    "blanchedalmond":"#ffebcd",
-    "blue":"#0000ff",
-    "blueviolet":"#8a2be2",
-    "brown":"#a52a2a",
-    "burlywood":"#deb887",
-    "cadetblue":"#5f9ea0",
-    "chartreuse":"#7fff00",
-    "chocolate":"#d2691e",
-    "coral":"#ff7f50",
-    "cornflowerblue":"#6495ed",
-    "cornsilk":"#fff8dc",
-    "crimson":"#dc143c",
-    "cyan":"#00ffff",
-    "darkblue":"#00008b",
-    "darkcyan":"#008b8b",
-    "darkgoldenrod":"#b8860b",
-    "darkgray":"#a9a9a9",
-    "darkgreen":"#006400",
-    "darkgrey":"#a9a9a9",
-    "darkkhaki":"#bdb76b",
-    "darkmagenta":"#8b008b",
-    "darkolivegreen":"#556b2f",
-    "darkorange":"#ff8c00",
-    "darkorchid":"#9932cc",
-    "darkred":"#8b0000",
-    "darksalmon":"#e9967a",
-    "darkseagreen":"#8fbc8f",
-    "darkslateblue":"#483d8b",
-    "darkslategray":"#2f4f4f",
-    "darkslategrey":"#2f4f4f",
-    "darkturquoise":"#00ced1",
-    "darkviolet":"#9400d3",
-    "deeppink":"#ff1493",
-    "deepskyblue":"#00bfff",
-    "dimgray":"#696969",
-    "dimgrey":"#696969",
-    "dodgerblue":"#1e90ff",
-    "firebrick":"#b22222",
-    "floralwhite":"#fffaf0",
-    "forestgreen":"#228b22",
-    "fuchsia":"#ff00ff",
-    "gainsboro":"#dcdcdc",
-    "ghostwhite":"#f8f8ff",
-    "gold":"#ffd700",
-    "goldenrod":"#daa520",
-    "gray":"#808080",
-    "green":"#008000",
-    "greenyellow":"#adff2f",
-    "grey":"#808080",
-    "honeydew":"#f0fff0",
-    "hotpink":"#ff69b4",
-    "indianred":"#cd5c5c",
-    "indigo":"#4b0082",
-    "ivory":"#fffff0",
-    "khaki":"#f0e68c",
-    "lavender":"#e6e6fa",
-    "lavenderblush":"#fff0f5",
-    "lawngreen":"#7cfc00",
-    "lemonchiffon":"#fffacd",
-    "lightblue":"#add8e6",
-    "lightcoral":"#f08080",
-    "lightcyan":"#e0ffff",
-    "lightgoldenrodyellow":"#fafad2",
-    "lightgray":"#d3d3d3",
-    "lightgreen":"#90ee90",
-    "lightgrey":"#d3d3d3",
-    "lightpink":"#ffb6c1",
-    "lightsalmon":"#ffa07a",
-    "lightseagreen":"#20b2aa",
-    "lightskyblue":"#87cefa",
-    "lightslategray":"#778899",
-    "lightslategrey":"#778899",
-    "lightsteelblue":"#b0c4de",
-    "lightyellow":"#ffffe0",
-    "lime":"#00ff00",
-    "limegreen":"#32cd32",
-    "linen":"#faf0e6",
-    "magenta":"#ff00ff",
-    "maroon":"#800000",
-    "mediumaquamarine":"#66cdaa",
-    "mediumblue":"#0000cd",
-    "mediumorchid":"#ba55d3",
-    "mediumpurple":"#9370db",
-    "mediumseagreen":"#3cb371",
-    "mediumslateblue":"#7b68ee",
-    "mediumspringgreen":"#00fa9a",
-    "mediumturquoise":"#48d1cc",
-    "mediumvioletred":"#c71585",
-    "midnightblue":"#191970",
-    "mintcream":"#f5fffa",
-    "mistyrose":"#ffe4e1",
-    "moccasin":"#ffe4b5",
-    "navajowhite":"#ffdead",
-    "navy":"#000080",
-    "oldlace":"#fdf5e6",
-    "olive":"#808000",
-    "olivedrab":"#6b8e23",
-    "orange":"#ffa500",
-    "orangered":"#ff4500",
-    "orchid":"#da70d6",
-    "palegoldenrod":"#eee8aa",
-    "palegreen":"#98fb98",
-    "paleturquoise":"#afeeee",
-    "palevioletred":"#db7093",
-    "papayawhip":"#ffefd5",
-    "peachpuff":"#ffdab9",
-    "peru":"#cd853f",
-    "pink":"#ffc0cb",
-    "plum":"#dda0dd",
-    "powderblue":"#b0e0e6",
-    "purple":"#800080",
-    "red":"#ff0000",
-    "rosybrown":"#bc8f8f",
-    "royalblue":"#4169e1",
-    "saddlebrown":"#8b4513",
-    "salmon":"#fa8072",
-    "sandybrown":"#f4a460",
-    "seagreen":"#2e8b57",
-    "seashell":"#fff5ee",
-    "sienna":"#a0522d",
-    "silver":"#c0c0c0",
-    "skyblue":"#87ceeb",
-    "slateblue":"#6a5acd",
-    "slategray":"#708090",
-    "slategrey":"#708090",
-    "snow":"#fffafa",
-    "springgreen":"#00ff7f",
-    "steelblue":"#4682b4",
-    "tan":"#d2b48c",
-    "teal":"#008080",
-    "thistle":"#d8bfd8",
-    "tomato":"#ff6347",
-    "turquoise":"#40e0d0",
-    "violet":"#ee82ee",
-    "wheat":"#f5deb3",
-    "white":"#ffffff",
-    "whitesmoke":"#f5f5f5",
-    "yellow":"#ffff00",
-    "yellowgreen":"#9acd32",
-    "transparent": transparent
-}
+def interpolate_many(start, end, t):
+    """Vectorized color interpolation.
+    
+    start and end are arrays of r,g,b,a rows (last axis of length 4) that
+    broadcast against t.  Applies the same rounding and alpha rules as the
+    color interpolator in Scale and returns float64 r,g,b,a in Rgb units.
+    """
+    import numpy as np   # deferred: keeps numpy out of the import path
+    start = np.asarray(start, dtype=np.float64)
+    end = np.asarray(end, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)[..., np.newaxis]
+    u = 1 - t
+    a = start[..., 3:] * u + end[..., 3:] * t
+    a[a < 1e-5] = 0
+    rgb = np.floor(start[..., :3] * u + end[..., :3] * t + 0.5)
+    rgb = np.where(start[..., 3:] == 0, end[..., :3],
+                   np.where(end[..., 3:] == 0, start[..., :3], rgb))
+    return np.concatenate((rgb, a), axis=-1)
+
+def to_uint8(rgba):
+    """Converts float r,g,b,a rows in Rgb units to uint8 channels in [0,255]."""
+    import numpy as np
+    rgba = np.asarray(rgba, dtype=np.float64)
+    out = np.empty(rgba.shape, dtype=np.uint8)
+    out[..., :3] = np.clip(rgba[..., :3], 0, 255)
+    out[..., 3] = np.clip(np.floor(rgba[..., 3] * 255 + 0.5), 0, 255)
+    return out
+
+def pack(rgba):
+    """Packs uint8 r,g,b,a rows into uint32 values laid out as 0xRRGGBBAA."""
+    import numpy as np
+    c = np.asarray(rgba, dtype=np.uint32)
+    return (c[..., 0] << 24) | (c[..., 1] << 16) | (c[..., 2] << 8) | c[..., 3]
+
+class NamedColors(Mapping):
+    """Read-only table of the CSS named colors.
+    
+    Backed by a literal table of channel tuples; each Rgb object is created
+    the first time its name is looked up, so importing costs no parsing.
+    """
+    def __init__(self, table):
+        self._table = table
+        self._colors = {"transparent": transparent}
+    
+    def __getitem__(self, name):
+        try:
+            return self._colors[name]
+        except KeyError:
+            c = self._colors[name] = Rgb(*self._table[name])
+            return c
+    
+    def __contains__(self, name):
+        return name in self._table
+    
+    def __iter__(self):
+        return iter(self._table)
+    
+    def __len__(self):
+        return len(self._table)
 
-for name in names.iterkeys():
-    names[name] = color(names[name])
+names = NamedColors({
+    "aliceblue":(240,248,255),
+    "antiquewhite":(250,235,215),
+    "aqua":(0,255,255),
+    "aquamarine":(127,255,212),
+    "azure":(240,255,255),
+    "beige":(245,245,220),
+    "bisque":(255,228,196),
+    "black":(0,0,0),
+    "blanchedalmond":(255,235,205),
+    "blue":(0,0,255),
+    "blueviolet":(138,43,226),
+    "brown":(165,42,42),
+    "burlywood":(222,184,135),
+    "cadetblue":(95,158,160),
+    "chartreuse":(127,255,0),
+    "chocolate":(210,105,30),
+    "coral":(255,127,80),
+    "cornflowerblue":(100,149,237),
+    "cornsilk":(255,248,220),
+    "crimson":(220,20,60),
+    "cyan":(0,255,255),
+    "darkblue":(0,0,139),
+    "darkcyan":(0,139,139),
+    "darkgoldenrod":(184,134,11),
+    "darkgray":(169,169,169),
+    "darkgreen":(0,100,0),
+    "darkgrey":(169,169,169),
+    "darkkhaki":(189,183,107),
+    "darkmagenta":(139,0,139),
+    "darkolivegreen":(85,107,47),
+    "darkorange":(255,140,0),
+    "darkorchid":(153,50,204),
+    "darkred":(139,0,0),
+    "darksalmon":(233,150,122),
+    "darkseagreen":(143,188,143),
+    "darkslateblue":(72,61,139),
+    "darkslategray":(47,79,79),
+    "darkslategrey":(47,79,79),
+    "darkturquoise":(0,206,209),
+    "darkviolet":(148,0,211),
+    "deeppink":(255,20,147),
+    "deepskyblue":(0,191,255),
+    "dimgray":(105,105,105),
+    "dimgrey":(105,105,105),
+    "dodgerblue":(30,144,255),
+    "firebrick":(178,34,34),
+    "floralwhite":(255,250,240),
+    "forestgreen":(34,139,34),
+    "fuchsia":(255,0,255),
+    "gainsboro":(220,220,220),
+    "ghostwhite":(248,248,255),
+    "gold":(255,215,0),
+    "goldenrod":(218,165,32),
+    "gray":(128,128,128),
+    "green":(0,128,0),
+    "greenyellow":(173,255,47),
+    "grey":(128,128,128),
+    "honeydew":(240,255,240),
+    "hotpink":(255,105,180),
+    "indianred":(205,92,92),
+    "indigo":(75,0,130),
+    "ivory":(255,255,240),
+    "khaki":(240,230,140),
+    "lavender":(230,230,250),
+    "lavenderblush":(255,240,245),
+    "lawngreen":(124,252,0),
+    "lemonchiffon":(255,250,205),
+    "lightblue":(173,216,230),
+    "lightcoral":(240,128,128),
+    "lightcyan":(224,255,255),
+    "lightgoldenrodyellow":(250,250,210),
+    "lightgray":(211,211,211),
+    "lightgreen":(144,238,144),
+    "lightgrey":(211,211,211),
+    "lightpink":(255,182,193),
+    "lightsalmon":(255,160,122),
+    "lightseagreen":(32,178,170),
+    "lightskyblue":(135,206,250),
+    "lightslategray":(119,136,153),
+    "lightslategrey":(119,136,153),
+    "lightsteelblue":(176,196,222),
+    "lightyellow":(255,255,224),
+    "lime":(0,255,0),
+    "limegreen":(50,205,50),
+    "linen":(250,240,230),
+    "magenta":(255,0,255),
+    "maroon":(128,0,0),
+    "mediumaquamarine":(102,205,170),
+    "mediumblue":(0,0,205),
+    "mediumorchid":(186,85,211),
+    "mediumpurple":(147,112,219),
+    "mediumseagreen":(60,179,113),
+    "mediumslateblue":(123,104,238),
+    "mediumspringgreen":(0,250,154),
+    "mediumturquoise":(72,209,204),
+    "mediumvioletred":(199,21,133),
+    "midnightblue":(25,25,112),
+    "mintcream":(245,255,250),
+    "mistyrose":(255,228,225),
+    "moccasin":(255,228,181),
+    "navajowhite":(255,222,173),
+    "navy":(0,0,128),
+    "oldlace":(253,245,230),
+    "olive":(128,128,0),
+    "olivedrab":(107,142,35),
+    "orange":(255,165,0),
+    "orangered":(255,69,0),
+    "orchid":(218,112,214),
+    "palegoldenrod":(238,232,170),
+    "palegreen":(152,251,152),
+    "paleturquoise":(175,238,238),
+    "palevioletred":(219,112,147),
+    "papayawhip":(255,239,213),
+    "peachpuff":(255,218,185),
+    "peru":(205,133,63),
+    "pink":(255,192,203),
+    "plum":(221,160,221),
+    "powderblue":(176,224,230),
+    "purple":(128,0,128),
+    "red":(255,0,0),
+    "rosybrown":(188,143,143),
+    "royalblue":(65,105,225),
+    "saddlebrown":(139,69,19),
+    "salmon":(250,128,114),
+    "sandybrown":(244,164,96),
+    "seagreen":(46,139,87),
+    "seashell":(255,245,238),
+    "sienna":(160,82,45),
+    "silver":(192,192,192),
+    "skyblue":(135,206,235),
+    "slateblue":(106,90,205),
+    "slategray":(112,128,144),
+    "slategrey":(112,128,144),
+    "snow":(255,250,250),
+    "springgreen":(0,255,127),
+    "steelblue":(70,130,180),
+    "tan":(210,180,140),
+    "teal":(0,128,128),
+    "thistle":(216,191,216),
+    "tomato":(255,99,71),
+    "turquoise":(64,224,208),
+    "violet":(238,130,238),
+    "wheat":(245,222,179),
+    "white":(255,255,255),
+    "whitesmoke":(245,245,245),
+    "yellow":(255,255,0),
+    "yellowgreen":(154,205,50),
+    "transparent":(0,0,0,0)
+})
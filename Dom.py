@@ -0,0 +1,151 @@
+import numpy as np
+
+import Quadtree
+
+class Node(object):
+    """View of one Dom node, as pv.Dom.Node
+    
+    Dom.node(i) and Dom.nodes() build these on demand for code written
+    against the Protovis node API; nodeValue reads the cached subtree sums.
+    """
+    __slots__ = ('dom','id')
+    
+    def __init__(self, dom, id):
+        self.dom = dom
+        self.id = id
+    
+    @property
+    def nodeName(self):
+        return self.dom.name[self.id] if self.dom.name is not None else None
+    
+    @property
+    def nodeValue(self):
+        return self.dom.sums()[self.id]
+    
+    @property
+    def parentNode(self):
+        p = self.dom.parent[self.id]
+        return Node(self.dom,p) if p >= 0 else None
+    
+    @property
+    def childNodes(self):
+        return [Node(self.dom,c) for c in self.dom.children(self.id).tolist()]
+    
+    @property
+    def depth(self):
+        return int(self.dom.depth[self.id])
+
+class Dom(object):
+    """Tree stored in flat arrays, as pv.Dom
+    
+    Nodes are the integers 0..n-1.  The tree is given by parent, where
+    parent[i] is the parent of node i and -1 marks the root.  Children are
+    held in CSR form: the children of node i are
+    child_index[child_offset[i]:child_offset[i + 1]], in node order.  levels
+    lists the nodes at each depth.
+    
+    value holds the leaf values; sums() aggregates them over every subtree
+    a level at a time with bincount.  update() changes some leaf values and
+    only adjusts the sums of their ancestors.  Every node carries the Dom
+    version at which its subtree sum last changed (stamp), so layouts can
+    redo just the parts of the tree that changed.
+    """
+    def __init__(self, parent, value=None, name=None):
+        parent = np.asarray(parent, dtype=np.intp)
+        n = len(parent)
+        roots = np.flatnonzero(parent < 0)
+        if len(roots) != 1:
+            raise ValueError, "a Dom must have exactly one root"
+        self.root = int(roots[0])
+        self.parent = parent
+        self.name = name
+        
+        order = np.argsort(parent, kind='mergesort')
+        self.child_index = order[1:]
+        counts = np.bincount(parent[self.child_index], minlength=n)
+        self.child_offset = np.concatenate(([0], np.cumsum(counts)))
+        self.leaf = counts == 0
+        
+        self.depth = np.zeros(n, dtype=np.intp)
+        self.levels = []
+        level = np.array([self.root])
+        reached = 0
+        while len(level):
+            self.depth[level] = len(self.levels)
+            self.levels.append(level)
+            reached += len(level)
+            level = self.children_of(level)
+        if reached != n:
+            raise ValueError, "parent links do not form a tree"
+        
+        self.value = np.zeros(n) if value is None else np.array(value, dtype=np.float64)
+        self.version = 0
+        self.stamp = np.zeros(n, dtype=np.int64)
+        self._sums = None
+    
+    def __len__(self):
+        return len(self.parent)
+    
+    def children(self,i):
+        """Returns the children of node i."""
+        return self.child_index[self.child_offset[i]:self.child_offset[i + 1]]
+    
+    def children_of(self,nodes):
+        """Returns the children of all the given nodes, grouped by parent."""
+        return self.child_index[Quadtree._gather(self.child_offset[nodes], self.child_offset[nodes + 1])]
+    
+    def node(self,i):
+        return Node(self,i)
+    
+    def nodes(self):
+        """Returns a Node view of every node, in node order."""
+        return [Node(self,i) for i in xrange(len(self))]
+    
+    def sums(self):
+        """Returns the sum of the leaf values under each node."""
+        if self._sums is None:
+            sums = np.where(self.leaf, self.value, 0.)
+            for level in reversed(self.levels[1:]):
+                sums += np.bincount(self.parent[level], sums[level], len(sums))
+            self._sums = sums
+        return self._sums
+    
+    def update(self,ids,values):
+        """Sets the values of the given leaves, adjusting only their ancestors' sums."""
+        ids = np.atleast_1d(np.asarray(ids, dtype=np.intp))
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), ids.shape)
+        sums = self.sums()
+        delta = np.where(self.leaf[ids], values - self.value[ids], 0.)
+        self.value[ids] = values
+        self.version += 1
+        n = len(sums)
+        while len(ids):
+            sums += np.bincount(ids, delta, n)
+            self.stamp[ids] = self.version
+            up = self.parent[ids] >= 0
+            ids = self.parent[ids][up]
+            delta = delta[up]
+        return self
+
+def from_map(map, root=None):
+    """Builds a Dom from nested mappings, as pv.dom(map)
+    
+    Mappings become internal nodes and everything else becomes a leaf with
+    that value.  Node names are the keys, with root as the root's name.
+    """
+    parent = [-1]
+    name = [root]
+    value = [0.]
+    stack = [(0,map)]
+    while stack:
+        (i,m) = stack.pop()
+        for (key,child) in sorted(m.iteritems()):
+            j = len(parent)
+            parent.append(i)
+            name.append(key)
+            if hasattr(child,'iteritems'):
+                value.append(0.)
+                stack.append((j,child))
+            else:
+                value.append(child)
+    return Dom(parent, value, name)
@@ -0,0 +1,15 @@
+import Mark
+
+class Dot(Mark.Mark):
+    """Dot mark: a shape of the given size (area) centered at left/top"""
+    defaults = dict(Mark.Mark.defaults, size=20, shape='circle', lineWidth=1.5, strokeStyle='#1f77b4')
+
+Mark.define_properties(Dot, {
+    'size': 'number',
+    'radius': 'number',
+    'shape': 'string',
+    'shapeAngle': 'number',
+    'lineWidth': 'number',
+    'strokeStyle': 'color',
+    'fillStyle': 'color',
+})
@@ -0,0 +1,186 @@
+import numpy as np
+
+import Quadtree
+
+class Force(object):
+    """Abstract force; apply(sim) adds to sim.fx and sim.fy"""
+    
+    def apply(self,sim):
+        raise NotImplementedError
+
+class charge(Force):
+    """n-body charge force, as pv.Force.charge
+    
+    Every pair of particles interacts with strength constant / d**2
+    (repulsive for the default negative constant), clamped below the
+    minimum distance and ignored beyond the maximum.  Far-away groups of
+    particles are approximated by their center with Barnes-Hut: a quadtree
+    node of size s at distance d is used as a whole when s / d < theta.
+    The traversal runs for all particles at once, a tree level per pass.
+    """
+    def __init__(self, k=-40):
+        self._k = k
+        self._theta = .9
+        self._min = 2
+        self._max = 500
+    
+    def constant(self,*args):
+        if len(args) == 0:
+            return self._k
+        self._k = args[0]
+        return self
+    
+    def theta(self,*args):
+        if len(args) == 0:
+            return self._theta
+        self._theta = args[0]
+        return self
+    
+    def domain(self,*args):
+        if len(args) == 0:
+            return (self._min,self._max)
+        self._min = args[0] or 1e-6
+        self._max = args[1] or 1e6
+        return self
+    
+    def _kick(self,dx,dy,strength):
+        """Returns the force components for offsets dx, dy to charges of the given strength."""
+        d = np.sqrt(dx * dx + dy * dy)
+        dn = 1. / np.maximum(d, self._min)
+        kc = np.where(d <= self._max, strength * dn * dn * dn, 0.)
+        return (dx * kc, dy * kc)
+    
+    def apply(self,sim):
+        tree = sim.quadtree()
+        px = tree._ix
+        py = tree._iy
+        n = len(px)
+        if n < 2:
+            return
+        
+        # centers of mass: every node is a contiguous run of the sorted points
+        count = (tree._end - tree._start).astype(np.float64)
+        sx = np.concatenate(([0.], np.cumsum(px)))
+        sy = np.concatenate(([0.], np.cumsum(py)))
+        cx = (sx[tree._end] - sx[tree._start]) / np.maximum(count, 1)
+        cy = (sy[tree._end] - sy[tree._start]) / np.maximum(count, 1)
+        theta2 = self._theta * self._theta
+        
+        fx = np.zeros(n)
+        fy = np.zeros(n)
+        p = np.arange(n)
+        node = np.zeros(n, dtype=np.intp)
+        while len(p):
+            dx = cx[node] - px[p]
+            dy = cy[node] - py[p]
+            size = tree._size[node]
+            far = size * size < theta2 * (dx * dx + dy * dy)
+            (ax,ay) = self._kick(dx[far], dy[far], self._k * count[node[far]])
+            fx += np.bincount(p[far], ax, n)
+            fy += np.bincount(p[far], ay, n)
+            
+            near = ~far
+            leaf = near & tree._leaf[node]
+            if leaf.any():
+                # particle-particle interactions within leaves
+                lp = p[leaf]
+                ln = node[leaf]
+                k = tree._end[ln] - tree._start[ln]
+                q = Quadtree._gather(tree._start[ln], tree._end[ln])
+                lp = np.repeat(lp, k)
+                other = q != lp
+                lp = lp[other]
+                q = q[other]
+                (ax,ay) = self._kick(px[q] - px[lp], py[q] - py[lp], self._k)
+                fx += np.bincount(lp, ax, n)
+                fy += np.bincount(lp, ay, n)
+            
+            inner = near & ~tree._leaf[node]
+            children = tree._child[node[inner]]
+            p = np.repeat(p[inner], 4)
+            node = children.ravel()
+            p = p[node >= 0]
+            node = node[node >= 0]
+        
+        sim.fx[tree._items] += fx
+        sim.fy[tree._items] += fy
+
+class spring(Force):
+    """Spring force between linked particles, as pv.Force.spring
+    
+    links is an (m,2) array (or sequence of pairs) of particle indices.
+    Tension and damping are normalized by the degree of the endpoints, as
+    in Protovis.  All links are evaluated at once.
+    """
+    def __init__(self, k=.1):
+        self._k = k
+        self._damping = .1
+        self._length = 20
+        self._links = np.empty((0,2), dtype=np.intp)
+        self._kl = np.empty(0)
+    
+    def constant(self,*args):
+        if len(args) == 0:
+            return self._k
+        self._k = args[0]
+        return self
+    
+    def damping(self,*args):
+        if len(args) == 0:
+            return self._damping
+        self._damping = args[0]
+        return self
+    
+    def length(self,*args):
+        if len(args) == 0:
+            return self._length
+        self._length = args[0]
+        return self
+    
+    def links(self,*args):
+        if len(args) == 0:
+            return self._links
+        links = np.asarray(args[0], dtype=np.intp).reshape(-1,2)
+        degree = np.bincount(links.ravel())
+        self._links = links
+        self._kl = 1. / np.sqrt(np.maximum(degree[links[:,0]], degree[links[:,1]]))
+        return self
+    
+    def apply(self,sim):
+        if len(self._links) == 0:
+            return
+        a = self._links[:,0]
+        b = self._links[:,1]
+        dx = sim.x[a] - sim.x[b]
+        dy = sim.y[a] - sim.y[b]
+        dn = np.sqrt(dx * dx + dy * dy)
+        dd = np.where(dn > 0, 1. / np.where(dn > 0, dn, 1), 1)
+        ks = self._k * self._kl
+        kd = self._damping * self._kl
+        kk = (ks * (dn - self._length) + kd * (dx * (sim.vx[a] - sim.vx[b]) + dy * (sim.vy[a] - sim.vy[b])) * dd) * dd
+        coincident = dn == 0
+        if coincident.any():
+            # nudge links with coincident ends apart in a random direction
+            jitter = .01 * (.5 - np.random.random_sample((2,int(coincident.sum()))))
+            dx[coincident] = jitter[0]
+            dy[coincident] = jitter[1]
+        n = len(sim.x)
+        fx = np.bincount(a, -kk * dx, n) - np.bincount(b, -kk * dx, n)
+        fy = np.bincount(a, -kk * dy, n) - np.bincount(b, -kk * dy, n)
+        sim.fx += fx
+        sim.fy += fy
+
+class drag(Force):
+    """Drag force, proportional to velocity, as pv.Force.drag"""
+    def __init__(self, k=.1):
+        self._k = k
+    
+    def constant(self,*args):
+        if len(args) == 0:
+            return self._k
+        self._k = args[0]
+        return self
+    
+    def apply(self,sim):
+        sim.fx -= self._k * sim.vx
+        sim.fy -= self._k * sim.vy
@@ -1,15 +1,26 @@
 import re
+import datetime
+
+import numpy as np
+
+# compiled (format, parse) pairs, shared by every Format with the same pattern
+_compiled_formats = {}
 
 class Format(object):
-    """Abstract"""
+    """Abstract
+    
+    Subclasses describe themselves by a pattern key and compile it once into
+    specialized format/parse callables.  Compiled callables are memoized by
+    pattern, so equal formats share them.
+    """
     
-    quoted_re = re.compile(r'[\\\^\$\*\+\?\[\]\(\)\.\{\}]')
+    quoted_re = re.compile(r'[\\\^\$\*\+\?\[\]\(\)\.\{\}\|]')
     
     def __init__(self):
-        pass
+        self._compiled = None
     
     def re(self,s):
-        (s_new,n) = self.quoted_re.subn(s)
+        (s_new,n) = self.quoted_re.subn(r'\\\g<0>',s)
         return s_new
     
     def pad(self,c,n,s):
@@ -18,8 +29,330 @@ class Format(object):
             return s
         else:
             return c*m + s
+    
+    def _key(self):
+        raise NotImplementedError
+    
+    def _compile(self):
+        """Returns (format, parse) callables for the current pattern."""
+        raise NotImplementedError
+    
+    def compiled(self):
+        if self._compiled is None:
+            key = self._key()
+            compiled = _compiled_formats.get(key)
+            if compiled is None:
+                compiled = _compiled_formats[key] = self._compile()
+            self._compiled = compiled
+        return self._compiled
+    
+    def format(self,x):
+        return self.compiled()[0](x)
+    
+    def __call__(self,x):
+        return self.format(x)
+    
+    def parse(self,s):
+        return self.compiled()[1](s)
+    
+    def format_many(self,array):
+        """Formats a whole column of values; returns a list of strings."""
+        f = self.compiled()[0]
+        return [f(x) for x in array]
+    
+    def parse_many(self,array):
+        """Parses a whole column of strings; returns a list of values."""
+        p = self.compiled()[1]
+        return [p(s) for s in array]
+
+def _round(x,k):
+    """Rounds x to a multiple of 1/k, halves away from zero (as round()).
+    
+    x is a number or a float64 array; both give the same results.
+    """
+    if not isinstance(x,np.ndarray):
+        return round(x * k) / k
+    a = np.abs(x) * k
+    r = np.floor(a)
+    r += a - r >= 0.5   # exact, unlike floor(a + 0.5)
+    return np.copysign(r,x) / k
+
+class number(Format):
+    """Number format, as pv.Format.number
+    
+    Configured with integerDigits, fractionDigits, integerPad, fractionPad,
+    decimal and group.  Plain fixed-precision patterns compile to a single
+    str.format template.
+    """
+    
+    def __init__(self):
+        Format.__init__(self)
+        self._mini = 0
+        self._maxi = float('inf')
+        self._minf = 0
+        self._maxf = 0
+        self._padi = '0'
+        self._padf = '0'
+        self._decimal = '.'
+        self._group = ','
+    
+    def _key(self):
+        return ('number',self._mini,self._maxi,self._minf,self._maxf,self._padi,self._padf,self._decimal,self._group)
+    
+    def _set(self,**kw):
+        for name,value in kw.iteritems():
+            setattr(self,name,value)
+        self._compiled = None
+        return self
+    
+    def integerDigits(self,*args):
+        if len(args) == 0:
+            return (self._mini,self._maxi)
+        return self._set(_mini=int(args[0]), _maxi=args[1] if len(args) > 1 else float('inf'))
+    
+    def fractionDigits(self,*args):
+        if len(args) == 0:
+            return (self._minf,self._maxf)
+        return self._set(_minf=int(args[0]), _maxf=args[1] if len(args) > 1 else int(args[0]))
+    
+    def integerPad(self,*args):
+        if len(args) == 0:
+            return self._padi
+        return self._set(_padi=args[0])
+    
+    def fractionPad(self,*args):
+        if len(args) == 0:
+            return self._padf
+        return self._set(_padf=args[0])
+    
+    def decimal(self,*args):
+        if len(args) == 0:
+            return self._decimal
+        return self._set(_decimal=args[0])
+    
+    def group(self,*args):
+        if len(args) == 0:
+            return self._group
+        return self._set(_group=args[0] or '')
+    
+    def _compile(self):
+        mini, maxi, minf, maxf = self._mini, self._maxi, self._minf, self._maxf
+        padi, padf, decimal, group = self._padi, self._padf, self._decimal, self._group
+        finite = maxf != float('inf')
+        k = 10. ** maxf if finite else 1.
+        
+        if finite and minf == maxf and mini <= 1 and maxi == float('inf') and group in ('',','):
+            # fixed precision: one template does rounding, grouping and padding
+            template = ('{0:%s.%df}' % (group, maxf)).format
+            if decimal == '.':
+                def format(x):
+                    return template(_round(x,k) + 0.)
+            else:
+                def format(x):
+                    s = template(_round(x,k) + 0.)
+                    return s.replace('.',decimal) if group == '' else s.replace('.','\0').replace(',',group).replace('\0',decimal)
+        else:
+            grouping = re.compile(r'\B(?=(?:\d{3})+(?!\d))')
+            def format(x):
+                if finite:
+                    x = _round(x,k)
+                    s = '%.*f' % (maxf, abs(x))
+                else:
+                    s = repr(abs(x))
+                i, _, f = s.partition('.')
+                f = f.rstrip('0')
+                if len(i) > maxi: i = i[len(i) - maxi:]
+                if len(i) < mini: i = padi * (mini - len(i)) + i
+                if len(i) > 3 and group: i = grouping.sub(group,i)
+                if x < 0: i = '-' + i
+                if len(f) < minf: f = f + padf * (minf - len(f))
+                return i + decimal + f if f else i
+        
+        def parse(s):
+            s = str(s)
+            if group: s = s.replace(group,'')
+            x = float(s.replace(decimal,'.'))
+            return _round(x,k) if finite else x
+        
+        return (format,parse)
+    
+    def format_many(self,array):
+        if self._group == '' and self._decimal == '.' and self._minf == self._maxf and self._mini <= 1 and self._maxi == float('inf') and self._maxf != float('inf'):
+            k = 10. ** self._maxf
+            x = _round(np.asarray(array, dtype=np.float64),k) + 0.
+            return np.char.mod('%%.%df' % self._maxf, x).tolist()
+        return Format.format_many(self,array)
+    
+    def parse_many(self,array):
+        """Parses a column of number strings into a float64 array."""
+        s = np.asarray(array).astype(str)
+        if self._group:
+            s = np.char.replace(s,self._group,'')
+        if self._decimal != '.':
+            s = np.char.replace(s,self._decimal,'.')
+        x = s.astype(np.float64)
+        if self._maxf != float('inf'):
+            k = 10. ** self._maxf
+            x = _round(x,k)
+        return x
+
+_months = ['January','February','March','April','May','June','July','August','September','October','November','December']
+_days = ['Sunday','Monday','Tuesday','Wednesday','Thursday','Friday','Saturday']
+
+# parse side of the strftime directives supported by pv.Format.date
+_date_fields = {
+    'a': ('(?:%s)' % '|'.join(d[:3] for d in _days), None),
+    'A': ('(?:%s)' % '|'.join(_days), None),
+    'b': ('(%s)' % '|'.join(m[:3] for m in _months), 'b'),
+    'B': ('(%s)' % '|'.join(_months), 'B'),
+    'd': (r'(\d{1,2})', 'day'),
+    'e': (r'\s?(\d{1,2})', 'day'),
+    'H': (r'(\d{1,2})', 'hour'),
+    'I': (r'(\d{1,2})', 'hour'),
+    'm': (r'(\d{1,2})', 'month'),
+    'M': (r'(\d{1,2})', 'minute'),
+    'p': ('(AM|PM|am|pm)', 'p'),
+    'S': (r'(\d{1,2})', 'second'),
+    'y': (r'(\d{2})', 'y'),
+    'Y': (r'(\d{4})', 'year'),
+    '%': ('%', None),
+}
 
 class date(Format):
+    """Date format, as pv.Format.date
+    
+    The pattern uses strftime directives.  Formatting compiles to the
+    pattern's strftime; parsing compiles the pattern once into a regular
+    expression (falling back to strptime for other directives).
+    """
+    
+    def __init__(self,pattern):
+        Format.__init__(self)
+        self._pattern = pattern
+    
+    def _key(self):
+        return ('date',self._pattern)
+    
+    def _compile(self):
+        pattern = self._pattern
+        expanded = pattern.replace('%D','%m/%d/%y').replace('%T','%H:%M:%S')
+        
+        def format(d):
+            return d.strftime(pattern)
+        
+        fields = []
+        regex = []
+        supported = True
+        for (text,directive) in re.findall(r'([^%]*)(%.?)?',expanded):
+            regex.append(self.re(text))
+            if not directive:
+                continue
+            field = _date_fields.get(directive[1:])
+            if field is None:
+                supported = False
+                break
+            regex.append(field[0])
+            if field[1] is not None:
+                fields.append(field[1])
+        
+        if not supported:
+            def parse(s):
+                return datetime.datetime.strptime(s,pattern)
+            return (format,parse)
+        
+        matcher = re.compile('^' + ''.join(regex) + '$').match
+        twelve = '%I' in expanded
+        
+        def parse(s):
+            m = matcher(s)
+            if m is None:
+                raise ValueError, "'%s' does not match format '%s'" % (s,pattern)
+            d = {'year':1970,'month':1,'day':1,'hour':0,'minute':0,'second':0}
+            pm = False
+            for (name,value) in zip(fields,m.groups()):
+                if name == 'b':
+                    d['month'] = [n[:3] for n in _months].index(value) + 1
+                elif name == 'B':
+                    d['month'] = _months.index(value) + 1
+                elif name == 'y':
+                    y = int(value)
+                    d['year'] = y + (2000 if y < 50 else 1900)
+                elif name == 'p':
+                    pm = value.lower() == 'pm'
+                else:
+                    d[name] = int(value)
+            if twelve:
+                d['hour'] = d['hour'] % 12 + (12 if pm else 0)
+            return datetime.datetime(**d)
+        
+        return (format,parse)
+    
+    def format_many(self,array):
+        if isinstance(array,np.ndarray) and array.dtype.kind == 'M':
+            array = array.astype('M8[us]').tolist()
+        return Format.format_many(self,array)
+
+_time_units = [(31536e6,'years'),(6048e5,'weeks'),(864e5,'days'),(36e5,'hours'),(6e4,'minutes'),(1e3,'seconds')]
+
+class time(Format):
+    """Duration format, as pv.Format.time
+    
+    Durations are in milliseconds.  type is "short" (e.g. "1.5 days") or
+    "long" (e.g. "1:02:03:04", days:hours:minutes:seconds).
+    """
+    
+    def __init__(self,type):
+        Format.__init__(self)
+        if type not in ('short','long'):
+            raise ValueError, "time format type must be 'short' or 'long'"
+        self._type = type
+    
+    def _key(self):
+        return ('time',self._type)
+    
+    def _compile(self):
+        if self._type == 'short':
+            def format(t):
+                for (ms,unit) in _time_units:
+                    if t >= ms or ms == 1e3:
+                        return '%.1f %s' % (t / ms, unit)
+            
+            def parse(s):
+                (value,unit) = s.split()
+                return float(value) * dict((u,ms) for (ms,u) in _time_units)[unit]
+        else:
+            def format(t):
+                s = int((t % 6e4) / 1e3)
+                m = int((t % 36e5) / 6e4)
+                a = [self.pad('0',2,str(s))]
+                if t >= 36e5:
+                    h = int((t % 864e5) / 36e5)
+                    a.append(self.pad('0',2,str(m)))
+                    if t >= 864e5:
+                        a.append(self.pad('0',2,str(h)))
+                        a.append(str(int(t // 864e5)))
+                    else:
+                        a.append(str(h))
+                else:
+                    a.append(str(m))
+                return ':'.join(reversed(a))
+            
+            def parse(s):
+                t = 0
+                for (value,ms) in zip(reversed(s.split(':')),(1e3,6e4,36e5,864e5)):
+                    t += int(value) * ms
+                return t
+        
+        return (format,parse)
+    
+    def format_many(self,array):
+        if self._type != 'short':
+            return Format.format_many(self,array)
+        t = np.asarray(array, dtype=np.float64)
+        thresholds = np.array([ms for (ms,unit) in _time_units])
+        u = np.minimum(np.searchsorted(-thresholds, -t, side='left'), len(_time_units) - 1)
+        units = np.array([unit for (ms,unit) in _time_units])
+        return np.char.add(np.char.mod('%.1f ', t / thresholds[u]), units[u]).tolist()
     
-    def format(self,d):
-        def switch
\ No newline at end of file
+    def parse_many(self,array):
+        return np.asarray(Format.parse_many(self,array), dtype=np.float64)
@@ -0,0 +1,382 @@
+import numpy as np
+
+import Scale
+
+class LatLng(object):
+    """Geographic position in degrees, as pv.Geo.LatLng"""
+    __slots__ = ('lat','lng')
+    
+    def __init__(self, lat, lng):
+        self.lat = lat
+        self.lng = lng
+    
+    def __repr__(self):
+        return 'LatLng(%r, %r)' % (self.lat,self.lng)
+    
+    def __eq__(self,other):
+        return isinstance(other,LatLng) and (self.lat,self.lng) == (other.lat,other.lng)
+    
+    def __ne__(self,other):
+        return not self == other
+
+def _coordinates(args):
+    """Returns (lat, lng) float64 arrays from lat and lng arrays, a sequence
+    of LatLngs (or of (lat,lng) pairs), or a single LatLng."""
+    if len(args) == 2:
+        return (np.atleast_1d(np.asarray(args[0], dtype=np.float64)), np.atleast_1d(np.asarray(args[1], dtype=np.float64)))
+    if len(args) != 1:
+        raise ValueError, "give lat and lng arrays, or a sequence of LatLngs"
+    d = args[0]
+    if isinstance(d,LatLng):
+        return (np.array([d.lat], dtype=np.float64), np.array([d.lng], dtype=np.float64))
+    if len(d) and isinstance(d[0],LatLng):
+        return (np.array([c.lat for c in d], dtype=np.float64), np.array([c.lng for c in d], dtype=np.float64))
+    d = np.asarray(d, dtype=np.float64).reshape(-1,2)
+    return (d[:,0], d[:,1])
+
+class Projection(object):
+    """Map projection, as pv.Geo.Projection
+    
+    project(lat,lng) takes arrays of degrees and returns (x, y) arrays with
+    y pointing north, roughly within [-1,1]; invert(x,y) goes back to (lat,
+    lng), and is None for projections without an inverse.  Both work on
+    whole arrays at once.  A projection is separable when x depends only
+    (and monotonically) on lng and y only on lat; the extent of such a
+    projection of some points is the projection of their lat/lng extent.
+    """
+    def __init__(self, project, invert=None, separable=False, name=None):
+        self.project = project
+        self.invert = invert
+        self.separable = separable
+        self.name = name
+    
+    def __reduce__(self):
+        if self.name in projections:
+            return (projection, (self.name,))
+        return (Projection, (self.project,self.invert,self.separable,self.name))
+
+def _identity(lat,lng):
+    return (lng / 180., lat / 90.)
+
+def _identity_invert(x,y):
+    return (y * 90., x * 180.)
+
+def _mercator(lat,lng):
+    y = np.log(np.tan(np.pi / 4 + np.radians(np.clip(lat, -85, 85)) / 2))
+    y /= np.pi
+    return (lng / 180., y)
+
+def _mercator_invert(x,y):
+    return (np.degrees(2 * np.arctan(np.exp(y * np.pi)) - np.pi / 2), x * 180.)
+
+def _gall_peters(lat,lng):
+    return (lng / 180., np.sin(np.radians(lat)))
+
+def _gall_peters_invert(x,y):
+    return (np.degrees(np.arcsin(y)), x * 180.)
+
+def _sinusoidal(lat,lng):
+    f = np.radians(lat)
+    return (lng / 180. * np.cos(f), f / (np.pi / 2))
+
+def _sinusoidal_invert(x,y):
+    f = y * (np.pi / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lng = np.where(np.cos(f) > 0, x * 180. / np.cos(f), 0.)
+    return (np.degrees(f), lng)
+
+def _aitoff(lat,lng):
+    l = np.radians(lng)
+    f = np.radians(lat)
+    cosf = np.cos(f)
+    z = np.arccos(np.clip(cosf * np.cos(l / 2), -1, 1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sinc = np.where(z != 0, np.sin(z) / z, 1.)
+    return (2 * cosf * np.sin(l / 2) / sinc / np.pi, np.sin(f) / sinc / np.pi)
+
+def _hammer(lat,lng):
+    l = np.radians(lng)
+    f = np.radians(lat)
+    c = np.sqrt(1 + np.cos(f) * np.cos(l / 2))
+    return (2 * np.sqrt(2) * np.cos(f) * np.sin(l / 2) / c / 3, np.sqrt(2) * np.sin(f) / c / 1.5)
+
+def _hammer_invert(x,y):
+    x = x * 3
+    y = y * 1.5
+    z = np.sqrt(np.maximum(1 - x * x / 16 - y * y / 4, 0))
+    return (np.degrees(np.arcsin(np.clip(z * y, -1, 1))), np.degrees(2 * np.arctan2(z * x, 2 * (2 * z * z - 1))))
+
+def albers(origin=(-98.,38.), parallels=(29.5,45.5), scale=1., translate=(0.,0.)):
+    """Returns an Albers equal-area conic Projection.
+    
+    origin is (lng, lat) and parallels the two standard parallels, in
+    degrees.  Projected coordinates are multiplied by scale and offset by
+    translate.
+    """
+    lng0 = np.radians(origin[0])
+    (f1,f2) = np.radians(parallels)
+    n = .5 * (np.sin(f1) + np.sin(f2))
+    C = np.cos(f1) ** 2 + 2 * n * np.sin(f1)
+    rho0 = np.sqrt(C - 2 * n * np.sin(np.radians(origin[1]))) / n
+    (tx,ty) = translate
+    
+    def project(lat,lng):
+        t = n * (np.radians(lng) - lng0)
+        rho = np.sqrt(np.maximum(C - 2 * n * np.sin(np.radians(lat)), 0)) / n
+        return (scale * rho * np.sin(t) + tx, scale * (rho0 - rho * np.cos(t)) + ty)
+    
+    def invert(x,y):
+        x = (x - tx) / scale
+        y = rho0 - (y - ty) / scale
+        rho = np.hypot(x, y) * np.sign(n)
+        t = np.arctan2(x * np.sign(n), y * np.sign(n))
+        f = np.arcsin(np.clip((C - (rho * n) ** 2) / (2 * n), -1, 1))
+        return (np.degrees(f), np.degrees(lng0 + t / n))
+    
+    return Projection(project, invert)
+
+def _albers_usa():
+    # the lower 48 states with Alaska, Hawaii and Puerto Rico moved and
+    # scaled into insets below them, after the d3 albersUsa projection
+    pieces = (albers(),
+              albers((-160.,60.), (55.,65.), .35, (-.33,-.2)),
+              albers((-160.,20.), (8.,18.), 1., (-.19,-.23)),
+              albers((-60.,10.), (8.,18.), 1.5, (.56,-.44)))
+    
+    def piece(lat,lng):
+        return np.where(lat > 50, 1, np.where(lng < -140, 2, np.where(lat < 21, 3, 0)))
+    
+    def project(lat,lng):
+        (lat,lng) = np.broadcast_arrays(lat, lng)
+        k = piece(lat,lng)
+        x = np.empty(lat.shape)
+        y = np.empty(lat.shape)
+        for (i,p) in enumerate(pieces):
+            mask = k == i
+            if mask.any():
+                (x[mask],y[mask]) = p.project(lat[mask], lng[mask])
+        return (x, y)
+    
+    # the insets are drawn over parts of the lower 48's plane (Mexico, the
+    # Pacific), so inversion tries each inset first and keeps its result if
+    # it falls within the inset's territory (lat and lng bounds)
+    territories = ((1,51.,72.,-180.,-129.), (2,18.,23.,-161.,-154.), (3,17.5,18.6,-68.,-65.))
+    
+    def invert(x,y):
+        (x,y) = np.broadcast_arrays(x, y)
+        (lat,lng) = pieces[0].invert(x,y)
+        done = np.zeros(x.shape, dtype=bool)
+        for (i,lat0,lat1,lng0,lng1) in territories:
+            (a,b) = pieces[i].invert(x,y)
+            mask = ~done & (a >= lat0) & (a <= lat1) & (b >= lng0) & (b <= lng1)
+            lat[mask] = a[mask]
+            lng[mask] = b[mask]
+            done |= mask
+        return (lat, lng)
+    
+    return Projection(project, invert)
+
+projections = {
+    'identity': Projection(_identity, _identity_invert, True),
+    'mercator': Projection(_mercator, _mercator_invert, True),
+    'gall-peters': Projection(_gall_peters, _gall_peters_invert, True),
+    'sinusoidal': Projection(_sinusoidal, _sinusoidal_invert),
+    'aitoff': Projection(_aitoff),
+    'hammer': Projection(_hammer, _hammer_invert),
+    'albers': albers(),
+    'albers-usa': _albers_usa(),
+    }
+for (name,p) in projections.iteritems():
+    p.name = name
+del name, p
+
+def projection(name):
+    """Returns the named projection (see projections)."""
+    try:
+        return projections[name]
+    except KeyError:
+        raise ValueError, "unknown projection '%s'" % name
+
+class _Ticks(object):
+    """The ticks of a geographic scale: ticks.lng(m) and ticks.lat(m)
+    return the meridians and parallels at nice intervals as (lat, lng)
+    array pairs, for drawing graticules."""
+    def __init__(self, scale):
+        self._scale = scale
+    
+    def _values(self,m):
+        s = self._scale
+        if s._lat.min is None:
+            return (np.arange(-80., 81., 10.), np.arange(-180., 181., 10.))
+        return (np.array(Scale.linear(s._lat.min,s._lat.max).ticks(m)),
+                np.array(Scale.linear(s._lng.min,s._lng.max).ticks(m)))
+    
+    def lng(self,m=10):
+        (lat,lng) = self._values(m)
+        return [(lat, np.full(len(lat), v)) for v in lng]
+    
+    def lat(self,m=10):
+        (lat,lng) = self._values(m)
+        return [(np.full(len(lng), v), lng) for v in lat]
+
+class scale(Scale.Scale):
+    """Geographic scale, as pv.Geo.scale
+    
+    Points are projected (see Projection) and the projected x and y are
+    mapped by two linear scales fitted to the domain, with the same scale
+    factor on both axes so that the map keeps its proportions, centered in
+    the range, and with north up.  map(lat,lng) does whole arrays at once;
+    scale(latlng) does one point.
+    
+    The fit keeps only extents: of the domain's lats and lngs, and of its
+    projected points.  extend() folds in another chunk of data and only
+    projects that chunk; with a separable projection (identity, mercator,
+    gall-peters) nothing is projected at all, since the projected extent
+    follows from the lat/lng extent.
+    """
+    def __init__(self, p=None):
+        Scale.Scale.__init__(self)
+        self._projection = projections['identity'] if p is None else self._as_projection(p)
+        self._x = Scale.linear()
+        self._y = Scale.linear()
+        self._range = ((0.,0.),(1.,1.))
+        self.ticks = _Ticks(self)
+        self._reset()
+        self._fit()
+    
+    def _as_projection(self,p):
+        return projection(p) if isinstance(p,basestring) else p
+    
+    def _reset(self):
+        self._lat = Scale.DomainAccumulator()
+        self._lng = Scale.DomainAccumulator()
+        self._px = Scale.DomainAccumulator()
+        self._py = Scale.DomainAccumulator()
+    
+    def projection(self,*args):
+        """Gets or sets the projection, by name or as a Projection; setting it clears the domain."""
+        if len(args) == 0:
+            return self._projection
+        self._projection = self._as_projection(args[0])
+        self._reset()
+        self._fit()
+        return self
+    
+    def domain(self,*args):
+        """Gets the lat/lng extent as two LatLngs, or fits the scale to lat
+        and lng arrays or to a sequence of LatLngs."""
+        if len(args) == 0:
+            if self._lat.min is None:
+                return [LatLng(-90,-180), LatLng(90,180)]
+            return [LatLng(self._lat.min,self._lng.min), LatLng(self._lat.max,self._lng.max)]
+        self._reset()
+        return self.extend(*args)
+    
+    def extend(self,*args):
+        """Widens the domain to cover another chunk of lat/lng data."""
+        (lat,lng) = _coordinates(args)
+        if lat.size == 0:
+            return self
+        self._lat.update(lat)
+        self._lng.update(lng)
+        if self._lat.min is None or self._lng.min is None:
+            return self     # nothing but NaNs so far
+        if self._projection.separable:
+            (x,y) = self._projection.project(np.array([self._lat.min,self._lat.max]), np.array([self._lng.min,self._lng.max]))
+        else:
+            (x,y) = self._projection.project(lat,lng)
+            ok = np.isfinite(x) & np.isfinite(y)
+            (x,y) = (x[ok],y[ok])
+        self._px.update(np.asarray(x))
+        self._py.update(np.asarray(y))
+        self._fit()
+        return self
+    
+    def range(self,*args):
+        """Gets or sets the range: range(w,h) for (0,0)-(w,h), or two (x,y) corners."""
+        if len(args) == 0:
+            return self._range
+        if len(args) != 2:
+            raise ValueError, "give a width and height, or two (x,y) corners"
+        if np.ndim(args[0]) == 0:
+            self._range = ((0.,0.),(float(args[0]),float(args[1])))
+        else:
+            self._range = (tuple(map(float,args[0])),tuple(map(float,args[1])))
+        self._fit()
+        return self
+    
+    def _extent(self):
+        if self._px.min is None:
+            # the whole world: the bounds of the projected edges of the lat/lng box
+            t = np.linspace(-1, 1, 181)
+            lat = np.concatenate((90 * t, 90 * t, np.full(181, -90.), np.full(181, 90.)))
+            lng = np.concatenate((np.full(181, -180.), np.full(181, 180.), 180 * t, 180 * t))
+            (x,y) = self._projection.project(lat,lng)
+            return (np.nanmin(x), np.nanmax(x), np.nanmin(y), np.nanmax(y))
+        return (self._px.min, self._px.max, self._py.min, self._py.max)
+    
+    def _fit(self):
+        (x0,x1,y0,y1) = self._extent()
+        ((rx0,ry0),(rx1,ry1)) = self._range
+        (w,h) = (abs(rx1 - rx0), abs(ry1 - ry0))
+        (dx,dy) = (x1 - x0, y1 - y0)
+        if dx > 0 and dy > 0:
+            k = min(w / dx, h / dy)
+        elif dx > 0 or dy > 0:
+            k = w / dx if dx > 0 else h / dy
+        else:
+            k = 1.
+        (cx,cy) = ((x0 + x1) / 2, (y0 + y1) / 2)
+        self._x.domain(cx - w / k / 2, cx + w / k / 2).range(rx0, rx1)
+        self._y.domain(cy - h / k / 2, cy + h / k / 2).range(ry1, ry0)
+        self._touch()
+    
+    def map(self,lat,lng):
+        """Projects and scales arrays of lats and lngs; returns (x, y) arrays."""
+        (x,y) = self._projection.project(np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64))
+        return (self._x.map(x), self._y.map(y))
+    
+    def scale(self,latlng):
+        """Returns the (x, y) position of a LatLng."""
+        (x,y) = self.map(latlng.lat, latlng.lng)
+        return (float(x), float(y))
+    
+    def __call__(self,latlng):
+        return self.scale(latlng)
+    
+    def invert_many(self,x,y):
+        """Returns the (lat, lng) arrays at the given positions."""
+        if self._projection.invert is None:
+            raise ValueError, "the projection cannot be inverted"
+        return self._projection.invert(self._x.invert_many(x), self._y.invert_many(y))
+    
+    def invert(self,x,y):
+        """Returns the LatLng at position (x, y)."""
+        (lat,lng) = self.invert_many(x,y)
+        return LatLng(float(lat), float(lng))
+    
+    def x(self):
+        """Returns the linear scale of the projected x."""
+        return self._x
+    
+    def y(self):
+        """Returns the linear scale of the projected y."""
+        return self._y
+    
+    def _state(self):
+        state = {'projection': self._projection.name or self._projection, 'range': self._range}
+        if self._lat.min is not None:
+            state['extent'] = [(a.min,a.max,a.count) for a in (self._lat,self._lng,self._px,self._py)]
+        return state
+    
+    def _load(self,state):
+        p = state['projection']
+        self._projection = self._as_projection(p)
+        self._range = tuple(tuple(c) for c in state['range'])
+        self._reset()
+        for (a,e) in zip((self._lat,self._lng,self._px,self._py), state.get('extent', ())):
+            (a.min,a.max,a.count) = e
+        self._fit()
+
+# lets Scale.from_json load geographic scales once this module is imported
+Scale._types[scale.__name__] = scale
@@ -0,0 +1,148 @@
+import numpy as np
+
+import Scale
+
+def _values(data,f):
+    """Returns the binned values of data as a float64 array."""
+    if f is None:
+        return np.asarray(data, dtype=np.float64)
+    if getattr(f,'vectorized',False):
+        return np.asarray(f(data), dtype=np.float64)
+    return np.array([f(d) for d in data], dtype=np.float64)
+
+class Bin(list):
+    """One histogram bin, as pv.histogram.Bin: the binned data plus x, dx and y"""
+    def __init__(self, items, x, dx, y):
+        list.__init__(self, items)
+        self.x = x
+        self.dx = dx
+        self.y = y
+
+class Bins(object):
+    """Array-backed histogram bins
+    
+    x (left edges), dx (widths), count and y (count, or the fraction of all
+    values if the histogram is not a frequency histogram) are numpy arrays
+    with one entry per bin.  Indexing or iterating gives Bin lists of the
+    binned data; those are only built when asked for.
+    """
+    def __init__(self, ticks, counts, total, frequency, data=None, index=None):
+        self.x = ticks[:-1]
+        self.dx = np.diff(ticks)
+        self.count = counts
+        self.y = counts if frequency else counts / float(max(total,1))
+        self._data = data
+        self._index = index
+        self._order = None
+    
+    def __len__(self):
+        return len(self.x)
+    
+    def __getitem__(self,i):
+        return Bin(self.members(i), self.x[i], self.dx[i], self.y[i])
+    
+    def __iter__(self):
+        for i in xrange(len(self)):
+            yield self[i]
+    
+    def members(self,i):
+        """Returns the data in bin i (empty for counts that were streamed)."""
+        if self._index is None:
+            return []
+        if self._order is None:
+            self._order = np.argsort(self._index, kind='mergesort')
+            self._starts = np.searchsorted(self._index[self._order], np.arange(len(self) + 1))
+        rows = self._order[self._starts[i]:self._starts[i + 1]]
+        if isinstance(self._data,np.ndarray):
+            return self._data[rows]
+        return [self._data[k] for k in rows]
+
+class histogram(object):
+    """Histogram, as pv.histogram
+    
+    histogram(data,f).bins(ticks) counts the values f(d) (or the data
+    itself) into the bins between consecutive ticks; without ticks, the
+    nice ticks of a linear scale over the values are used.  As in Protovis,
+    values outside the ticks fall into the first or last bin; NaNs are not
+    counted.  A Mark.vectorized f maps the whole data to its values in one
+    call.
+    
+    For data that does not fit in memory, set the ticks first and add the
+    data a chunk at a time with extend().  Only the per-bin counts are kept,
+    so histograms filled separately (e.g. in worker processes) combine with
+    merge().
+    """
+    Bin = Bin   # as pv.histogram.Bin
+    
+    def __init__(self, data=None, f=None):
+        self._data = data
+        self._f = f
+        self._frequency = True
+        self._ticks = None
+        self._counts = None
+        self._total = 0
+    
+    def frequency(self,*args):
+        if len(args) == 0:
+            return self._frequency
+        self._frequency = bool(args[0])
+        return self
+    
+    def ticks(self,*args):
+        """Gets or sets the bin edges; setting them discards streamed counts."""
+        if len(args) == 0:
+            return self._ticks
+        ticks = np.asarray(args[0], dtype=np.float64)
+        if len(ticks) < 2:
+            raise ValueError, "histogram ticks must have at least two values"
+        self._ticks = ticks
+        self._counts = np.zeros(len(ticks) - 1, dtype=np.int64)
+        self._total = 0
+        return self
+    
+    def _bin(self,x):
+        """Returns the bin index of each value, or -1 for NaN.
+        
+        Bins are closed on the right, as in Protovis: a value equal to a tick
+        falls into the bin that ends there, except for the first tick.
+        """
+        j = np.clip(np.searchsorted(self._ticks, x, side='left') - 1, 0, len(self._counts) - 1)
+        j[np.isnan(x)] = -1
+        return j
+    
+    def _count(self,index):
+        return np.bincount(index[index >= 0], minlength=len(self._counts))
+    
+    def extend(self,chunk,accessor=None):
+        """Adds the counts of another chunk of data."""
+        if self._ticks is None:
+            raise ValueError, "set the histogram ticks before streaming data into it"
+        x = _values(chunk,accessor).ravel()
+        self._counts += self._count(self._bin(x))
+        self._total += len(x)
+        return self
+    
+    def merge(self,other):
+        """Adds the streamed counts of a histogram with the same ticks."""
+        if other._ticks is None or not np.array_equal(self._ticks,other._ticks):
+            raise ValueError, "only histograms with the same ticks can be merged"
+        self._counts += other._counts
+        self._total += other._total
+        return self
+    
+    def bins(self,*args):
+        """Returns the Bins for the given ticks, or the current ticks."""
+        if len(args) > 0:
+            self.ticks(args[0])
+        if self._data is None:
+            if self._ticks is None:
+                raise ValueError, "histogram has neither data nor ticks"
+            return Bins(self._ticks, self._counts.copy(), self._total, self._frequency)
+        
+        x = _values(self._data,self._f)
+        if self._ticks is None:
+            ticks = Scale.linear(x[~np.isnan(x)]).ticks()
+            self.ticks(ticks if len(ticks) > 1 else ticks * 2)
+        index = self._bin(x)
+        return Bins(self._ticks, self._counts + self._count(index), self._total + len(x),
+                    self._frequency, self._data, index)
@@ -0,0 +1,22 @@
+import Mark
+
+@Mark.vectorized
+def _datum(data):
+    return data
+
+class Label(Mark.Mark):
+    """Label mark: text anchored at left/top; the text defaults to the datum"""
+    defaults = dict(Mark.Mark.defaults, text=_datum, font='10px sans-serif', textAngle=0,
+                    textStyle='black', textAlign='left', textBaseline='bottom', textMargin=3)
+
+Mark.define_properties(Label, {
+    'text': 'string',
+    'font': 'string',
+    'textAngle': 'number',
+    'textStyle': 'color',
+    'textAlign': 'string',
+    'textBaseline': 'string',
+    'textMargin': 'number',
+    'textDecoration': 'string',
+    'textShadow': 'string',
+})
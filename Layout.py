@@ -0,0 +1,613 @@
+import numpy as np
+
+import Force as forces
+import Nest
+import Simulation
+
+class Force(object):
+    """Force-directed network layout, as pv.Layout.Force
+    
+    nodes is the number of nodes (or a sequence of them); links is an (m,2)
+    array of node indices, or a sequence of pairs or of dicts with source
+    and target.  layout() runs a Simulation with charge, spring and drag
+    forces for a fixed number of iterations; the positions are then in x
+    and y.  Nodes start at random positions in width x height unless x and
+    y are assigned.
+    """
+    def __init__(self, nodes, links=()):
+        self._n = nodes if isinstance(nodes,(int,long)) else len(nodes)
+        if len(links) and isinstance(links[0],dict):
+            links = [(l['source'],l['target']) for l in links]
+        self._links = np.asarray(links, dtype=np.intp).reshape(-1,2)
+        self._width = 300
+        self._height = 300
+        self._iterations = 300
+        self._drag = .1
+        self._charge = -40
+        self._charge_min = 2
+        self._charge_max = 500
+        self._theta = .9
+        self._spring = .1
+        self._damping = .3
+        self._length = 20
+        self._seed = None
+        self.x = None
+        self.y = None
+        self.simulation = None
+    
+    def _property(name):
+        def accessor(self,*args):
+            if len(args) == 0:
+                return getattr(self,name)
+            setattr(self,name,args[0])
+            return self
+        return accessor
+    
+    width = _property('_width')
+    height = _property('_height')
+    iterations = _property('_iterations')
+    dragConstant = _property('_drag')
+    chargeConstant = _property('_charge')
+    chargeMinDistance = _property('_charge_min')
+    chargeMaxDistance = _property('_charge_max')
+    chargeTheta = _property('_theta')
+    springConstant = _property('_spring')
+    springDamping = _property('_damping')
+    springLength = _property('_length')
+    seed = _property('_seed')
+    del _property
+    
+    def layout(self):
+        """Runs the simulation; returns self."""
+        if self.x is None:
+            random = np.random.RandomState(self._seed)
+            self.x = random.random_sample(self._n) * self._width
+            self.y = random.random_sample(self._n) * self._height
+        sim = Simulation.Simulation(self.x,self.y)
+        sim.force(forces.drag(self._drag))
+        sim.force(forces.charge(self._charge).domain(self._charge_min,self._charge_max).theta(self._theta))
+        sim.force(forces.spring(self._spring).damping(self._damping).length(self._length).links(self._links))
+        sim.step(self._iterations)
+        self.simulation = sim
+        self.x = sim.x
+        self.y = sim.y
+        return self
+
+class Rollup(object):
+    """Network rollup, as pv.Layout.Rollup
+    
+    Nodes that share both an x and a y value are merged into one node, and
+    the links between merged nodes are merged into one weighted link.  x and
+    y are given to the constructor, as arrays with one entry per node or as
+    accessors of a node (a Mark.vectorized accessor maps the node list to
+    all the positions at once); they are not getters and setters as in
+    Protovis because x and y hold the merged positions.  After layout(),
+    x, y and count describe the merged nodes, index maps every node to its
+    merged node, and links (an (m,2) array) and weight the merged links.
+    Grouping is done with Nest._group, so it costs a few sorts.
+    """
+    def __init__(self, nodes, links=(), x=None, y=None):
+        self._nodes = nodes
+        if len(links) and isinstance(links[0],dict):
+            links = [(l['source'],l['target']) for l in links]
+        self._links = np.asarray(links, dtype=np.intp).reshape(-1,2)
+        self._x = x
+        self._y = y
+        self.x = None
+        self.y = None
+        self.count = None
+        self.index = None
+        self.links = None
+        self.weight = None
+    
+    def _positions(self,f):
+        if f is None:
+            raise ValueError, "a rollup needs both x and y"
+        if callable(f):
+            return Nest._column(self._nodes,f)
+        return Nest._array(f)
+    
+    def layout(self):
+        """Merges the nodes and links; returns self."""
+        ((self.x,self.y),self.index) = Nest._group([self._positions(self._x), self._positions(self._y)])
+        self.count = np.bincount(self.index, minlength=len(self.x))
+        ends = self.index[self._links]
+        if len(ends):
+            ((source,target),group) = Nest._group([ends[:,0], ends[:,1]])
+            self.links = np.column_stack((source,target)).astype(np.intp)
+            self.weight = np.bincount(group)
+        else:
+            self.links = np.empty((0,2), dtype=np.intp)
+            self.weight = np.empty(0, dtype=np.intp)
+        return self
+
+class Stack(object):
+    """Stacked layout, as pv.Layout.Stack
+    
+    The layer values are read into an (n layers, m points) array.  layout()
+    fills two preallocated (n,m) float64 buffers: y, the baseline of each
+    layer at each point, and dy, its thickness.  Rows are contiguous, so
+    stack.y[i] and stack.dy[i] can be bound directly to the bottom and
+    height of an Area.  The buffers are reused by later layouts of the same
+    shape.
+    
+    offset is "zero", "silhouette", "wiggle" (which uses the x positions)
+    or "expand"; order is None, "inside-out" or "reverse".  height is the
+    extent centered by silhouette and wiggle and filled by expand.
+    """
+    def __init__(self, layers=None, f=None):
+        self._values = None
+        self._x = None
+        self._offset = 'zero'
+        self._order = None
+        self._height = 1.
+        self.y = None
+        self.dy = None
+        if layers is not None:
+            self.layers(layers,f)
+    
+    def layers(self,*args):
+        """Gets or sets the layer values: an (n,m) array-like, or n layers and an accessor f.
+        
+        f gives the value of each datum of a layer; if it is marked with
+        Mark.vectorized it is given a whole layer and returns its row.
+        """
+        if len(args) == 0:
+            return self._values
+        layers = args[0]
+        f = args[1] if len(args) > 1 else None
+        if f is None:
+            values = np.array(layers, dtype=np.float64, ndmin=2)
+        elif getattr(f,'vectorized',False):
+            values = np.array([f(layer) for layer in layers], dtype=np.float64, ndmin=2)
+        else:
+            values = np.array([[f(d) for d in layer] for layer in layers], dtype=np.float64, ndmin=2)
+        self._values = values
+        return self
+    
+    def x(self,*args):
+        if len(args) == 0:
+            return self._x
+        self._x = np.asarray(args[0], dtype=np.float64)
+        return self
+    
+    def offset(self,*args):
+        if len(args) == 0:
+            return self._offset
+        if args[0] not in ('zero','silhouette','wiggle','expand'):
+            raise ValueError, "unknown stack offset '%s'" % args[0]
+        self._offset = args[0]
+        return self
+    
+    def order(self,*args):
+        if len(args) == 0:
+            return self._order
+        if args[0] not in (None,'inside-out','reverse'):
+            raise ValueError, "unknown stack order '%s'" % args[0]
+        self._order = args[0]
+        return self
+    
+    def height(self,*args):
+        if len(args) == 0:
+            return self._height
+        self._height = float(args[0])
+        return self
+    
+    def _index(self,values):
+        """Returns the layers in stacking order, bottom first."""
+        n = len(values)
+        if self._order == 'reverse':
+            return np.arange(n)[::-1]
+        if self._order != 'inside-out':
+            return np.arange(n)
+        peaks = np.argsort(values.argmax(axis=1), kind='mergesort')
+        sums = values.sum(axis=1)
+        top = bottom = 0.
+        tops = []
+        bottoms = []
+        for j in peaks.tolist():
+            if top < bottom:
+                top += sums[j]
+                tops.append(j)
+            else:
+                bottom += sums[j]
+                bottoms.append(j)
+        return np.array(bottoms[::-1] + tops, dtype=np.intp)
+    
+    def _baseline(self,dy):
+        """Returns the offset of the bottom layer at each point."""
+        h = self._height
+        (n,m) = dy.shape
+        if self._offset == 'silhouette':
+            return (h - dy.sum(axis=0)) / 2
+        if self._offset == 'wiggle':
+            x = self._x if self._x is not None else np.arange(m, dtype=np.float64)
+            s1 = dy.sum(axis=0)
+            dx = np.diff(x)
+            change = np.diff(dy, axis=1)
+            s3 = change / (2 * dx) + (np.cumsum(change, axis=0) - change) / dx
+            s2 = (s3 * dy[:,1:]).sum(axis=0)
+            shift = np.where(s1[1:] != 0, s2 / np.where(s1[1:] != 0, s1[1:], 1) * dx, 0)
+            return (h - s1[0]) / 2 - np.concatenate(([0.], np.cumsum(shift)))
+        if self._offset == 'expand':
+            total = dy.sum(axis=0)
+            empty = total == 0
+            dy *= h / np.where(empty, 1, total)
+            dy[:,empty] = h / n
+        return np.zeros(m)
+    
+    def layout(self):
+        """Computes y and dy for the current layers; returns self."""
+        values = self._values
+        if self.dy is None or self.dy.shape != values.shape:
+            self.y = np.empty(values.shape)
+            self.dy = np.empty(values.shape)
+        index = self._index(values)
+        ordered = values[index]
+        base = self._baseline(ordered)
+        self.dy[index] = ordered
+        below = np.cumsum(ordered, axis=0)
+        below -= ordered
+        below += base
+        self.y[index] = below
+        return self
+
+class Hierarchy(object):
+    """Base class for the layouts of a Dom tree
+    
+    Layouts write one entry per node into flat arrays.  Each keeps the Dom
+    version it last saw, so layout() only redoes the nodes whose subtree
+    values changed since (see Dom.update).
+    """
+    def __init__(self, dom):
+        self.dom = dom
+        self._width = 300.
+        self._height = 300.
+        self._seen = -1
+        n = len(dom)
+        self.x = np.zeros(n)
+        self.y = np.zeros(n)
+    
+    def width(self,*args):
+        if len(args) == 0:
+            return self._width
+        self._width = float(args[0])
+        return self
+    
+    def height(self,*args):
+        if len(args) == 0:
+            return self._height
+        self._height = float(args[0])
+        return self
+    
+    def _stale(self):
+        """Returns a mask of the nodes whose subtree values changed since the last layout."""
+        return self.dom.stamp > self._seen
+
+def _squarify(areas,w,h):
+    """Tiles a w x h rectangle with rectangles of the given areas, in order.
+    
+    Rows are grown along the shorter side while that improves their worst
+    aspect ratio (Bruls et al.).  Returns the x, y, dx and dy arrays.
+    """
+    n = len(areas)
+    out = np.zeros((4,n))
+    x = y = 0.
+    i = 0
+    while i < n:
+        side = min(w,h)
+        s = 0.
+        lo = float('inf')
+        hi = 0.
+        worst = float('inf')
+        j = i
+        while j < n:
+            a = areas[j]
+            s2 = s + a
+            lo2 = min(lo,a)
+            hi2 = max(hi,a)
+            ratio = max(side * side * hi2 / (s2 * s2), s2 * s2 / (side * side * lo2)) if lo2 > 0 and side > 0 else float('inf')
+            if j > i and ratio > worst:
+                break
+            (s,lo,hi,worst) = (s2,lo2,hi2,ratio)
+            j += 1
+        if s <= 0 or side <= 0:
+            out[0,i:] = x
+            out[1,i:] = y
+            break
+        t = s / side
+        lengths = np.asarray(areas[i:j]) / t
+        offsets = np.concatenate(([0.], np.cumsum(lengths)[:-1]))
+        if w >= h:
+            (out[0,i:j], out[1,i:j], out[2,i:j], out[3,i:j]) = (x, y + offsets, t, lengths)
+            x += t
+            w -= t
+        else:
+            (out[0,i:j], out[1,i:j], out[2,i:j], out[3,i:j]) = (x + offsets, y, lengths, t)
+            y += t
+            h -= t
+        i = j
+    return out
+
+class Treemap(Hierarchy):
+    """Space-filling treemap, as pv.Layout.Treemap
+    
+    The rectangle of each node (x, y, dx, dy) is divided among its children
+    by value.  mode is "squarify" (children largest first), "slice",
+    "dice" or "slice-and-dice".  The division of each node is kept as
+    fractions of its rectangle, and is only redone when the node's child
+    values or its rectangle's aspect ratio change; placing the rectangles is
+    vectorized a level at a time.
+    """
+    def __init__(self, dom):
+        Hierarchy.__init__(self,dom)
+        n = len(dom)
+        self.dx = np.zeros(n)
+        self.dy = np.zeros(n)
+        self._mode = 'squarify'
+        self._fractions = np.zeros((4,n))
+        self._aspect = np.full(n, np.nan)
+    
+    def mode(self,*args):
+        if len(args) == 0:
+            return self._mode
+        if args[0] not in ('squarify','slice','dice','slice-and-dice'):
+            raise ValueError, "unknown treemap mode '%s'" % args[0]
+        self._mode = args[0]
+        self._seen = -1
+        return self
+    
+    def _divide(self,i,w,h,sums):
+        """Computes the fractions of node i's rectangle taken by its children."""
+        kids = self.dom.children(i)
+        total = sums[i]
+        share = sums[kids] / total if total > 0 else np.zeros(len(kids))
+        mode = self._mode
+        if mode == 'slice-and-dice':
+            mode = 'slice' if self.dom.depth[i] & 1 else 'dice'
+        if mode == 'squarify':
+            order = np.argsort(-share, kind='mergesort')
+            rects = _squarify((share[order] * (w * h)).tolist(), w, h)
+            f = np.empty((4,len(kids)))
+            f[:,order] = rects / np.array([w,h,w,h])[:,np.newaxis] if w > 0 and h > 0 else 0.
+        else:
+            start = np.cumsum(share) - share
+            ones = np.ones(len(kids))
+            zeros = np.zeros(len(kids))
+            f = np.array((zeros,start,ones,share) if mode == 'slice' else (start,zeros,share,ones))
+        self._fractions[:,kids] = f
+    
+    def layout(self):
+        """Computes x, y, dx and dy for every node; returns self."""
+        dom = self.dom
+        sums = dom.sums()
+        stale = self._stale()
+        r = dom.root
+        (self.x[r], self.y[r], self.dx[r], self.dy[r]) = (0., 0., self._width, self._height)
+        fx, fy, fdx, fdy = self._fractions
+        for level in dom.levels[:-1]:
+            nodes = level[~dom.leaf[level]]
+            w = self.dx[nodes]
+            h = self.dy[nodes]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                aspect = w / h
+            redo = stale[nodes] | ~np.isclose(aspect, self._aspect[nodes], rtol=1e-9, equal_nan=True)
+            for i in nodes[redo].tolist():
+                self._divide(i, self.dx[i], self.dy[i], sums)
+            self._aspect[nodes] = aspect
+            kids = dom.children_of(nodes)
+            p = dom.parent[kids]
+            self.x[kids] = self.x[p] + fx[kids] * self.dx[p]
+            self.y[kids] = self.y[p] + fy[kids] * self.dy[p]
+            self.dx[kids] = fdx[kids] * self.dx[p]
+            self.dy[kids] = fdy[kids] * self.dy[p]
+        self._seen = dom.version
+        return self
+
+class Partition(Hierarchy):
+    """Adjacency (icicle) layout, as pv.Layout.Partition
+    
+    Each depth gets an equal band; along the other axis a node's children
+    split its extent by value.  orient is "top" (bands stacked downward) or
+    "left".  The whole layout is a few vectorized passes per level, so it
+    is simply recomputed.
+    """
+    def __init__(self, dom):
+        Hierarchy.__init__(self,dom)
+        n = len(dom)
+        self.dx = np.zeros(n)
+        self.dy = np.zeros(n)
+        self._orient = 'top'
+    
+    def orient(self,*args):
+        if len(args) == 0:
+            return self._orient
+        if args[0] not in ('top','left'):
+            raise ValueError, "unknown partition orient '%s'" % args[0]
+        self._orient = args[0]
+        return self
+    
+    def layout(self):
+        """Computes x, y, dx and dy for every node; returns self."""
+        dom = self.dom
+        sums = dom.sums()
+        n = len(dom)
+        lo = np.zeros(n)
+        extent = np.ones(n)
+        for level in dom.levels[:-1]:
+            nodes = level[~dom.leaf[level]]
+            kids = dom.children_of(nodes)
+            p = dom.parent[kids]
+            share = np.where(sums[p] > 0, sums[kids] / np.where(sums[p] > 0, sums[p], 1), 0.)
+            size = extent[p] * share
+            before = np.cumsum(size) - size
+            first = np.concatenate(([True], p[1:] != p[:-1]))
+            before -= before[first][np.cumsum(first) - 1]
+            lo[kids] = lo[p] + before
+            extent[kids] = size
+        band = 1. / len(dom.levels)
+        depth = dom.depth * band
+        (w,h) = (self._width,self._height)
+        if self._orient == 'top':
+            (self.x, self.dx, self.y, self.dy) = (lo * w, extent * w, depth * h, np.full(n, band * h))
+        else:
+            (self.x, self.dx, self.y, self.dy) = (depth * w, np.full(n, band * w), lo * h, extent * h)
+        self._seen = dom.version
+        return self
+
+def _place(a,b,c,x,y,r):
+    """Places circle c tangent to circles a and b."""
+    db = r[a] + r[c]
+    dx = x[b] - x[a]
+    dy = y[b] - y[a]
+    if db and (dx or dy):
+        da = r[b] + r[c]
+        dc = dx * dx + dy * dy
+        da *= da
+        db *= db
+        t = .5 + (db - da) / (2 * dc)
+        db -= dc
+        s = np.sqrt(max(0, 2 * da * (db + 2 * dc) - db * db - da * da)) / (2 * dc)
+        x[c] = x[a] + t * dx + s * dy
+        y[c] = y[a] + t * dy - s * dx
+    else:
+        x[c] = x[a] + db
+        y[c] = y[a]
+
+def _intersects(a,b,x,y,r):
+    dx = x[b] - x[a]
+    dy = y[b] - y[a]
+    dr = r[a] + r[b]
+    return .999 * dr * dr > dx * dx + dy * dy
+
+def _pack(r):
+    """Packs circles of radii r around the origin with a front chain.
+    
+    Returns (x, y, enclosing radius), centered on the bounding box.
+    """
+    n = len(r)
+    x = [0.] * n
+    y = [0.] * n
+    nxt = range(n)
+    prv = range(n)
+    def insert(a,b):
+        c = nxt[a]
+        nxt[a] = b
+        prv[b] = a
+        nxt[b] = c
+        prv[c] = b
+    def splice(a,b):
+        nxt[a] = b
+        prv[b] = a
+    
+    a = 0
+    x[0] = -r[0]
+    if n > 1:
+        b = 1
+        x[1] = r[1]
+        if n > 2:
+            _place(a,b,2,x,y,r)
+            insert(a,2)
+            prv[a] = 2
+            insert(2,b)
+            b = nxt[a]
+            i = 3
+            while i < n:
+                c = i
+                _place(a,b,c,x,y,r)
+                isect = False
+                s1 = s2 = 1
+                j = nxt[b]
+                while j != b:
+                    if _intersects(j,c,x,y,r):
+                        isect = True
+                        break
+                    j = nxt[j]
+                    s1 += 1
+                if isect:
+                    k = prv[a]
+                    while k != prv[j]:
+                        if _intersects(k,c,x,y,r):
+                            break
+                        k = prv[k]
+                        s2 += 1
+                    if s1 < s2 or (s1 == s2 and r[b] < r[a]):
+                        b = j
+                        splice(a,b)
+                    else:
+                        a = k
+                        splice(a,b)
+                else:
+                    insert(a,c)
+                    b = c
+                    i += 1
+    
+    x = np.array(x)
+    y = np.array(y)
+    r = np.asarray(r)
+    x -= ((x - r).min() + (x + r).max()) / 2
+    y -= ((y - r).min() + (y + r).max()) / 2
+    return (x, y, (r + np.hypot(x,y)).max())
+
+class Pack(Hierarchy):
+    """Circle-packing layout, as pv.Layout.Pack
+    
+    Leaves get radius sqrt(value); siblings are packed around each other
+    with a front chain and enclosed by their parent's circle, and the root
+    is scaled to fit the width and height.  order ("ascending",
+    "descending" or None) sorts siblings by radius before packing.  Each
+    node's packing is kept in its own unscaled frame and only redone when
+    the radii of its children change; positioning is vectorized a level at
+    a time.
+    """
+    def __init__(self, dom):
+        Hierarchy.__init__(self,dom)
+        n = len(dom)
+        self.r = np.zeros(n)
+        self._order = 'ascending'
+        self._lx = np.zeros(n)
+        self._ly = np.zeros(n)
+        self._radius = np.zeros(n)
+    
+    def order(self,*args):
+        if len(args) == 0:
+            return self._order
+        if args[0] not in (None,'ascending','descending'):
+            raise ValueError, "unknown pack order '%s'" % args[0]
+        self._order = args[0]
+        self._seen = -1
+        return self
+    
+    def _pack(self,i):
+        kids = self.dom.children(i)
+        radius = self._radius[kids]
+        if self._order is None:
+            order = np.arange(len(kids))
+        else:
+            order = np.argsort(radius if self._order == 'ascending' else -radius, kind='mergesort')
+        (x,y,enclosing) = _pack(radius[order].tolist())
+        self._lx[kids[order]] = x
+        self._ly[kids[order]] = y
+        self._radius[i] = enclosing
+    
+    def layout(self):
+        """Computes x, y and r for every node; returns self."""
+        dom = self.dom
+        stale = self._stale()
+        leaves = dom.leaf & stale
+        self._radius[leaves] = np.sqrt(np.maximum(dom.value[leaves], 0))
+        for level in reversed(dom.levels[:-1]):
+            for i in level[~dom.leaf[level] & stale[level]].tolist():
+                self._pack(i)
+        
+        root = dom.root
+        k = min(self._width,self._height) / 2 / self._radius[root] if self._radius[root] > 0 else 0.
+        (self.x[root], self.y[root]) = (self._width / 2, self._height / 2)
+        for level in dom.levels[:-1]:
+            kids = dom.children_of(level[~dom.leaf[level]])
+            p = dom.parent[kids]
+            self.x[kids] = self.x[p] + self._lx[kids] * k
+            self.y[kids] = self.y[p] + self._ly[kids] * k
+        self.r = self._radius * k
+        self._seen = dom.version
+        return self
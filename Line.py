@@ -0,0 +1,129 @@
+import numpy as np
+
+import Mark
+
+def minmax(x,y,tolerance=1):
+    """Returns the indices of the vertices to keep after min/max bucketing.
+    
+    Consecutive vertices whose x falls in the same tolerance-wide pixel
+    column are reduced to the first, lowest, highest and last of them, which
+    draws the same column of pixels as the full run.
+    """
+    n = len(x)
+    if n <= 4:
+        return np.arange(n)
+    column = np.floor(np.asarray(x) / tolerance)
+    starts = np.concatenate(([0], np.flatnonzero(column[1:] != column[:-1]) + 1))
+    ends = np.append(starts[1:], n)
+    y = np.asarray(y)
+    counts = ends - starts
+    keep = [starts, ends - 1]
+    for extreme in (np.minimum, np.maximum):
+        # the first vertex of each run that attains the run's extreme
+        hits = np.flatnonzero(y == np.repeat(extreme.reduceat(y, starts), counts))
+        first = np.concatenate(([True], np.diff(np.searchsorted(starts, hits, side='right')) != 0))
+        keep.append(hits[first])
+    return np.unique(np.concatenate(keep))
+
+def lttb(x,y,threshold):
+    """Returns the indices of threshold vertices chosen by Largest-Triangle-Three-Buckets.
+    
+    The first and last vertices are kept; each bucket in between keeps the
+    vertex forming the largest triangle with the previously kept vertex and
+    the mean of the next bucket.
+    """
+    n = len(x)
+    threshold = int(threshold)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = (np.arange(threshold - 1) * (n - 2.) / (threshold - 2)).astype(int) + 1
+    keep = np.empty(threshold, dtype=int)
+    keep[0] = 0
+    keep[-1] = n - 1
+    a = 0
+    for i in xrange(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            mx, my = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        else:
+            mx, my = x[n - 1], y[n - 1]
+        area = np.abs((x[a] - mx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (my - y[a]))
+        a = keep[i + 1] = lo + int(area.argmax())
+    return keep
+
+def rdp(x,y,tolerance=1):
+    """Returns the indices of the vertices kept by Ramer-Douglas-Peucker.
+    
+    No dropped vertex lies further than tolerance pixels from the simplified
+    path.
+    """
+    n = len(x)
+    if n <= 2:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        (i,j) = stack.pop()
+        if j - i < 2:
+            continue
+        dx, dy = x[j] - x[i], y[j] - y[i]
+        px, py = x[i + 1:j] - x[i], y[i + 1:j] - y[i]
+        # distance to the segment, not the infinite line through it
+        length = dx * dx + dy * dy
+        t = np.clip((px * dx + py * dy) / length, 0, 1) if length else 0
+        d = np.hypot(px - t * dx, py - t * dy)
+        k = int(d.argmax())
+        if d[k] > tolerance:
+            k += i + 1
+            keep[k] = True
+            stack.append((i,k))
+            stack.append((k,j))
+    return np.flatnonzero(keep)
+
+def decimate(x,y,method,tolerance=1):
+    """Returns the indices of the vertices to draw for a path in pixel coordinates.
+    
+    method is "minmax", "lttb" or "rdp" (None keeps every vertex).  For lttb
+    the number of vertices kept is two per tolerance-wide column spanned by x;
+    rdp runs on the minmax vertices.
+    """
+    if not method:
+        return np.arange(len(x))
+    if method == 'minmax':
+        return minmax(x,y,tolerance)
+    if method == 'lttb':
+        span = np.ptp(x) if len(x) else 0
+        return lttb(x,y,max(3, 2 * int(np.ceil(span / tolerance))))
+    if method == 'rdp':
+        # min/max bucketing first bounds the work on noisy data
+        keep = minmax(x,y,tolerance)
+        return keep[rdp(x[keep],y[keep],tolerance)]
+    raise ValueError, "unknown decimation method '%s'" % method
+
+class Line(Mark.Mark):
+    """Line mark: a path through left/top for each instance
+    
+    Set decimate to "minmax", "lttb" or "rdp" to drop vertices that do not
+    change the drawn path by more than tolerance pixels.  Decimation runs on
+    pixel coordinates when the path is drawn; path_stats then holds the
+    vertex counts before and after.
+    """
+    defaults = dict(Mark.Mark.defaults, lineWidth=1.5, lineJoin='miter', strokeStyle='#1f77b4', tolerance=1)
+    
+    def __init__(self, *arg):
+        Mark.Mark.__init__(self, *arg)
+        self.path_stats = None
+
+Mark.define_properties(Line, {
+    'lineWidth': 'number',
+    'lineJoin': 'string',
+    'strokeStyle': 'color',
+    'fillStyle': 'color',
+    'decimate': 'string',
+    'tolerance': 'number',
+})
@@ -1,7 +1,245 @@
+import numpy as np
+
+import pyprotovis as pv
+import Color
+import Scale
+
+def vectorized(f):
+    """Marks a property function as taking the whole data array at once.
+    
+    Unmarked functions are called once per datum, which is the slow path.
+    """
+    f.vectorized = True
+    return f
+
+def _property(name):
+    def accessor(self,*args):
+        if len(args) == 0:
+            return self.properties.get(name, self.defaults.get(name))
+        self.properties[name] = args[0]
+        self._dirty.add(name)
+        return self
+    accessor.__name__ = name
+    return accessor
+
+def define_properties(cls,types):
+    """Adds chainable property methods (mark.left(10), mark.left()) to cls."""
+    cls.property_types = dict(cls.property_types, **types)
+    for name in types:
+        setattr(cls, name, _property(name))
+    return cls
+
+def _snapshot(data):
+    return data.copy() if isinstance(data,np.ndarray) else list(data)
+
+def _changed_rows(old,new):
+    """Returns a bool mask of the rows of new that differ from old."""
+    if isinstance(old,np.ndarray) and isinstance(new,np.ndarray):
+        changed = np.asarray(old != new)
+    else:
+        changed = np.array([a is not b and bool(a != b) for (a,b) in zip(old,new)], dtype=bool)
+    if changed.ndim > 1:
+        changed = changed.reshape(len(changed),-1).any(axis=1)
+    return changed.reshape(len(new))
+
+def _changed_values(old,new):
+    changed = np.asarray(old != new)
+    if old.dtype.kind == 'f':
+        changed &= ~(np.isnan(old) & np.isnan(new))
+    if changed.ndim > 1:
+        changed = changed.any(axis=1)
+    return changed
+
+def _rgba(c):
+    if c is None:
+        return (0,0,0,0)
+    c = Color.color(c)
+    return (c.r,c.g,c.b,c.a)
+
 class Mark(object):
-    """Abstract Mark class"""
+    """Abstract Mark class
+    
+    Properties are bound with chainable methods and evaluated for the whole
+    data array at once by build(): constants broadcast, numpy arrays are
+    used as-is, scales use their batch path (map, or rgba for colors),
+    pv.index/pv.child/pv.parent become index columns, functions marked with
+    vectorized() get the whole data array, and any other function is called
+    once per datum.  The results are stored in self.scene, one array per
+    property: float64 for numbers, bool for booleans, (n,4) uint8 RGBA for
+    colors and object arrays otherwise.
+    
+    Builds are incremental.  Setting a property, replacing the data (rows are
+    compared with a snapshot of the previous data, so replace records rather
+    than mutating them) or changing a bound scale marks only the dependent
+    properties dirty; everything else is reused from the previous scene.
+    Per-datum functions are only re-run for the changed rows.  After each
+    build, self.changed flags the instances whose values changed and
+    self.stats counts recomputed and reused properties and instances;
+    self.revision counts the builds that changed anything, so renderers can
+    reuse their output for marks whose revision is the same.
+    """
+    
+    # property name -> type: 'number', 'boolean', 'string', 'color' or 'object'
+    property_types = {}
+    defaults = {'data': [None], 'visible': True, 'antialias': True, 'reverse': False}
+    
     def __init__(self, *arg):
-        self.properties = []
+        self.properties = {}
         self.handlers = {}
+        self.parent = None
+        self.index = 0
+        self.childIndex = 0
+        self.scene = None
+        self.changed = None
+        self.stats = None
+        self.revision = 0
+        self._dirty = set()
+        self._stamps = {}
+        self._snapshot = None
+    
+    def bound(self):
+        """Returns the names of the properties to evaluate, in a fixed order."""
+        return sorted(name for name in self.property_types
+                      if name != 'data' and (name in self.properties or name in self.defaults))
+    
+    def build(self):
+        """Evaluates the dirty properties for all instances into self.scene."""
+        data = self.data()
+        n = len(data)
+        previous = self.scene
+        full = previous is None or len(previous['data']) != n
+        if full:
+            rows = np.ones(n, dtype=bool)
+        elif 'data' in self._dirty:
+            rows = _changed_rows(self._snapshot, data)
+        else:
+            rows = np.zeros(n, dtype=bool)
+        
+        scene = {'data': data}
+        changed = rows.copy()
+        recomputed = reused = 0
+        for name in self.bound():
+            value = self.properties.get(name, self.defaults.get(name))
+            stale = full or name in self._dirty or self._stamp(value) != self._stamps.get(name)
+            old = None if full else previous.get(name)
+            if old is not None and not stale and not (self._depends_on_data(value) and rows.any()):
+                scene[name] = old
+                reused += 1
+                continue
+            
+            if old is not None and not stale and callable(value) and not getattr(value,'vectorized',False) and not isinstance(value,Scale.Scale):
+                # only the data changed: re-run the per-datum function on changed rows
+                column = np.array(old)
+                changes = np.flatnonzero(rows)
+                column[changes] = self._column(self.property_types[name], [value(data[i]) for i in changes], len(changes))
+            else:
+                column = self.evaluate(name, data)
+            
+            if old is None:
+                changed[:] = True
+            else:
+                changed |= _changed_values(old, column)
+            scene[name] = column
+            self._stamps[name] = self._stamp(value)
+            recomputed += 1
+        
+        self.scene = scene
+        self.changed = changed
+        if full or changed.any():
+            self.revision += 1
+        self._dirty.clear()
+        self._snapshot = _snapshot(data)
+        n_changed = int(changed.sum())
+        self.stats = {'properties_recomputed': recomputed,
+                      'properties_reused': reused,
+                      'instances_recomputed': n_changed,
+                      'instances_reused': n - n_changed}
+        return self
+    
+    def render(self):
+        """Builds this mark and its descendants; totals their stats in render_stats."""
+        self.build()
+        totals = dict(self.stats)
+        for child in getattr(self,'children',()):
+            for (k,v) in child.render().render_stats.iteritems():
+                totals[k] += v
+        self.render_stats = totals
+        return self
+    
+    def _stamp(self,value):
+        return value._version if isinstance(value,Scale.Scale) else None
+    
+    def _depends_on_data(self,value):
+        if value is pv.index or value is pv.child or value is pv.parent:
+            return False
+        return callable(value) or isinstance(value,Scale.Scale)
+    
+    def evaluate(self,name,data):
+        """Returns the column of values of property name for data."""
+        n = len(data)
+        kind = self.property_types[name]
+        value = self.properties.get(name, self.defaults.get(name))
+        
+        if value is pv.index:
+            column = np.arange(n)
+        elif value is pv.child:
+            column = np.repeat(self.childIndex, n)
+        elif value is pv.parent:
+            column = np.repeat(self.parent.index if self.parent is not None else 0, n)
+        elif isinstance(value,Scale.Scale):
+            if kind == 'color' and hasattr(value,'rgba'):
+                return value.rgba(data)
+            column = value.map(data)
+        elif isinstance(value,np.ndarray):
+            column = value
+        elif callable(value):
+            if getattr(value,'vectorized',False):
+                column = value(data)
+            else:
+                column = [value(d) for d in data]
+        else:
+            return self._constant(kind, value, n)
+        
+        return self._column(kind, column, n)
+    
+    def _constant(self,kind,value,n):
+        if kind == 'color':
+            return np.broadcast_to(Color.to_uint8(_rgba(value)), (n,4))
+        if kind == 'number':
+            return np.broadcast_to(np.float64(value if value is not None else np.nan), (n,))
+        if kind == 'boolean':
+            return np.broadcast_to(np.bool_(value), (n,))
+        column = np.empty(1, dtype=object)
+        column[0] = value
+        return np.broadcast_to(column, (n,))
     
-        
\ No newline at end of file
+    def _column(self,kind,column,n):
+        if kind == 'color':
+            column = np.asarray(column)
+            if column.dtype == np.uint8 and column.shape == (n,4):
+                return column
+            return Color.to_uint8(np.array([_rgba(c) for c in column], dtype=np.float64).reshape(n,4))
+        if kind == 'number':
+            return np.asarray(column, dtype=np.float64)
+        if kind == 'boolean':
+            return np.asarray(column, dtype=bool)
+        if isinstance(column,np.ndarray) and column.dtype == object:
+            return column
+        values = np.empty(n, dtype=object)
+        values[:] = column
+        return values
+
+define_properties(Mark, {
+    'data': 'object',
+    'visible': 'boolean',
+    'left': 'number',
+    'right': 'number',
+    'top': 'number',
+    'bottom': 'number',
+    'cursor': 'string',
+    'title': 'string',
+    'reverse': 'boolean',
+    'antialias': 'boolean',
+    'events': 'string',
+    'id': 'string',
+})
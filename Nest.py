@@ -0,0 +1,404 @@
+import numpy as np
+
+import pyprotovis as pv
+import Scale
+
+def _array(values):
+    """Returns values as a 1-d array, falling back to dtype object for sequences."""
+    a = np.asarray(values)
+    if a.ndim != 1:
+        a = np.empty(len(values), dtype=object)
+        for (i,v) in enumerate(values):
+            a[i] = v
+    return a
+
+def _length(data):
+    if isinstance(data,dict):
+        return len(data.itervalues().next()) if data else 0
+    return len(data)
+
+def _column(data,f):
+    """Returns f of every datum as an array.
+    
+    data is a sequence of records, a numpy (structured) array or a dict of
+    columns; f is a field or column name, or an accessor of a datum (a
+    Mark.vectorized accessor is given the data and returns the column).
+    None gives the data itself.
+    """
+    if f is None:
+        return _array(data)
+    if isinstance(f,basestring):
+        if isinstance(data,(dict,np.ndarray)):
+            return _array(data[f])
+        return _array([d[f] for d in data])
+    if getattr(f,'vectorized',False):
+        return _array(f(data))
+    return _array([f(d) for d in data])
+
+def _rows(data,rows):
+    """Returns the data at the given row indices, in the same form as data."""
+    if isinstance(data,np.ndarray):
+        return data[rows]
+    if isinstance(data,dict):
+        return dict((k,np.asarray(v)[rows]) for (k,v) in data.iteritems())
+    return [data[i] for i in rows]
+
+def _factorize(column):
+    """Returns (distinct keys in first-seen order, code of each key).
+    
+    Integer keys spanning a range not much larger than their number are
+    looked up in a direct-address table, in one pass; other keys go
+    through the sort in Scale._factorize.
+    """
+    n = len(column)
+    if n and column.dtype.kind in 'iub':
+        lo = int(column.min())
+        span = int(column.max()) - lo + 1
+        if span <= 4 * n + 1024:
+            slot = column.astype(np.intp) - lo
+            # reversed assignment leaves the first row of each key
+            first = np.full(span, n, dtype=np.intp)
+            first[slot[::-1]] = np.arange(n - 1, -1, -1)
+            present = np.flatnonzero(first < n)
+            present = present[np.argsort(first[present])]
+            table = np.empty(span, dtype=np.intp)
+            table[present] = np.arange(len(present))
+            return (column[first[present]], table[slot])
+    return Scale._factorize(column)
+
+def _group(columns):
+    """Groups rows by their keys in the given columns.
+    
+    Returns (the keys of each group, one array per column, and the group of
+    each row); groups are numbered in first-seen order.  Each column is
+    factorized into codes and the codes are combined a column at a time, so
+    the work is a few vectorized passes (or sorts, for keys that are not
+    small integers) however many rows there are.
+    """
+    group = None
+    codes = []
+    keys = []
+    for column in columns:
+        (distinct,code) = _factorize(column)
+        keys.append(distinct)
+        if group is None:
+            group = code
+            codes.append(np.arange(len(distinct)))
+            continue
+        m = len(distinct)
+        (combined,group) = _factorize(group.astype(np.int64) * m + code)
+        codes = [c[combined // m] for c in codes] + [combined % m]
+    return ([k[c] for (k,c) in zip(keys,codes)], group)
+
+def _ranks(keys,order):
+    """Returns the rank of each of the (distinct) keys under the comparator order."""
+    ranks = np.empty(len(keys), dtype=np.intp)
+    if order is None or order is pv.naturalOrder:
+        ranks[np.argsort(keys, kind='mergesort')] = np.arange(len(keys))
+    elif order is pv.reverseOrder:
+        ranks[np.argsort(keys, kind='mergesort')[::-1]] = np.arange(len(keys))
+    else:
+        ranks[sorted(xrange(len(keys)), cmp=lambda a,b: order(keys[a],keys[b]))] = np.arange(len(keys))
+    return ranks
+
+# vectorized rollups, computed from per-group count, sum, min and max
+rollups = ('count','sum','mean','min','max')
+
+# the statistics each named rollup is computed from
+_needs = {'count': (), 'sum': ('sum',), 'mean': ('sum',), 'min': ('min',), 'max': ('max',)}
+
+def _stats(group,n,values,names):
+    """Returns the count and the named statistics ("sum", "min" or "max")
+    of the values in each of n groups."""
+    stats = {'count': np.bincount(group, minlength=n)}
+    if 'sum' in names:
+        stats['sum'] = np.bincount(group, values, n)
+    extremes = [name for name in ('min','max') if name in names]
+    if extremes and len(values) == 0:
+        for name in extremes:
+            stats[name] = np.full(n, np.inf if name == 'min' else -np.inf)
+    elif extremes:
+        # every group has members, so the groups are runs of the sorted rows
+        ordered = values[np.argsort(group)]
+        starts = np.concatenate(([0], np.cumsum(stats['count'])[:-1]))
+        for name in extremes:
+            stats[name] = getattr(np,name + 'imum').reduceat(ordered, starts)
+    return stats
+
+class Nest(object):
+    """Group-by, as pv.Nest
+    
+    Nest(data).key(f).key(g) groups the data by f and then by g; keys are
+    field or column names or accessors, which may be Mark.vectorized to
+    compute a level's keys in a single call.  data is a sequence of
+    records, a numpy structured array or a dict of columns.  entries() and
+    map() give the nested groups as in Protovis; groups() gives the same
+    result as flat arrays.
+    
+    Rows are grouped once for all the keys (see _group) and group members
+    are only gathered when the leaves are asked for.  rollup(f) replaces
+    each group by f(members); the named rollups ("count", "sum", "mean",
+    "min", "max") instead reduce a value column with bincount and reduceat.
+    Keys are in first-seen order unless sortKeys() is given; sorting is
+    only done when the result is built, and only over the distinct keys.
+    
+    With a named rollup the data can also be streamed: Nest() without data,
+    then extend() a chunk at a time.  Only the per-group count, sum, min
+    and max are kept, so nests filled separately combine with merge().
+    """
+    def __init__(self, data=None):
+        self._data = data
+        self._keys = []
+        self._key_order = []
+        self._value_order = False
+        self._rollup = None
+        self._value = None
+        self._grouped = None
+        self._stream = None
+    
+    def key(self,f):
+        """Adds a grouping level by f."""
+        self._keys.append(f)
+        self._key_order.append(False)
+        self._grouped = None
+        return self
+    
+    def sortKeys(self,order=None):
+        """Sorts the keys of the last level by the comparator order (natural order by default)."""
+        if not self._keys:
+            raise ValueError, "add a key before sorting keys"
+        self._key_order[-1] = order
+        return self
+    
+    def sortValues(self,order=None):
+        """Sorts the members of each group by the comparator order (natural order by default)."""
+        self._value_order = order
+        return self
+    
+    def rollup(self,f,value=None):
+        """Sets the rollup: a function of each group's members, or a named
+        rollup (see rollups) of value, a field name or accessor."""
+        if isinstance(f,basestring) and f not in rollups:
+            raise ValueError, "unknown rollup '%s'" % f
+        self._rollup = f
+        self._value = value
+        return self
+    
+    def _named(self):
+        return isinstance(self._rollup,basestring)
+    
+    def _groups(self):
+        if self._grouped is None:
+            columns = [_column(self._data,k) for k in self._keys]
+            if columns:
+                self._grouped = _group(columns)
+            else:
+                self._grouped = ([], np.zeros(_length(self._data), dtype=np.intp))
+        return self._grouped
+    
+    def extend(self,chunk):
+        """Adds another chunk of data to a streamed nest with a named rollup."""
+        if not self._named():
+            raise ValueError, "streaming needs a named rollup, such as rollup('sum','x')"
+        columns = [_column(chunk,k) for k in self._keys]
+        if columns:
+            (keys,group) = _group(columns)
+            n = len(keys[0])
+        else:
+            (keys,group) = ([], np.zeros(_length(chunk), dtype=np.intp))
+            n = 1
+        self._accumulate(zip(*[k.tolist() for k in keys]) if keys else [()], self._stats(chunk,group,n))
+        return self
+    
+    def merge(self,other):
+        """Adds the groups streamed into another nest with the same keys and rollup."""
+        if other._stream is not None:
+            self._accumulate(other._stream['keys'], other._stream)
+        return self
+    
+    def _accumulate(self,keys,stats):
+        """Folds per-group statistics into the stream, matching groups by key with a dict."""
+        if self._stream is None:
+            self._stream = {'keys': [], 'index': {}}
+            for name in ('count','sum','min','max'):
+                if name in stats:
+                    self._stream[name] = np.empty(0, dtype=np.int64 if name == 'count' else np.float64)
+        s = self._stream
+        index = s['index']
+        ids = np.empty(len(keys), dtype=np.intp)
+        for (i,k) in enumerate(keys):
+            j = index.get(k)
+            if j is None:
+                j = index[k] = len(s['keys'])
+                s['keys'].append(k)
+            ids[i] = j
+        n = len(s['keys'])
+        for name in ('count','sum','min','max'):
+            if name not in s:
+                continue
+            fill = {'min': np.inf, 'max': -np.inf}.get(name, 0)
+            if len(s[name]) < n:
+                s[name] = np.concatenate((s[name], np.full(n - len(s[name]), fill)))
+            if name == 'min':
+                s[name][ids] = np.minimum(s[name][ids], stats[name])
+            elif name == 'max':
+                s[name][ids] = np.maximum(s[name][ids], stats[name])
+            else:
+                s[name][ids] += stats[name]
+    
+    def _result(self):
+        """Returns (the keys of each group, one array per level, and the group values)."""
+        if self._stream is not None:
+            s = self._stream
+            keys = [_array([k[j] for k in s['keys']]) for j in xrange(len(self._keys))]
+            return (keys, self._reduce(s))
+        (keys,group) = self._groups()
+        n = len(keys[0]) if keys else 1
+        if self._named():
+            return (keys, self._reduce(self._stats(self._data,group,n)))
+        
+        # gather the members of every group at once, in input order
+        order = np.argsort(group, kind='mergesort')
+        starts = np.concatenate(([0], np.cumsum(np.bincount(group, minlength=n))))
+        values = []
+        for i in xrange(n):
+            members = _rows(self._data, order[starts[i]:starts[i + 1]])
+            if self._value_order is not False:
+                members = self._sort(members)
+            values.append(members if self._rollup is None else self._rollup(members))
+        return (keys, values)
+    
+    def _stats(self,data,group,n):
+        names = _needs[self._rollup]
+        values = np.asarray(_column(data,self._value), dtype=np.float64) if names else None
+        return _stats(group,n,values,names)
+    
+    def _reduce(self,stats):
+        if self._rollup == 'mean':
+            with np.errstate(invalid='ignore'):
+                return stats['sum'] / stats['count']
+        return stats[self._rollup]
+    
+    def _sort(self,members):
+        order = self._value_order
+        if isinstance(members,np.ndarray) and members.dtype.names is None and order in (None,pv.naturalOrder,pv.reverseOrder):
+            members = np.sort(members, kind='mergesort')
+            return members[::-1] if order is pv.reverseOrder else members
+        return sorted(members, cmp=order)
+    
+    def groups(self):
+        """Returns (the keys of each group, one array per level, and the
+        group values), ordered as in entries()."""
+        (keys,values) = self._result()
+        if not keys:
+            return (keys, values)
+        # unsorted levels keep the order in which each key was first seen
+        # under its parent, which is the first-seen order of the key prefix
+        ranks = []
+        prefix = None
+        for (k,order) in zip(keys,self._key_order):
+            (distinct,code) = _factorize(k)
+            if prefix is None:
+                prefix = code
+            else:
+                prefix = _factorize(prefix.astype(np.int64) * len(distinct) + code)[1]
+            ranks.append(prefix if order is False else _ranks(distinct,order)[code])
+        order = np.lexsort(ranks[::-1])
+        if isinstance(values,np.ndarray):
+            values = values[order]
+        else:
+            values = [values[i] for i in order]
+        return ([k[order] for k in keys], values)
+    
+    def entries(self):
+        """Returns the groups as nested lists of {'key':..., 'values':...}."""
+        (keys,values) = self.groups()
+        if not keys:
+            return values[0] if len(values) else []
+        root = []
+        path = []
+        keys = [k.tolist() for k in keys]
+        for i in xrange(len(values)):
+            key = [k[i] for k in keys]
+            j = 0
+            while j < len(path) and path[j]['key'] == key[j]:
+                j += 1
+            del path[j:]
+            for k in key[j:-1]:
+                entry = {'key': k, 'values': []}
+                (path[-1]['values'] if path else root).append(entry)
+                path.append(entry)
+            (path[-1]['values'] if path else root).append({'key': key[-1], 'values': values[i]})
+        return root
+    
+    def map(self):
+        """Returns the groups as nested dicts from key to values."""
+        (keys,values) = self.groups()
+        if not keys:
+            return values[0] if len(values) else {}
+        root = {}
+        keys = [k.tolist() for k in keys]
+        for i in xrange(len(values)):
+            m = root
+            for k in keys[:-1]:
+                m = m.setdefault(k[i], {})
+            m[keys[-1][i]] = values[i]
+        return root
+
+class Flatten(object):
+    """Flattens nested mappings into records, as pv.Flatten
+    
+    Flatten(map).key("a").key("b") walks two levels of map and gives one
+    record per leaf, {'a': key, 'b': key, 'value': leaf}; key(name,f)
+    stores f(key) instead.  leaf(f) walks down until f(value) is true
+    (the levels beyond the named keys are not recorded).  columns() gives
+    the same records as a dict of arrays, which is the fastest way to feed
+    them back into a Nest or a mark.
+    """
+    def __init__(self, map):
+        self._map = map
+        self._keys = []
+        self._leaf = None
+    
+    def key(self,name,f=None):
+        self._keys.append((name,f))
+        return self
+    
+    def leaf(self,f):
+        self._leaf = f
+        return self
+    
+    def _walk(self):
+        """Returns the key path and value of every leaf."""
+        leaves = []
+        depth = len(self._keys)
+        stack = [((),self._map)]
+        while stack:
+            (path,value) = stack.pop()
+            if self._leaf(value) if self._leaf is not None else len(path) == depth or not hasattr(value,'iteritems'):
+                leaves.append((path,value))
+                continue
+            for (k,v) in reversed(value.items()):
+                stack.append((path + (k,),v))
+        return leaves
+    
+    def array(self):
+        """Returns the leaves as a list of records."""
+        records = []
+        for (path,value) in self._walk():
+            record = {}
+            for ((name,f),k) in zip(self._keys,path):
+                record[name] = f(k) if f is not None else k
+            record['value'] = value
+            records.append(record)
+        return records
+    
+    def columns(self):
+        """Returns the leaves as a dict of columns."""
+        leaves = self._walk()
+        columns = {}
+        for (j,(name,f)) in enumerate(self._keys):
+            keys = [path[j] if j < len(path) else None for (path,value) in leaves]
+            columns[name] = _array([f(k) for k in keys] if f is not None else keys)
+        columns['value'] = _array([value for (path,value) in leaves])
+        return columns
@@ -0,0 +1,30 @@
+import Mark
+
+class Panel(Mark.Mark):
+    """Container for other marks
+    
+    Children are built once per render (not once per panel instance), after
+    the panel itself; see Mark.render.
+    """
+    def __init__(self, *arg):
+        Mark.Mark.__init__(self, *arg)
+        self.children = []
+    
+    def add(self,type):
+        """Creates a child mark of the given class and returns it."""
+        child = type()
+        child.parent = self
+        child.childIndex = len(self.children)
+        self.children.append(child)
+        return child
+
+Mark.define_properties(Panel, {
+    'width': 'number',
+    'height': 'number',
+    'lineWidth': 'number',
+    'strokeStyle': 'color',
+    'fillStyle': 'color',
+    'overflow': 'string',
+    'transform': 'object',
+    'canvas': 'object',
+})
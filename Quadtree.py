@@ -0,0 +1,301 @@
+import heapq
+
+import numpy as np
+
+# maximum depth: the deepest cells are 2**-depth of the bounds on a side
+depth = 16
+
+def _spread(v):
+    """Spreads the low 16 bits of v out to the even bit positions."""
+    v = v.astype(np.uint64)
+    for (shift,mask) in ((8,0x00FF00FF),(4,0x0F0F0F0F),(2,0x33333333),(1,0x55555555)):
+        v = (v | (v << np.uint64(shift))) & np.uint64(mask)
+    return v
+
+def _gather(starts,ends):
+    """Returns the concatenation of arange(s,e) for each range."""
+    counts = ends - starts
+    total = counts.sum()
+    if total == 0:
+        return np.empty(0, dtype=np.intp)
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+    return np.arange(total) + offsets
+
+class Node(object):
+    """View of one quadtree node, as pv.Quadtree.Node
+    
+    Walks the tree from Quadtree.root(): nodes lists the four child cells
+    (None where a quadrant is empty), x1/y1/x2/y2 bound the cell and
+    points() returns the ids inside it.  The queries never build these.
+    """
+    __slots__ = ('tree','id')
+    
+    def __init__(self, tree, id):
+        self.tree = tree
+        self.id = id
+    
+    @property
+    def leaf(self):
+        return bool(self.tree._leaf[self.id])
+    
+    @property
+    def x1(self):
+        return self.tree._x1[self.id]
+    
+    @property
+    def y1(self):
+        return self.tree._y1[self.id]
+    
+    @property
+    def x2(self):
+        return self.tree._x1[self.id] + self.tree._size[self.id]
+    
+    @property
+    def y2(self):
+        return self.tree._y1[self.id] + self.tree._size[self.id]
+    
+    @property
+    def nodes(self):
+        """The children c1..c4 (top-left, top-right, bottom-left, bottom-right) or None."""
+        return [Node(self.tree,c) if c >= 0 else None for c in self.tree._child[self.id].tolist()]
+    
+    def points(self):
+        """Returns the ids of the (live) points under this node."""
+        t = self.tree
+        ids = t._items[t._start[self.id]:t._end[self.id]]
+        return ids[t._alive[ids]]
+
+class Quadtree(object):
+    """Point quadtree, as pv.Quadtree
+    
+    Quadtree(x,y) indexes the points (x[i],y[i]) under the ids i.  The tree
+    is built in bulk: points are sorted by Morton (z-order) code, so every
+    node covers a contiguous run of the sorted points, and nodes are created
+    a level at a time with searchsorted.  Nodes live in flat arrays (start,
+    end, x1, y1, size, child); a node with more than leaf_size points is
+    split, down to the maximum depth.  As in Protovis, the bounds are the
+    square around the points.
+    
+    insert() and remove() are incremental: new points go to a small buffer
+    that queries scan directly and removed points are masked out; the tree
+    is rebuilt on the next query once the buffer or the removals grow too
+    large.  rect(), radius() and nearest() return point ids.
+    """
+    def __init__(self, x, y, leaf_size=8):
+        x = np.asarray(x, dtype=np.float64).ravel()
+        y = np.asarray(y, dtype=np.float64).ravel()
+        if len(x) != len(y):
+            raise ValueError, "x and y must have the same length"
+        self.leaf_size = leaf_size
+        self._x = x.copy()
+        self._y = y.copy()
+        self._alive = np.ones(len(x), dtype=bool)
+        self._n = len(x)
+        self._build()
+    
+    def __len__(self):
+        return int(self._alive[:self._n].sum())
+    
+    def root(self):
+        return Node(self,0)
+    
+    def _build(self):
+        ids = np.flatnonzero(self._alive[:self._n])
+        x = self._x[ids]
+        y = self._y[ids]
+        n = len(ids)
+        if n > 0:
+            x0, y0 = x.min(), y.min()
+            size = max(x.max() - x0, y.max() - y0) or 1.
+        else:
+            x0, y0, size = 0., 0., 1.
+        cells = 1 << depth
+        qx = np.clip(np.floor((x - x0) * (cells / size)), 0, cells - 1).astype(np.int64)
+        qy = np.clip(np.floor((y - y0) * (cells / size)), 0, cells - 1).astype(np.int64)
+        codes = _spread(qx) | (_spread(qy) << np.uint64(1))
+        order = np.argsort(codes)
+        codes = codes[order]
+        self._items = ids[order]
+        self._ix = x[order]
+        self._iy = y[order]
+        
+        starts = [np.zeros(1, dtype=np.intp)]
+        ends = [np.array([n], dtype=np.intp)]
+        x1s = [np.array([x0])]
+        y1s = [np.array([y0])]
+        sizes = [np.array([size])]
+        links = []
+        m = 1
+        split = np.array([n > self.leaf_size])
+        f_ids = np.zeros(1, dtype=np.intp)[split]
+        f_keys = np.zeros(1, dtype=np.uint64)[split]
+        f_x1, f_y1 = x1s[0][split], y1s[0][split]
+        quadrants = np.arange(5, dtype=np.uint64)
+        for level in xrange(depth):
+            if len(f_ids) == 0:
+                break
+            shift = np.uint64(2 * (depth - level - 1))
+            keys = f_keys[:,np.newaxis] * np.uint64(4) + quadrants
+            bounds = np.searchsorted(codes, (keys << shift).ravel()).reshape(-1,5)
+            counts = bounds[:,1:] - bounds[:,:4]
+            (p,c) = np.nonzero(counts)
+            ids_new = m + np.arange(len(p))
+            links.append((f_ids[p], c, ids_new))
+            half = size / (2 << level)
+            x1 = f_x1[p] + (c & 1) * half
+            y1 = f_y1[p] + (c >> 1) * half
+            s = bounds[p,c]
+            e = bounds[p,c + 1]
+            starts.append(s)
+            ends.append(e)
+            x1s.append(x1)
+            y1s.append(y1)
+            sizes.append(np.repeat(half, len(p)))
+            m += len(p)
+            split = (e - s) > self.leaf_size
+            f_ids = ids_new[split]
+            f_keys = keys[p,c][split]
+            f_x1, f_y1 = x1[split], y1[split]
+        
+        self._start = np.concatenate(starts)
+        self._end = np.concatenate(ends)
+        self._x1 = np.concatenate(x1s)
+        self._y1 = np.concatenate(y1s)
+        self._size = np.concatenate(sizes)
+        self._child = np.full((m,4), -1, dtype=np.intp)
+        for (p,c,ids_new) in links:
+            self._child[p,c] = ids_new
+        self._leaf = (self._child < 0).all(axis=1)
+        self._built = self._n
+        self._removed = 0
+    
+    def _reserve(self,k):
+        if self._n + k > len(self._x):
+            capacity = max(2 * len(self._x), self._n + k, 16)
+            for name in ('_x','_y','_alive'):
+                old = getattr(self,name)
+                new = np.zeros(capacity, dtype=old.dtype)
+                new[:self._n] = old[:self._n]
+                setattr(self,name,new)
+    
+    def insert(self,x,y):
+        """Adds points; returns their ids (an array, or an int for one point)."""
+        scalar = np.ndim(x) == 0
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+        self._reserve(len(x))
+        ids = np.arange(self._n, self._n + len(x))
+        self._x[ids] = x
+        self._y[ids] = y
+        self._alive[ids] = True
+        self._n += len(x)
+        return int(ids[0]) if scalar else ids
+    
+    def remove(self,ids):
+        """Removes the points with the given ids."""
+        ids = np.atleast_1d(ids)
+        self._removed += int(self._alive[ids].sum())
+        self._alive[ids] = False
+        return self
+    
+    def _refresh(self):
+        """Rebuilds the tree if the insert buffer or the removals grew too large."""
+        if self._n - self._built > 1024 + self._built // 64 or self._removed > self._built // 2:
+            self._build()
+    
+    def _pending(self):
+        ids = np.arange(self._built, self._n)
+        return ids[self._alive[ids]]
+    
+    def _search(self,overlaps,contains):
+        """Returns the sorted-order indices of the points in the nodes selected
+        by the overlaps(x1,y1,x2,y2) and contains(x1,y1,x2,y2) node tests,
+        and the indices that still need a per-point test."""
+        full = []
+        partial = []
+        frontier = np.zeros(1, dtype=np.intp)
+        while len(frontier):
+            x1 = self._x1[frontier]
+            y1 = self._y1[frontier]
+            x2 = x1 + self._size[frontier]
+            y2 = y1 + self._size[frontier]
+            hit = overlaps(x1,y1,x2,y2)
+            inside = hit & contains(x1,y1,x2,y2)
+            full.append(frontier[inside])
+            rest = frontier[hit & ~inside]
+            leaf = self._leaf[rest]
+            partial.append(rest[leaf])
+            children = self._child[rest[~leaf]].ravel()
+            frontier = children[children >= 0]
+        full = np.concatenate(full)
+        partial = np.concatenate(partial)
+        return (_gather(self._start[full], self._end[full]),
+                _gather(self._start[partial], self._end[partial]))
+    
+    def _ids(self,full,candidates,test):
+        """Returns the live ids of full plus the candidates that pass test(x,y)."""
+        candidates = candidates[test(self._ix[candidates], self._iy[candidates])]
+        ids = self._items[np.concatenate((full, candidates))]
+        ids = ids[self._alive[ids]]
+        pending = self._pending()
+        pending = pending[test(self._x[pending], self._y[pending])]
+        return np.sort(np.concatenate((ids, pending)))
+    
+    def rect(self,x1,y1,x2,y2):
+        """Returns the ids of the points with x1 <= x <= x2 and y1 <= y <= y2."""
+        self._refresh()
+        (full,candidates) = self._search(
+            lambda nx1,ny1,nx2,ny2: (nx1 <= x2) & (nx2 >= x1) & (ny1 <= y2) & (ny2 >= y1),
+            lambda nx1,ny1,nx2,ny2: (nx1 >= x1) & (nx2 <= x2) & (ny1 >= y1) & (ny2 <= y2))
+        return self._ids(full, candidates, lambda px,py: (px >= x1) & (px <= x2) & (py >= y1) & (py <= y2))
+    
+    def radius(self,x,y,r):
+        """Returns the ids of the points within distance r of (x,y)."""
+        self._refresh()
+        r2 = r * r
+        def overlaps(nx1,ny1,nx2,ny2):
+            dx = np.maximum(np.maximum(nx1 - x, x - nx2), 0)
+            dy = np.maximum(np.maximum(ny1 - y, y - ny2), 0)
+            return dx * dx + dy * dy <= r2
+        def contains(nx1,ny1,nx2,ny2):
+            dx = np.maximum(np.abs(nx1 - x), np.abs(nx2 - x))
+            dy = np.maximum(np.abs(ny1 - y), np.abs(ny2 - y))
+            return dx * dx + dy * dy <= r2
+        (full,candidates) = self._search(overlaps,contains)
+        return self._ids(full, candidates, lambda px,py: (px - x) ** 2 + (py - y) ** 2 <= r2)
+    
+    def nearest(self,x,y):
+        """Returns the id of the point nearest to (x,y), or None if there are none."""
+        self._refresh()
+        best, best_d2 = None, float('inf')
+        pending = self._pending()
+        if len(pending):
+            d2 = (self._x[pending] - x) ** 2 + (self._y[pending] - y) ** 2
+            k = int(d2.argmin())
+            best, best_d2 = int(pending[k]), d2[k]
+        
+        heap = [(0., 0)]
+        while heap:
+            (d2,node) = heapq.heappop(heap)
+            if d2 >= best_d2:
+                break
+            if self._leaf[node]:
+                s, e = self._start[node], self._end[node]
+                ids = self._items[s:e]
+                d2 = (self._ix[s:e] - x) ** 2 + (self._iy[s:e] - y) ** 2
+                d2[~self._alive[ids]] = np.inf
+                if len(d2):
+                    k = int(d2.argmin())
+                    if d2[k] < best_d2:
+                        best, best_d2 = int(ids[k]), d2[k]
+                continue
+            children = self._child[node]
+            children = children[children >= 0]
+            x1 = self._x1[children]
+            y1 = self._y1[children]
+            dx = np.maximum(np.maximum(x1 - x, x - x1 - self._size[children]), 0)
+            dy = np.maximum(np.maximum(y1 - y, y - y1 - self._size[children]), 0)
+            for (c,cd2) in zip(children.tolist(), (dx * dx + dy * dy).tolist()):
+                if cd2 < best_d2:
+                    heapq.heappush(heap, (cd2,c))
+        return best
@@ -0,0 +1,12 @@
+import Mark
+
+class Rule(Mark.Mark):
+    """Rule mark: a horizontal or vertical line"""
+    defaults = dict(Mark.Mark.defaults, lineWidth=1, strokeStyle='black')
+
+Mark.define_properties(Rule, {
+    'width': 'number',
+    'height': 'number',
+    'lineWidth': 'number',
+    'strokeStyle': 'color',
+})
@@ -1,21 +1,38 @@
 import math
+import json
 import types
 import numbers
 import bisect
+import random
+
+import numpy as np
 
 import pyprotovis as pv
 import pyprotovis.Format
 import Color
 
 class Scale(object):
-    """Abstract base class for Scales"""
+    """Abstract base class for Scales
+    
+    Scales pickle as a compact state of plain values and numpy arrays, and
+    to_json()/from_json() round-trip the same state through JSON.  Derived
+    data (interpolators, compiled evaluators, search indexes) is not stored;
+    it is rebuilt when the state is loaded.
+    """
+    
+    # bumped by every mutator, so dependents (e.g. marks) can tell a scale changed
+    _version = 0
+    
     def __init__(self):
-        return self
+        pass
+    
+    def _touch(self):
+        self._version += 1
     
     def interpolator(self,start,end):
         """Returns fn that interpolates between given values"""
         if isinstance(start,numbers.Number):
-            return lambda t: t * (end - start) + start
+            return lambda t: start + t * (end - start) if t < .5 else end - (1 - t) * (end - start)
         
         # otherwise, assume color
         start = Color.color(start)
@@ -24,11 +41,11 @@ class Scale(object):
             a = start.a * (1 - t) + end.a * t
             if (a < 1e-5): a = 0
             if start.a == 0:
-                return Color.rgb(end.r,end.g,end.b,a)
+                return Color.Rgb(end.r,end.g,end.b,a)
             elif end.a == 0:
-                return Color.rgb(start.r,start.g,start.b,a)
+                return Color.Rgb(start.r,start.g,start.b,a)
             else:
-                return Color.rgb(
+                return Color.Rgb(
                                   round(start.r * (1 - t) + end.r * t),
                                   round(start.g * (1 - t) + end.g * t),
                                   round(start.b * (1 - t) + end.b * t),
@@ -37,6 +54,100 @@ class Scale(object):
     
     def by(self,f):
         raise NotImplementedError
+    
+    def _state(self):
+        """Returns the defining state as plain values and numpy arrays."""
+        raise NotImplementedError
+    
+    def _load(self,state):
+        """Restores the state returned by _state() on a fresh scale."""
+        raise NotImplementedError
+    
+    def __getstate__(self):
+        return self._state()
+    
+    def __setstate__(self,state):
+        self.__init__()
+        self._load(state)
+    
+    def to_json(self):
+        """Returns the scale as a JSON string; see from_json."""
+        return json.dumps(dict(self._state(), type=type(self).__name__), default=_to_json)
+
+class DomainAccumulator(object):
+    """Running min/max of streamed data, for fitting quantitative domains.
+    
+    update() folds in one chunk (any iterable, or a numpy array) in a single
+    pass, skipping NaNs.  min and max are None until a value has been seen.
+    """
+    def __init__(self):
+        self.min = None
+        self.max = None
+        self.count = 0
+    
+    def update(self,chunk,min_accessor=None,max_accessor=None):
+        """Folds chunk into the extent; returns True if min or max changed."""
+        if max_accessor is None:
+            max_accessor = min_accessor
+        
+        if min_accessor is None and isinstance(chunk,np.ndarray):
+            if chunk.size == 0:
+                return False
+            self.count += chunk.size
+            if chunk.dtype.kind == 'f':
+                if np.isnan(chunk).all():
+                    return False
+                return self._merge(np.nanmin(chunk).item(),np.nanmax(chunk).item())
+            return self._merge(chunk.min().item(),chunk.max().item())
+        
+        lo = hi = None
+        n = 0
+        for d in chunk:
+            a = d if min_accessor is None else min_accessor(d)
+            b = a if max_accessor is min_accessor else max_accessor(d)
+            if a == a and (lo is None or a < lo): lo = a    # a != a for NaN
+            if b == b and (hi is None or b > hi): hi = b
+            n += 1
+        self.count += n
+        return self._merge(lo,hi)
+    
+    def _merge(self,lo,hi):
+        if lo is None:
+            return False
+        changed = False
+        if self.min is None or lo < self.min:
+            self.min = lo
+            changed = True
+        if self.max is None or hi > self.max:
+            self.max = hi
+            changed = True
+        return changed
+
+class _TickCache(object):
+    """Small bounded memo of generated ticks, shared by all scales."""
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = {}
+    
+    def get(self,key):
+        return self._entries.get(key)
+    
+    def put(self,key,value):
+        if len(self._entries) >= self.maxsize:
+            self._entries.clear()
+        self._entries[key] = value
+        return value
+
+_tick_cache = _TickCache()
+
+_tick_formatters = {}
+
+def _tick_formatter(digits):
+    """Returns a cached number format with the given fraction digits."""
+    f = _tick_formatters.get(digits)
+    if f is None:
+        f = _tick_formatters[digits] = pv.Format.number().fractionDigits(digits)
+    return f
 
 class quantitative(Scale):
     """Implement abstract quantitative scale."""
@@ -48,41 +159,171 @@ class quantitative(Scale):
         self._interpolators = [pv.identity]
         self._type = numbers.Number
         self._negative = False
-        self._forward = pv.identity
-        self._inverse = pv.identity
         self._tickFormat = str
+        self._compiled = None
+        self._extent = None
+        self.transform(pv.identity,pv.identity)
         
         self.domain(*args)
-        return self
     
     def scale(self,x):
-        j = bisect.bisect_left(self._domain,x)
-        j = max(0, min(len(self._interpolators) - 1, j))
-        return self._interpolators[j]((self._forward(x) - self._transformed_domain[j]) / (self._transformed_domain[j + 1] - self._transformed_domain[j]))
+        return (self._compiled or self.compile()._compiled)(x)
     
     def __call__(self,x):
         return self.scale(x)
     
+    def compile(self):
+        """Freezes the current domain/range/transform into a fast evaluator.
+        
+        Precomputes per-segment start and width tables and binds the
+        transform with the sign of the domain already resolved.  A segment
+        is evaluated from its nearer end, as r0 + t * (r1 - r0) for t below
+        .5 and r1 - (1 - t) * (r1 - r0) above, with t = (x - d0) / width, as
+        the interpolators do.  The domain endpoints thus map exactly onto
+        the range endpoints.  Single-segment scales skip the bisect entirely.  scale()
+        and map() compile on demand, and every mutator throws the compiled
+        form away.
+        """
+        d = list(self._domain)
+        td = [float(v) for v in self._transformed_domain]
+        n = len(self._interpolators)
+        last = n - 1
+        forward = self._transform[0]
+        if forward is pv.identity:
+            f = None
+        elif self._negative:
+            f = lambda x: -forward(-x)
+        else:
+            f = forward
+        self._f = f
+        
+        # an empty segment maps everything onto its start
+        widths = [td[j + 1] - td[j] or float('inf') for j in xrange(n)]
+        self._starts = np.array(td[:-1])
+        self._widths = np.array(widths)
+        self._ramp = None
+        self._luts = {}
+        if all(isinstance(v,numbers.Number) for v in self._range):
+            r = [float(v) for v in self._range]
+            self._r0 = np.array(r[:-1])
+            self._r1 = np.array(r[1:])
+            if n == 1:
+                (d0,w,r0,r1) = (td[0],widths[0],r[0],r[1])
+                def compiled(x):
+                    t = ((x if f is None else f(x)) - d0) / w
+                    return r0 + t * (r1 - r0) if t < .5 else r1 - (1 - t) * (r1 - r0)
+            else:
+                def compiled(x):
+                    j = max(0, min(last, bisect.bisect_right(d,x) - 1))
+                    t = ((x if f is None else f(x)) - td[j]) / widths[j]
+                    return r[j] + t * (r[j + 1] - r[j]) if t < .5 else r[j + 1] - (1 - t) * (r[j + 1] - r[j])
+        else:
+            self._r0 = self._r1 = None
+            interpolators = list(self._interpolators)
+            self._ramp = np.array([(c.r,c.g,c.b,c.a) for c in map(Color.color,self._range)], dtype=np.float64)
+            def compiled(x):
+                j = max(0, min(last, bisect.bisect_right(d,x) - 1))
+                return interpolators[j](((x if f is None else f(x)) - td[j]) / widths[j])
+        
+        self._compiled = compiled
+        return self
+    
+    def map(self,x):
+        """Scales an array of domain values at once.
+        
+        Vectorized equivalent of calling scale() on each element of x (any
+        sequence, buffer or numpy array).  Requires a numeric range.  Returns
+        a contiguous float64 array of the same shape as x.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if self._compiled is None:
+            self.compile()
+        if self._r0 is None:
+            raise TypeError, "batch evaluation requires a numeric range"
+        fx = x if self._f is None else self._f(x)
+        if len(self._r0) == 1:
+            (t,r0,r1) = ((fx - self._starts[0]) / self._widths[0], self._r0[0], self._r1[0])
+        else:
+            j = np.clip(np.searchsorted(self._domain, x, side='right') - 1, 0, len(self._r0) - 1)
+            (t,r0,r1) = ((fx - self._starts[j]) / self._widths[j], self._r0[j], self._r1[j])
+        y = np.where(t < .5, r0 + t * (r1 - r0), r1 - (1 - t) * (r1 - r0))
+        return np.ascontiguousarray(y, dtype=np.float64)
+    
+    def rgba(self,x,dtype=np.uint8,resolution=None):
+        """Evaluates a color-ranged scale for an array of domain values.
+        
+        Returns an array of shape x.shape + (4,) holding r,g,b,a: uint8
+        channels in [0,255], or (for float dtypes) Rgb units with r,g,b in
+        [0,255] and a in [0,1].  If resolution is given, colors come from a
+        cached table of that many samples per segment instead of exact
+        per-point interpolation.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        if self._compiled is None:
+            self.compile()
+        if self._ramp is None:
+            raise TypeError, "rgba() requires a color range"
+        
+        fx = x if self._f is None else self._f(x)
+        if len(self._widths) == 1:
+            j = np.zeros(x.shape, dtype=np.intp)
+        else:
+            j = np.clip(np.searchsorted(self._domain, x, side='right') - 1, 0, len(self._widths) - 1)
+        t = (fx - self._starts[j]) / self._widths[j]
+        
+        if resolution is None:
+            c = Color.interpolate_many(self._ramp[j], self._ramp[j + 1], t)
+        else:
+            if resolution not in self._luts:
+                self._luts[resolution] = Color.interpolate_many(self._ramp[:-1, np.newaxis], self._ramp[1:, np.newaxis], np.linspace(0, 1, resolution))
+            i = np.clip(np.floor(t * (resolution - 1) + 0.5), 0, resolution - 1).astype(np.intp)
+            c = self._luts[resolution][j, i]
+        
+        if np.dtype(dtype) == np.uint8:
+            return Color.to_uint8(c)
+        return np.ascontiguousarray(c, dtype=dtype)
+    
+    def rgba_packed(self,x,resolution=None):
+        """Like rgba(), but packs each color into a uint32 (0xRRGGBBAA)."""
+        return Color.pack(self.rgba(x, np.uint8, resolution))
+    
+    def invert_many(self,y):
+        """Vectorized equivalent of calling invert() on each element of y."""
+        y = np.asarray(y, dtype=np.float64)
+        r = self._numeric_range()
+        td = np.asarray(self._transformed_domain, dtype=np.float64)
+        j = np.clip(np.searchsorted(r, y, side='right') - 1, 0, len(self._interpolators) - 1)
+        return np.ascontiguousarray(self._inverse(td[j] + (y - r[j]) / (r[j + 1] - r[j]) * (td[j + 1] - td[j])), dtype=np.float64)
+    
+    def _numeric_range(self):
+        if not all(isinstance(v,numbers.Number) for v in self._range):
+            raise TypeError, "batch evaluation requires a numeric range"
+        return np.asarray(self._range, dtype=np.float64)
+    
     def transform(self,forward,inverse):
+        self._transform = (forward,inverse)
+        self._compiled = None
+        self._touch()
         self._forward = lambda x: -forward(-x) if self._negative else forward(x)
-        self._inverse = lambda y: -inverse(-x) if self._negative else inverse(x)
+        self._inverse = lambda y: -inverse(-y) if self._negative else inverse(y)
+        self._transformed_domain = map(self._forward,self._domain)
+        return self
     
     def domain(self,*args):
         if len(args) == 0:
             return self._domain
         else:   # we were given arguments
+            extent = None
             try:
                 iter(args[0])   # if args[0] is iterable type
-                array = args[0] # get array value
-                if len(args) > 1:   # get accessors
-                    min_accessor = args[1]
-                if len(args) > 2:
-                    max_accessor = args[2]
-                if len(args) > 3:
-                    raise ValueError, "If first arg is array type, can only provide two accessor fns"
-                self._domain = [min(map(min_accessor,array)),max(map(max_accessor,array))] if len(array) > 0 else []
             except TypeError:   # else, args are values
                 self._domain = args
+            else:
+                if len(args) > 3:
+                    raise ValueError, "If first arg is array type, can only provide two accessor fns"
+                extent = DomainAccumulator()
+                extent.update(*args)    # array and accessors, in one pass
+                self._domain = [extent.min,extent.max] if extent.min is not None else []
             
             # check some exceptional cases:
             if len(self._domain) == 0:
@@ -90,11 +331,34 @@ class quantitative(Scale):
             elif len(self._domain) == 1:
                 self._domain = [self._domain[0],self._domain[0]]
             
-            self._negative = True if ((self._domain[0] < 0) or (self._domain[-1] < 0)) else False
-            self._transformed_domain = map(self._forward,self._domain)
+            # a domain fitted from data keeps its extent for extend() to widen
+            self._extent = extent if extent is not None and extent.min is not None else None
+            self._set_domain(self._domain)
             
             return self
     
+    def _set_domain(self,domain):
+        self._domain = domain
+        self._negative = True if ((self._domain[0] < 0) or (self._domain[-1] < 0)) else False
+        self._transformed_domain = map(self._forward,self._domain)
+        self._compiled = None
+        self._touch()
+    
+    def extend(self,chunk,min_accessor=None,max_accessor=None):
+        """Widens the domain to cover another chunk of streamed data.
+        
+        chunk may be any iterable or a numpy array; the accessors work as in
+        domain().  A domain fitted from data by domain() is widened; one
+        given as explicit values is replaced by the first chunk's extent.
+        The data is not retained, and the transformed domain is only
+        recomputed when the extent actually changes.
+        """
+        if self._extent is None:
+            self._extent = DomainAccumulator()
+        if self._extent.update(chunk,min_accessor,max_accessor):
+            self._set_domain([self._extent.min,self._extent.max])
+        return self
+    
     def range(self,*args):
         if len(args) == 0:
             return self._range
@@ -108,17 +372,29 @@ class quantitative(Scale):
             self._interpolators = []
             for i in xrange(len(self._range) - 1):
                 self._interpolators.append(self.interpolator(self._range[i],self._range[i+1]))
+            self._compiled = None
+            self._touch()
             
             return self
     
     def invert(self,y):
-        j = bisect.bisect_left(self._range,y)
+        j = bisect.bisect_right(self._range,y) - 1
         j = max(0, min(len(self._interpolators)-1, j))
-        return self._inverse(self._transformed_domain[j] + (y - self._range[j]) / (self._range[j+1] - self._range[j]) * (self._transformed_domain[j+1] - self._transformed_domain[j]))
+        return self._inverse(self._transformed_domain[j] + (y - self._range[j]) / float(self._range[j+1] - self._range[j]) * (self._transformed_domain[j+1] - self._transformed_domain[j]))
     
     def ticks(self,m=10):
         start = self._domain[0]
         end   = self._domain[-1]
+        key = ('linear',start,end,m)
+        cached = _tick_cache.get(key)
+        if cached is None:
+            cached = _tick_cache.put(key,self._ticks(start,end,m))
+        ticks, digits = cached
+        if digits is not None:
+            self._tickFormat = _tick_formatter(digits)
+        return list(ticks)
+    
+    def _ticks(self,start,end,m):
         reverse = end < start
         _min = float(end if reverse else start)
         _max = float(start if reverse else end)
@@ -126,22 +402,40 @@ class quantitative(Scale):
         
         # test special degenerate cases
         if span == 0 or math.isinf(span):
-            return _min
+            return ((_min,), None)
         
         step = pv.logFloor(span / m, 10)
         err = m / (span / step)
         if err <= 0.15: step *= 5
         if err <= 0.75: step *= 2
         start =  math.ceil(_min / step) * step
-        end   = math.floor(_min / step) * step
-        self._tickFormat = pv.Format.number().fractionDigits( max(0, math.floor(pv.log(step,10) + 0.01)) )
-        ticks = range(start, end + step, step)
+        end   = math.floor(_max / step) * step
+        n = int(round((end - start) / step)) + 1
+        ticks = tuple(start + i * step for i in xrange(n))
+        digits = int(max(0, -math.floor(pv.log(step,10) + 0.01)))
         
-        return reversed(ticks) if reverse else ticks
+        return (ticks[::-1] if reverse else ticks, digits)
     
     def tickFormat(self,t):
         return self._tickFormat(t)
     
+    def _state(self):
+        state = {'domain': list(self._domain), 'range': list(self._range)}
+        if self._transform[0] is not pv.identity:
+            state['transform'] = self._transform   # pickles if the functions do
+        if self._extent is not None:
+            state['extent'] = (self._extent.min,self._extent.max,self._extent.count)
+        return state
+    
+    def _load(self,state):
+        if 'transform' in state:
+            self.transform(*state['transform'])
+        self.domain(*state['domain'])
+        self.range(*state['range'])
+        if 'extent' in state:
+            self._extent = DomainAccumulator()
+            (self._extent.min,self._extent.max,self._extent.count) = state['extent']
+    
     def nice(self):
         if len(self._domain != 2): return self  # no support for non-uniform domains
         start = self._domain[0]
@@ -158,7 +452,8 @@ class quantitative(Scale):
         step = 10**(round(math.log10(span)) - 1)
         self._domain = [math.floor(_min / step) * step, math.ceil(_max / step) * step]
         if reverse: self._domain.reverse()
-        self._transformed_domain = map(self._forward,self._domain)
+        self._extent = None
+        self._set_domain(self._domain)
         
         return self
     
@@ -174,32 +469,63 @@ class log(quantitative):
         quantitative.__init__(self,1,10)
         self.domain(*args)
         self.base(10)
-        return self
+    
+    # the transform runs on scalars in scale()/invert() and on arrays in
+    # map()/invert_many(); math is several times faster for single values
     
     def _log(self,x):
-        return math.log(x) / self._logbase
+        if isinstance(x,np.ndarray):
+            return np.log(x) / self._logbase
+        try:
+            return math.log(x) / self._logbase
+        except ValueError:  # x <= 0, answer as numpy does
+            return -np.inf if x == 0 else np.nan
     
     def _pow(self,y):
-        return self._base ** y
+        if isinstance(y,np.ndarray):
+            return np.power(self._fbase, y)
+        try:
+            return math.pow(self._fbase, y)
+        except OverflowError:
+            return np.inf
     
-    def ticks(self):
+    # upper bound on the number of ticks returned when ticks() is not given m
+    max_ticks = 1000
+    
+    def ticks(self,m=None):
+        """Returns log ticks: every multiple k * base**i inside the domain.
+        
+        If that would give more than m ticks (max_ticks by default), only
+        the powers of the base are kept, striding over decades as needed.
+        """
         domain = self.domain()
+        limit = self.max_ticks if m is None else m
+        key = ('log',domain[0],domain[-1],limit,self._base)
+        ticks = _tick_cache.get(key)
+        if ticks is None:
+            ticks = _tick_cache.put(key,tuple(self._ticks(domain,limit).tolist()))
+        return list(ticks)
+    
+    def _ticks(self,domain,limit):
+        b = self._base
         negative = domain[0] < 0
-        i = math.floor( -self._log(-domain[0]) if negative else self._log(domain[0]) )
-        j = math.ceil( -self._log(-domain[1]) if negative else self._log(domain[1]) )
-        
-        ticks = []
-        if negative:
-            ticks.append(-self._pow(-i))
-            for i in range(i,j):
-                for k in range(self._base-1,0,-1):
-                    ticks.append(-self._pow(-(i+1))*k)
+        i = int(math.floor( -self._log(-domain[0]) if negative else self._log(domain[0]) ))
+        j = int(math.ceil( -self._log(-domain[1]) if negative else self._log(domain[1]) ))
+        fi = float(i)   # float exponents: an int base cannot take negative int powers
+        fj = float(j)
+        
+        if (j - i) * (b - 1) + 1 <= limit:
+            if negative:
+                multiples = -self._pow(-np.arange(i + 1, j + 1, dtype=np.float64))[:,np.newaxis] * np.arange(b - 1, 0, -1)
+                ticks = np.concatenate(([-self._pow(-fi)], multiples.ravel()))
+            else:
+                multiples = self._pow(np.arange(i, j, dtype=np.float64))[:,np.newaxis] * np.arange(1, b)
+                ticks = np.concatenate((multiples.ravel(), [self._pow(fj)]))
         else:
-            for i in range(i,j):
-                for k in range(1,self._base):
-                    ticks.append(self._pow(i)*k)
+            exponents = np.arange(i, j + 1, int(math.ceil((j - i + 1) / float(max(limit,1)))), dtype=np.float64)
+            ticks = -self._pow(-exponents) if negative else self._pow(exponents)
         
-        return ticks[ bisect.bisect_left(ticks,domain[0]) : bisect_right(ticks,domain[1]) ]
+        return ticks[ np.searchsorted(ticks,domain[0],side='left') : np.searchsorted(ticks,domain[1],side='right') ]
     
     def tickFormat(self,t):
         return "%.1f"%t
@@ -209,46 +535,163 @@ class log(quantitative):
         self.domain( pv.logFloor(domain[0],self._base), pv.logCeil(domain[1],self_base) )
         return self
     
+    def _state(self):
+        state = quantitative._state(self)
+        del state['transform']
+        state['base'] = self._base
+        return state
+    
+    def _load(self,state):
+        self.base(state['base'])
+        quantitative._load(self,state)
+    
     def base(self,*args):
         if len(args) == 0:
             return self._base
         else:
-            self._base = v
-            self._logbase = math.log(v)
+            self._base = args[0]
+            self._fbase = float(self._base)
+            self._logbase = math.log(self._base)
             self.transform(self._log,self._pow)
             return self
 
+def _as_keys(array):
+    """Converts ordinal keys to a numpy array without coercing mixed types."""
+    keys = np.asarray(array)
+    if keys.dtype.kind in 'SU' and not isinstance(array,np.ndarray):
+        if not all(isinstance(k,basestring) for k in array):
+            keys = np.empty(len(array), dtype=object)
+            keys[:] = array
+    return keys
+
+def _comparable(a,b):
+    """True if key arrays of dtypes a and b can be compared without casting."""
+    return a == b or (a.kind in 'biuf' and b.kind in 'biuf') or (a.kind in 'SU' and b.kind in 'SU')
+
+def _concat_keys(a,b):
+    if len(a) > 0 and not _comparable(a.dtype,b.dtype):
+        a = a.astype(object)
+        b = b.astype(object)
+    return np.concatenate((a,b))
+
+def _factorize(keys):
+    """Returns (distinct keys in first-seen order, code of each key)."""
+    if len(keys) == 0:
+        return keys, np.empty(0, dtype=np.intp)
+    order = np.argsort(keys)
+    ordered = keys[order]
+    boundary = np.empty(len(keys), dtype=bool)
+    boundary[0] = True
+    boundary[1:] = ordered[1:] != ordered[:-1]
+    first = np.minimum.reduceat(order, np.flatnonzero(boundary))
+    rank = np.empty(len(first), dtype=np.intp)
+    rank[np.argsort(first)] = np.arange(len(first))
+    codes = np.empty(len(keys), dtype=np.intp)
+    codes[order] = rank[np.cumsum(boundary) - 1]
+    return keys[np.sort(first)], codes
+
 class ordinal(Scale):
-    """Implementation for ordinal scale"""
+    """Implementation for ordinal scale
+    
+    The domain is held in a compact index: a numpy array of keys in
+    first-seen order plus a sorted copy for binary search, which map() uses
+    for whole arrays.  scale() looks single keys up in a dict from key to
+    index, built on first use.  Keys first seen by scale() are buffered and
+    folded into the arrays on the next bulk operation.
+    """
     def __init__(self, *args):
         Scale.__init__(self)
-        self._domain = []
-        self._indices = {}
+        self._values = np.empty(0)
+        self._keys = self._values
+        self._slots = np.empty(0, dtype=np.intp)
+        self._lookup = None
+        self._pending = []
         self._range = []
+        self._range_array = None
         self._band = 0
         self.domain(*args)
-        return self
     
     def scale(self,x):
-        if x not in self._indices:
-            self._domain.append(x)
-            self._indices[x] = len(self._domain) - 1
-        return self._range[ self._indices[x] % len(self._range) ]
+        return self._range[ self._index(x) % len(self._range) ]
+    
+    def _index(self,x):
+        lookup = self._lookup
+        if lookup is None:
+            lookup = self._lookup = dict((k,i) for (i,k) in enumerate(self._values.tolist() + self._pending))
+        i = lookup.get(x)
+        if i is None:
+            i = lookup[x] = len(lookup)
+            self._pending.append(x)
+        return i
+    
+    def _set_values(self,values):
+        self._values = values
+        self._slots = np.argsort(values, kind='mergesort')
+        self._keys = values[self._slots]
+        self._lookup = None
+    
+    def _compact(self):
+        if self._pending:
+            lookup = self._lookup   # appending keeps every index valid
+            self._set_values(_concat_keys(self._values,_as_keys(self._pending)))
+            self._lookup = lookup
+            self._pending = []
+    
+    def map(self,array,indices=False):
+        """Scales a whole array of keys in one vectorized pass.
+        
+        Unseen keys are appended to the domain in first-seen order, as
+        scale() does.  Returns the range values (a numpy array), or the
+        domain indices if indices is true or no range is set.
+        """
+        self._compact()
+        keys = _as_keys(array)
+        n = len(self._keys)
+        idx = np.empty(len(keys), dtype=np.intp)
+        if n > 0:
+            if not _comparable(self._keys.dtype,keys.dtype):
+                self._set_values(self._values.astype(object))
+                keys = keys.astype(object)
+            p = np.minimum(np.searchsorted(self._keys, keys), n - 1)
+            found = self._keys[p] == keys
+            idx[found] = self._slots[p[found]]
+        else:
+            found = np.zeros(len(keys), dtype=bool)
+        missing = ~found
+        if missing.any():
+            new, codes = _factorize(keys[missing])
+            idx[missing] = len(self._values) + codes
+            lookup = self._lookup
+            if lookup is not None:
+                lookup.update(zip(new.tolist(), xrange(len(self._values), len(self._values) + len(new))))
+            self._set_values(_concat_keys(self._values,new))
+            self._lookup = lookup
+        
+        if indices or len(self._range) == 0:
+            return idx
+        if self._range_array is None:
+            self._range_array = np.asarray(self._range)
+        return self._range_array[idx % len(self._range)]
     
     def domain(self,*args):
         if len(args) == 0:
-            return self._domain
+            self._compact()
+            return self._values
         
-        try:
-            iter(args[0])   # test for array type
-            array = args[0]
-            if len(args) > 1:
-                array = map(args[1],array)
-        except TypeError:
+        if isinstance(args[0],basestring):
             array = args
+        else:
+            try:
+                iter(args[0])   # test for array type
+                array = args[0]
+                if len(args) > 1:
+                    array = map(args[1],array)
+            except TypeError:
+                array = args
         
-        self._domain = list(set(array))
-        self._indices = pv.numerate(self._domain)
+        self._pending = []
+        self._set_values(_factorize(_as_keys(array))[0] if len(array) > 0 else np.empty(0))
+        self._touch()
         
         return self
     
@@ -267,22 +710,27 @@ class ordinal(Scale):
         if isinstance(array[0],types.StringType):
             array = map(pv.color,array)
         
-        self._range = array
+        self._set_range(array)
         
         return self
     
+    def _set_range(self,r):
+        self._range = r
+        self._range_array = None
+        self._touch()
+    
     def split(self,_min,_max):
         step = float(_max - _min) / length(self.domain())
-        self._range = range(_min + step / 2., _max, step)
+        self._set_range(range(_min + step / 2., _max, step))
         return self
     
     def splitFlush(self,_min,_max):
         n = len(self.domain())
         step = float(_max - _min) / (n - 1)
         if n == 1:
-            self._range = (_min + _max) / 2.
+            self._set_range((_min + _max) / 2.)
         else:
-            self._range = range(_min, _max + step / 2., step)
+            self._set_range(range(_min, _max + step / 2., step))
         return self
     
     def splitBanded(self,_min,_max,band=1):
@@ -291,17 +739,121 @@ class ordinal(Scale):
             total = -band * n
             remaining = _max - _min - total
             padding = remaining / float(n + 1)
-            self._range = range(_min + padding, _max, padding - band)
+            self._set_range(range(_min + padding, _max, padding - band))
             self._band = -band
         else:
             step = float(_max - _min) / (len(self.domain()) + (1 - band))
-            self._range = range(_min + step * (1 - band), _max, step)
+            self._set_range(range(_min + step * (1 - band), _max, step))
             self._band = step * band
         return self
     
+    def _state(self):
+        self._compact()
+        return {'domain': self._values, 'range': list(self._range), 'band': self._band}
+    
+    def _load(self,state):
+        self._set_values(_as_keys(state['domain']))
+        self._set_range(list(state['range']))
+        self._band = state['band']
+    
     def by(self,f):
         raise NotImplementedError
 
+class QuantileSketch(object):
+    """Mergeable approximate quantile sketch (KLL-style compactors).
+    
+    Memory stays bounded by roughly 3k retained values, with k chosen from
+    the requested rank error (about 1.7 / k).  Data is added in chunks with
+    update(); sketches built separately (e.g. in worker processes) combine
+    with merge().  Sketches are plain objects and can be pickled.
+    """
+    def __init__(self, error=0.01, seed=None):
+        self.error = error
+        self.k = max(8, int(math.ceil(1.7 / error)))
+        self.count = 0
+        self.min = None
+        self.max = None
+        self._levels = [np.empty(0)]
+        self._random = random.Random(seed)
+    
+    def update(self,chunk,accessor=None):
+        """Adds a chunk of values (iterable or numpy array)."""
+        if accessor is not None:
+            chunk = [accessor(d) for d in chunk]
+        chunk = np.asarray(chunk, dtype=np.float64).ravel()
+        if chunk.size == 0:
+            return self
+        self.count += chunk.size
+        self._merge_extent(chunk.min(), chunk.max())
+        self._levels[0] = np.concatenate((self._levels[0], chunk))
+        self._compress()
+        return self
+    
+    def merge(self,other):
+        """Folds another sketch into this one."""
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for h,items in enumerate(other._levels):
+            self._levels[h] = np.concatenate((self._levels[h], items))
+        self.count += other.count
+        if other.count > 0:
+            self._merge_extent(other.min, other.max)
+        self._compress()
+        return self
+    
+    def _merge_extent(self,lo,hi):
+        self.min = lo if self.min is None else min(self.min, lo)
+        self.max = hi if self.max is None else max(self.max, hi)
+    
+    def _capacity(self,h):
+        return max(2, int(math.ceil(self.k * (2. / 3) ** (len(self._levels) - h - 1))))
+    
+    def _compress(self):
+        h = 0
+        while h < len(self._levels):
+            items = self._levels[h]
+            if len(items) > self._capacity(h):
+                if h + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                keep = items[:len(items) % 2]
+                promoted = items[len(keep) + self._random.randint(0,1)::2]
+                self._levels[h] = keep
+                self._levels[h + 1] = np.concatenate((self._levels[h + 1], promoted))
+            h += 1
+    
+    def _state(self):
+        return {'error': self.error, 'count': self.count, 'min': self.min, 'max': self.max, 'levels': self._levels}
+    
+    def _load(self,state):
+        self.count = state['count']
+        self.min = state['min']
+        self.max = state['max']
+        self._levels = [np.asarray(items, dtype=np.float64) for items in state['levels']]
+        return self
+    
+    def items(self):
+        """Returns (sorted values, cumulative weights) of the retained values."""
+        values = np.concatenate(self._levels)
+        weights = np.concatenate([np.repeat(float(2 ** h), len(items)) for h,items in enumerate(self._levels)])
+        order = np.argsort(values, kind='mergesort')
+        return values[order], np.cumsum(weights[order])
+    
+    def quantiles(self,qs):
+        """Returns approximate values at fractions qs of the sorted data.
+        
+        Uses the same rank convention as the exact quantile scale: the value
+        of (0-based) rank floor(q * (count - 1)).  The extremes (q of 0 and
+        1) are exact.
+        """
+        qs = np.asarray(qs, dtype=np.float64)
+        values, cumulative = self.items()
+        ranks = np.floor(qs * (cumulative[-1] - 1))
+        result = values[np.minimum(np.searchsorted(cumulative, ranks, side='right'), len(values) - 1)]
+        result[qs <= 0] = self.min
+        result[qs >= 1] = self.max
+        return result
+
 class quantile(Scale):
     """quantile scale"""
     
@@ -311,33 +863,82 @@ class quantile(Scale):
         self._max_quantile_index = -1
         self._quantile_boundaries = []
         self._domain = []
+        self._sorted = None
+        self._sketch = None
         self._y = linear()  # the range
         self.domain(*args)
-        return self
     
     def scale(self,x):
-        return self._y(max(0, min(self._max_quantile_index, bisect.bisect_right(self._quantile_boundaries, x) - 1)) / float(self._max_quantile_index))
+        b = self._quantile_boundaries
+        if b is None:
+            b = self._boundaries()
+        return self._y(max(0, min(self._max_quantile_index, bisect.bisect_right(b, x) - 1)) / float(self._max_quantile_index))
+    
+    def map(self,x):
+        """Vectorized equivalent of calling scale() on each element of x."""
+        return self._y.map(self._fractions(x))
+    
+    def rgba(self,x,dtype=np.uint8,resolution=None):
+        """Evaluates a color-ranged scale for an array of values; see quantitative.rgba."""
+        return self._y.rgba(self._fractions(x),dtype,resolution)
+    
+    def rgba_packed(self,x,resolution=None):
+        return self._y.rgba_packed(self._fractions(x),resolution)
+    
+    def _fractions(self,x):
+        """Returns the quantile of each value as a fraction in [0,1], the input of the range scale."""
+        b = self._quantile_boundaries
+        if b is None:
+            b = self._boundaries()
+        j = np.searchsorted(b, np.asarray(x), side='right') - 1
+        j = np.clip(j, 0, self._max_quantile_index)
+        return j / float(self._max_quantile_index)
     
     def quantiles(self,*args):
         if len(args) == 0:
+            if self._quantile_boundaries is None:
+                self._boundaries()
             return self._quantile_boundaries
         
+        # the boundaries are computed when scale(), map() or quantiles()
+        # first needs them, so fitting a domain costs nothing up front
         self._num_quantiles = int(args[0])
-        
-        if self._num_quantiles < 0:
-            self._quantile_boundaries = [self._domain[0]] + self._domain
-            self._max_quantile_index = len(self._domain) - 1
+        self._quantile_boundaries = None
+        self._touch()
+        return self
+    
+    def _boundaries(self):
+        if self._sketch is None and len(self._domain) == 0:
+            self._quantile_boundaries = []
+            self._max_quantile_index = -1
+        elif self._sketch is not None:
+            if self._num_quantiles < 0:
+                values = list(self._sketch.items()[0])
+                self._quantile_boundaries = [values[0]] + values
+                self._max_quantile_index = len(values) - 1
+            else:
+                self._quantile_boundaries = list(self._sketch.quantiles([0.] + [float(i) / self._num_quantiles for i in range(1,self._num_quantiles+1)]))
+                self._max_quantile_index = self._num_quantiles - 1
+        elif self._num_quantiles < 0:
+            values = self.domain().tolist()
+            self._quantile_boundaries = [values[0]] + values
+            self._max_quantile_index = len(values) - 1
         else:
-            self._quantile_boundaries = [self._domain[0]]
-            for i in range(1,self._num_quantiles+1):
-                self._quantile_boundaries.append( self._domain[ int(float(i) * (len(self._domain) - 1) / self._num_quantiles) ] )
+            # only the boundary ranks are needed: select them rather than sort
+            ranks = [int(float(i) * (len(self._domain) - 1) / self._num_quantiles) for i in range(0,self._num_quantiles+1)]
+            if self._sorted is not None:
+                selected = self._sorted
+            else:
+                selected = np.partition(self._domain, sorted(set(ranks)))
+            self._quantile_boundaries = selected[ranks].tolist()
             self._max_quantile_index = self._num_quantiles - 1
-        
-        return self
+        return self._quantile_boundaries
     
     def domain(self,*args):
         if len(args) == 0:
-            return self._domain
+            if self._sorted is None:
+                self._sorted = np.sort(self._domain)
+            return self._sorted
         
         try:
             iter(args[0])
@@ -347,8 +948,36 @@ class quantile(Scale):
         except TypeError:
             array = args
         
-        self._domain = array
-        self._domain.sort()
+        # keep the values as given (no copy for numpy input, never reordered);
+        # the sorted domain is only built if it is asked for
+        self._domain = np.asarray(array)
+        self._sorted = None
+        self._sketch = None
+        self.quantiles(self._num_quantiles)
+        return self
+    
+    def sketch(self,*args):
+        """Gets or sets the QuantileSketch backing a streaming quantile scale.
+        
+        Setting a sketch (e.g. one merged from worker processes) switches the
+        scale to approximate boundaries computed from it.
+        """
+        if len(args) == 0:
+            return self._sketch
+        
+        self._sketch = args[0]
+        self.quantiles(self._num_quantiles)
+        return self
+    
+    def extend(self,chunk,accessor=None,error=0.01):
+        """Adds a chunk of streamed data to the scale's quantile sketch.
+        
+        The first call creates a sketch with the given rank error; the data
+        itself is not retained.
+        """
+        if self._sketch is None:
+            self._sketch = QuantileSketch(error)
+        self._sketch.update(chunk,accessor)
         self.quantiles(self._num_quantiles)
         return self
     
@@ -357,7 +986,40 @@ class quantile(Scale):
             return self._y.range()
         
         self._y.range(*args)
+        self._touch()
         return self
     
+    def _state(self):
+        state = {'domain': self._domain, 'quantiles': self._num_quantiles, 'range': self._y._state()}
+        if self._sketch is not None:
+            state['sketch'] = self._sketch._state()
+        return state
+    
+    def _load(self,state):
+        self._y._load(state['range'])
+        self._domain = np.asarray(state['domain'])
+        self._sorted = None
+        if 'sketch' in state:
+            self._sketch = QuantileSketch(state['sketch']['error'])._load(state['sketch'])
+        self.quantiles(state['quantiles'])
+    
     def by(self,f):
         raise NotImplementedError
+
+def _to_json(o):
+    if isinstance(o,np.ndarray):
+        return o.tolist()
+    if isinstance(o,np.generic):
+        return o.item()
+    if isinstance(o,Color.Color):
+        return o._state()
+    raise TypeError, "%r can not be serialized to JSON" % (o,)
+
+_types = dict((cls.__name__,cls) for cls in (quantitative,log,ordinal,quantile))
+
+def from_json(s):
+    """Returns the scale serialized by Scale.to_json."""
+    state = json.loads(s, object_hook=Color._from_state)
+    scale = _types[state.pop('type')]()
+    scale._load(state)
+    return scale
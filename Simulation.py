@@ -0,0 +1,56 @@
+import time
+
+import numpy as np
+
+import Quadtree
+
+class Simulation(object):
+    """Particle simulation, as pv.Simulation
+    
+    Particles are not objects: positions (x, y), velocities (vx, vy) and
+    accumulated forces (fx, fy) are float64 arrays indexed by particle.
+    step() integrates with position Verlet as in Protovis, then accumulates
+    the forces at the new positions.  timings holds the duration of every
+    step in seconds.
+    """
+    def __init__(self, x, y):
+        self.x = np.array(x, dtype=np.float64)
+        self.y = np.array(y, dtype=np.float64)
+        self.px = self.x.copy()
+        self.py = self.y.copy()
+        self.vx = np.zeros(len(self.x))
+        self.vy = np.zeros(len(self.x))
+        self.fx = np.zeros(len(self.x))
+        self.fy = np.zeros(len(self.x))
+        self.forces = []
+        self.timings = []
+        self._quadtree = None
+    
+    def force(self,f):
+        """Adds a force (see Force) and returns self."""
+        self.forces.append(f)
+        return self
+    
+    def quadtree(self):
+        """Returns a quadtree of the current positions, built once per step."""
+        if self._quadtree is None:
+            self._quadtree = Quadtree.Quadtree(self.x,self.y)
+        return self._quadtree
+    
+    def step(self,n=1):
+        """Advances the simulation n steps."""
+        for i in xrange(n):
+            start = time.time()
+            self.vx = self.x - self.px + self.fx
+            self.vy = self.y - self.py + self.fy
+            self.px = self.x.copy()
+            self.py = self.y.copy()
+            self.x += self.vx
+            self.y += self.vy
+            self._quadtree = None
+            self.fx = np.zeros(len(self.x))
+            self.fy = np.zeros(len(self.x))
+            for f in self.forces:
+                f.apply(self)
+            self.timings.append(time.time() - start)
+        return self
@@ -0,0 +1,397 @@
+import os
+import weakref
+import multiprocessing
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+
+import Color
+import Panel
+import Bar
+import Dot
+import Rule
+import Label
+import Line
+import Area
+
+# number of instances formatted per chunk
+block_size = 4096
+
+_paints = {}
+
+def _paint(attribute,packed):
+    """Returns the SVG paint attributes for a packed 0xRRGGBBAA color."""
+    key = (attribute,packed)
+    s = _paints.get(key)
+    if s is None:
+        r, g, b, a = packed >> 24, (packed >> 16) & 255, (packed >> 8) & 255, packed & 255
+        if a == 0:
+            s = '%s="none"' % attribute
+        elif a == 255:
+            s = '%s="rgb(%d,%d,%d)"' % (attribute,r,g,b)
+        else:
+            s = '%s="rgb(%d,%d,%d)" %s-opacity="%.3g"' % (attribute,r,g,b,attribute,a / 255.)
+        _paints[key] = s
+    return s
+
+def _paints_of(scene,name,rows,attribute):
+    if name not in scene:
+        return ['%s="none"' % attribute] * len(rows)
+    return [_paint(attribute,p) for p in Color.pack(scene[name][rows]).tolist()]
+
+def _column(scene,name,n):
+    column = scene.get(name)
+    return np.full(n, np.nan) if column is None else column
+
+def _resolve(scene,n,start,end,size,extent):
+    """Resolves e.g. left/right/width against the parent extent to (position, size)."""
+    lo = _column(scene,start,n)
+    hi = _column(scene,end,n)
+    s = _column(scene,size,n)
+    s = np.where(np.isnan(s), extent - np.nan_to_num(lo) - np.nan_to_num(hi), s)
+    lo = np.where(np.isnan(lo), extent - s - np.nan_to_num(hi), lo)
+    return lo, s
+
+def _anchor(scene,n,start,end,extent):
+    lo = _column(scene,start,n)
+    return np.nan_to_num(np.where(np.isnan(lo), extent - _column(scene,end,n), lo))
+
+def _blocks(scene,start=0,stop=None):
+    """Yields the indices of the visible instances, block_size at a time."""
+    n = len(scene['data']) if stop is None else stop
+    visible = scene.get('visible')
+    for start in xrange(start, n, block_size):
+        rows = np.arange(start, min(n, start + block_size))
+        if visible is not None:
+            rows = rows[visible[rows]]
+        if len(rows):
+            yield rows
+
+def _bar(mark,width,height):
+    scene = mark.scene
+    n = len(scene['data'])
+    x, w = _resolve(scene,n,'left','right','width',width)
+    y, h = _resolve(scene,n,'top','bottom','height',height)
+    lw = _column(scene,'lineWidth',n)
+    for rows in _blocks(scene):
+        fills = _paints_of(scene,'fillStyle',rows,'fill')
+        strokes = _paints_of(scene,'strokeStyle',rows,'stroke')
+        yield ''.join(['<rect x="%.7g" y="%.7g" width="%.7g" height="%.7g" %s %s stroke-width="%.7g"/>' % v
+                       for v in zip(x[rows].tolist(), y[rows].tolist(), w[rows].tolist(), h[rows].tolist(), fills, strokes, lw[rows].tolist())])
+
+def _dot(mark,width,height):
+    scene = mark.scene
+    n = len(scene['data'])
+    x = _anchor(scene,n,'left','right',width)
+    y = _anchor(scene,n,'top','bottom',height)
+    r = _column(scene,'radius',n)
+    r = np.where(np.isnan(r), np.sqrt(_column(scene,'size',n)), r)
+    lw = _column(scene,'lineWidth',n)
+    square = scene['shape'] == 'square' if 'shape' in scene else np.zeros(n, dtype=bool)
+    for rows in _blocks(scene):
+        fills = _paints_of(scene,'fillStyle',rows,'fill')
+        strokes = _paints_of(scene,'strokeStyle',rows,'stroke')
+        chunk = []
+        for (i,cx,cy,ri,fill,stroke,w) in zip(rows.tolist(), x[rows].tolist(), y[rows].tolist(), r[rows].tolist(), fills, strokes, lw[rows].tolist()):
+            if square[i]:
+                chunk.append('<rect x="%.7g" y="%.7g" width="%.7g" height="%.7g" %s %s stroke-width="%.7g"/>' % (cx - ri, cy - ri, 2 * ri, 2 * ri, fill, stroke, w))
+            else:
+                chunk.append('<circle cx="%.7g" cy="%.7g" r="%.7g" %s %s stroke-width="%.7g"/>' % (cx, cy, ri, fill, stroke, w))
+        yield ''.join(chunk)
+
+def _rule(mark,width,height):
+    scene = mark.scene
+    n = len(scene['data'])
+    horizontal = np.isnan(_column(scene,'height',n))
+    x, w = _resolve(scene,n,'left','right','width',width)
+    y, h = _resolve(scene,n,'top','bottom','height',height)
+    x = np.where(horizontal, x, _anchor(scene,n,'left','right',width))
+    y = np.where(horizontal, _anchor(scene,n,'top','bottom',height), y)
+    x2 = np.where(horizontal, x + w, x)
+    y2 = np.where(horizontal, y, y + h)
+    lw = _column(scene,'lineWidth',n)
+    for rows in _blocks(scene):
+        strokes = _paints_of(scene,'strokeStyle',rows,'stroke')
+        yield ''.join(['<line x1="%.7g" y1="%.7g" x2="%.7g" y2="%.7g" %s stroke-width="%.7g"/>' % v
+                       for v in zip(x[rows].tolist(), y[rows].tolist(), x2[rows].tolist(), y2[rows].tolist(), strokes, lw[rows].tolist())])
+
+def _path_data(x,y):
+    """Yields the SVG path data through the vertices, block_size vertices at a time.
+    
+    Each block is formatted by a single string template rather than one
+    concatenation per vertex.
+    """
+    n = len(x)
+    xy = np.column_stack((x,y)).ravel()
+    for start in xrange(0, n, block_size):
+        k = min(n, start + block_size) - start
+        template = 'L%.7g,%.7g' * k
+        if start == 0:
+            template = 'M' + template[1:]
+        yield template % tuple(xy[2 * start:2 * (start + k)].tolist())
+
+def _path_rows(scene,n,x,y):
+    rows = np.isfinite(x) & np.isfinite(y)
+    if 'visible' in scene:
+        rows &= scene['visible']
+    return np.flatnonzero(rows)
+
+def _decimate(mark,scene,i,x,y):
+    method = scene['decimate'][i] if 'decimate' in scene else None
+    tolerance = scene['tolerance'][i] if 'tolerance' in scene else 1
+    return Line.decimate(x,y,method,tolerance)
+
+def _line(mark,width,height):
+    scene = mark.scene
+    n = len(scene['data'])
+    x = _anchor(scene,n,'left','right',width)
+    y = _anchor(scene,n,'top','bottom',height)
+    rows = _path_rows(scene,n,x,y)
+    if len(rows) == 0:
+        mark.path_stats = {'vertices_in': 0, 'vertices_out': 0}
+        return
+    # the path is styled by its first visible instance
+    i = rows[0]
+    keep = rows[_decimate(mark,scene,i,x[rows],y[rows])]
+    mark.path_stats = {'vertices_in': len(rows), 'vertices_out': len(keep)}
+    yield '<path d="'
+    for chunk in _path_data(x[keep], y[keep]):
+        yield chunk
+    yield '" %s %s stroke-width="%.7g" stroke-linejoin="%s"/>' % (
+        _paints_of(scene,'fillStyle',rows[:1],'fill')[0], _paints_of(scene,'strokeStyle',rows[:1],'stroke')[0],
+        np.nan_to_num(scene['lineWidth'][i]), scene['lineJoin'][i] if 'lineJoin' in scene else 'miter')
+
+def _area(mark,width,height):
+    scene = mark.scene
+    n = len(scene['data'])
+    horizontal = 'width' in scene and not np.isnan(scene['width']).all()
+    if horizontal:
+        y = y2 = _anchor(scene,n,'top','bottom',height)
+        x, w = _resolve(scene,n,'left','right','width',width)
+        x2 = x + w
+    else:
+        x = x2 = _anchor(scene,n,'left','right',width)
+        y, h = _resolve(scene,n,'top','bottom','height',height)
+        y2 = y + h
+    rows = _path_rows(scene,n,x,y)
+    rows = rows[np.isfinite(x2[rows]) & np.isfinite(y2[rows])]
+    if len(rows) == 0:
+        mark.path_stats = {'vertices_in': 0, 'vertices_out': 0}
+        return
+    i = rows[0]
+    # decimate the two edges separately, then walk the second one backwards
+    top = rows[_decimate(mark,scene,i,x[rows],y[rows])]
+    bottom = rows[_decimate(mark,scene,i,x2[rows],y2[rows])][::-1]
+    mark.path_stats = {'vertices_in': 2 * len(rows), 'vertices_out': len(top) + len(bottom)}
+    yield '<path d="'
+    for chunk in _path_data(np.concatenate((x[top], x2[bottom])), np.concatenate((y[top], y2[bottom]))):
+        yield chunk
+    yield 'Z" %s %s stroke-width="%.7g"/>' % (
+        _paints_of(scene,'fillStyle',rows[:1],'fill')[0], _paints_of(scene,'strokeStyle',rows[:1],'stroke')[0],
+        np.nan_to_num(scene['lineWidth'][i]))
+
+_text_anchors = {'left': 'start', 'center': 'middle', 'right': 'end'}
+_text_dys = {'top': '.71em', 'middle': '.35em', 'bottom': '0'}
+
+def _label(mark,width,height):
+    scene = mark.scene
+    n = len(scene['data'])
+    x = _anchor(scene,n,'left','right',width)
+    y = _anchor(scene,n,'top','bottom',height)
+    margin = np.nan_to_num(_column(scene,'textMargin',n))
+    align = scene['textAlign']
+    baseline = scene['textBaseline']
+    x = x + np.where(align == 'left', margin, np.where(align == 'right', -margin, 0))
+    y = y + np.where(baseline == 'top', margin, np.where(baseline == 'bottom', -margin, 0))
+    angle = np.degrees(np.nan_to_num(_column(scene,'textAngle',n)))
+    for rows in _blocks(scene):
+        fills = _paints_of(scene,'textStyle',rows,'fill')
+        yield ''.join(['<text transform="translate(%.7g,%.7g) rotate(%.7g)" text-anchor="%s" dy="%s" %s style=%s>%s</text>'
+                       % (tx, ty, a, _text_anchors.get(al,'start'), _text_dys.get(bl,'0'), fill, quoteattr('font:%s' % font), escape(unicode(text).encode('utf-8')))
+                       for (tx,ty,a,al,bl,fill,font,text) in zip(x[rows].tolist(), y[rows].tolist(), angle[rows].tolist(), align[rows], baseline[rows], fills, scene['font'][rows], scene['text'][rows])])
+
+def _panel(mark,width,height,start=0,stop=None,tasks=None):
+    """Yields the chunks of panel instances start to stop (default: all).
+    
+    In parallel mode, tasks yields the serialized blocks of the child
+    panels in document order (see _tasks); they are spliced in as they come.
+    """
+    scene = mark.scene
+    n = len(scene['data'])
+    x, w = _resolve(scene,n,'left','right','width',width)
+    y, h = _resolve(scene,n,'top','bottom','height',height)
+    lw = _column(scene,'lineWidth',n)
+    for rows in _blocks(scene,start,stop):
+        fills = _paints_of(scene,'fillStyle',rows,'fill')
+        strokes = _paints_of(scene,'strokeStyle',rows,'stroke')
+        for (i,fill,stroke) in zip(rows.tolist(), fills, strokes):
+            yield '<g transform="translate(%.7g,%.7g)">' % (x[i], y[i])
+            if fill != 'fill="none"' or stroke != 'stroke="none"':
+                yield '<rect width="%.7g" height="%.7g" %s %s stroke-width="%.7g"/>' % (w[i], h[i], fill, stroke, np.nan_to_num(lw[i]))
+            for child in mark.children:
+                if tasks is not None and isinstance(child,Panel.Panel):
+                    for k in xrange(len(_splits(child))):
+                        yield next(tasks)
+                    continue
+                for chunk in emit(child, w[i], h[i]):
+                    yield chunk
+            yield '</g>'
+
+_emitters = [
+    (Panel.Panel, _panel),
+    (Bar.Bar, _bar),
+    (Dot.Dot, _dot),
+    (Rule.Rule, _rule),
+    (Label.Label, _label),
+    (Line.Line, _line),
+    (Area.Area, _area),
+]
+
+# characters of serialized marks kept for reuse across svg() calls; 0 (the
+# default) keeps nothing, so memory stays flat however many marks there are
+cache_size = 0
+
+# mark -> (revision, (width,height), chunks, size): the last serialization of
+# each mark, valid until a build changes the mark (see Mark.revision)
+_fragments = weakref.WeakKeyDictionary()
+
+def emit(mark,width,height):
+    """Yields the SVG chunks for mark within a parent of the given size.
+    
+    With a cache_size, a mark whose builds changed nothing since it was
+    last serialized at this size reuses its previous chunks.  Panels are
+    walked every time, so that each child is checked.
+    """
+    for (cls,emitter) in _emitters:
+        if isinstance(mark,cls):
+            if emitter is _panel or cache_size <= 0:
+                return emitter(mark,width,height)
+            cached = _fragments.get(mark)
+            if cached is not None and cached[0] == mark.revision and cached[1] == (width,height):
+                return iter(cached[2])
+            return _caching(mark,(width,height),emitter(mark,width,height))
+    raise TypeError, "no SVG output for %s marks" % type(mark).__name__
+
+def _caching(mark,size,chunks):
+    """Yields chunks as they are made, keeping them while cache_size allows."""
+    _fragments.pop(mark, None)
+    budget = cache_size - sum(entry[3] for entry in _fragments.values())
+    kept = []
+    total = 0
+    for chunk in chunks:
+        yield chunk
+        if kept is not None:
+            total += len(chunk)
+            if total <= budget:
+                kept.append(chunk)
+            else:
+                kept = None     # too big to keep; stop collecting
+    if kept is not None:
+        _fragments[mark] = (mark.revision, size, kept, total)
+
+# the root panel being serialized by the pool; workers inherit it when forked
+_pool_root = None
+
+# (pool, processes, root, signature of the scene the workers were forked with)
+_pool = None
+
+def _walk(mark):
+    yield mark
+    for child in getattr(mark,'children',()):
+        for m in _walk(child):
+            yield m
+
+def _signature(root):
+    """Identifies a rendered scene: every mark and its revision."""
+    return tuple((id(m),m.revision) for m in _walk(root))
+
+def _splits(panel):
+    """Returns the (start, stop) instance ranges of a child panel's tasks."""
+    n = len(panel.scene['data'])
+    size = max(1, -(-n // (4 * _pool[1])))    # about four tasks per process
+    return [(start, min(n, start + size)) for start in xrange(0, n, size)]
+
+def _tasks(root):
+    """Returns the parallel tasks in document order: (root instance, child, start, stop)."""
+    scene = root.scene
+    tasks = []
+    for i in np.flatnonzero(scene['visible']) if 'visible' in scene else xrange(len(scene['data'])):
+        for child in root.children:
+            if isinstance(child,Panel.Panel):
+                tasks.extend((int(i), child.childIndex, start, stop) for (start,stop) in _splits(child))
+    return tasks
+
+def _serialize(task):
+    """Serializes instances start to stop of a child panel of _pool_root."""
+    (i,c,start,stop) = task
+    root = _pool_root
+    scene = root.scene
+    n = len(scene['data'])
+    w = _resolve(scene,n,'left','right','width',float(root.width() or 0))[1]
+    h = _resolve(scene,n,'top','bottom','height',float(root.height() or 0))[1]
+    return ''.join(_panel(root.children[c], w[i], h[i], start, stop))
+
+def _pool_for(root,processes):
+    """Returns a pool forked with the current scene of root, reusing the last one if it still is."""
+    global _pool, _pool_root
+    signature = _signature(root)
+    if _pool is not None and _pool[1] == processes and _pool[2] is root and _pool[3] == signature:
+        return _pool[0]
+    close_pool()
+    _pool_root = root
+    _pool = (multiprocessing.Pool(processes), processes, root, signature)
+    return _pool[0]
+
+def close_pool():
+    """Shuts down the worker processes kept for parallel svg()."""
+    global _pool, _pool_root
+    if _pool is not None:
+        _pool[0].terminate()
+        _pool = None
+        _pool_root = None
+
+def svg(root,processes=None):
+    """Yields the SVG document for a root panel as a sequence of string chunks.
+    
+    The scene is rendered first, so the document reflects the current
+    properties and data.  Instances are formatted block_size at a time, so
+    memory does not grow with the number of marks.  If cache_size is set,
+    up to that many characters of serialized marks are kept, and marks that
+    no build has changed since are not serialized again.
+    
+    If processes is given, the instances of the root's child panels (e.g. a
+    grid of small multiples) are serialized in parallel by that many worker
+    processes, in blocks of instances, and spliced into the document in
+    order as they arrive.  The workers are forked with the rendered scene
+    and kept for later calls until the scene changes; close_pool() shuts
+    them down.  This needs os.fork; elsewhere the document is rendered
+    serially.  The output is the same either way.
+    """
+    root.render()   # incremental: only what changed since the last call is rebuilt
+    tasks = None
+    if processes and hasattr(os,'fork'):
+        tasks = _pool_for(root,processes).imap(_serialize, _tasks(root))
+    width = float(root.width() or 0)
+    height = float(root.height() or 0)
+    yield '<svg xmlns="http://www.w3.org/2000/svg" width="%.7g" height="%.7g">' % (width, height)
+    for chunk in _panel(root, width, height, tasks=tasks):
+        yield chunk
+    yield '</svg>'
+
+def write(root,f,buffer_size=1 << 16,processes=None):
+    """Streams the SVG document for root to the file-like object f.
+    
+    Chunks are gathered into writes of about buffer_size characters.  See
+    svg for processes.
+    """
+    buffered = []
+    size = 0
+    for chunk in svg(root,processes):
+        buffered.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            f.write(''.join(buffered))
+            buffered = []
+            size = 0
+    if buffered:
+        f.write(''.join(buffered))
@@ -1,13 +1,71 @@
 import math
 
-import Color
+# plain functions rather than lambdas, so that they pickle by name
 
-identity = lambda x: return x
-index = lambda: return self.index
-child = lambda: return self.childIndex
-parent = lambda: return self.parent.index
+def identity(x):
+    return x
 
-color = Color.color
+def index(mark):
+    return mark.index
+
+def child(mark):
+    return mark.childIndex
+
+def parent(mark):
+    return mark.parent.index
+
+def color(format):
+    """Parses a color spec; see Color.color.
+    
+    Color is imported on first use so that importing the package stays cheap.
+    """
+    global color
+    from pyprotovis.Color import color
+    return color(format)
+
+class _Deferred(object):
+    """Stands in for a class of a submodule that is not imported yet.
+    
+    Calling it or reading one of its attributes (e.g. pv.histogram.Bin)
+    imports the submodule and rebinds the package name to the real class.
+    """
+    def __init__(self, module, name, doc):
+        self._module = module
+        self._name = name
+        self.__doc__ = doc
+    
+    def _load(self):
+        target = getattr(__import__(__name__ + '.' + self._module, fromlist=[self._name]), self._name)
+        globals()[self._name] = target
+        return target
+    
+    def __call__(self, *args, **kw):
+        return self._load()(*args, **kw)
+    
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError, name
+        return getattr(self._load(), name)
+
+histogram = _Deferred('Histogram', 'histogram', "Bins data; see Histogram.histogram.")
+
+def nest(data=None):
+    """Groups data; see Nest.Nest."""
+    global nest
+    from pyprotovis.Nest import Nest as nest
+    return nest(data)
+
+def flatten(map):
+    """Flattens nested mappings; see Nest.Flatten."""
+    global flatten
+    from pyprotovis.Nest import Flatten as flatten
+    return flatten(map)
+
+def naturalOrder(a,b):
+    return cmp(a,b)
+
+def reverseOrder(a,b):
+    return cmp(b,a)
 
 def log(x,b=10):
     return math.log(x)/math.log(b)
@@ -0,0 +1,38 @@
+"""Force simulation step time across graph sizes.
+
+Lays out random trees of size nodes with the Protovis charge, spring and
+drag forces and reports the median time per step.  brute is the time of
+the charge force alone with theta = 0 (every pair evaluated), run only
+for sizes up to brute_limit.
+"""
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Force
+import pyprotovis.Simulation
+
+steps = 5
+brute_limit = 2000    # theta = 0 holds all n**2 pairs in memory at once
+
+def simulation(size, theta):
+    rng = np.random.RandomState(0)
+    links = np.column_stack((np.arange(1, size), (rng.random_sample(size - 1) * np.arange(1, size)).astype(np.intp)))
+    sim = pv.Simulation.Simulation(rng.uniform(0, 1000, size), rng.uniform(0, 1000, size))
+    return (sim.force(pv.Force.charge().theta(theta))
+               .force(pv.Force.spring().links(links))
+               .force(pv.Force.drag()))
+
+def main():
+    support.row('size', 'step', 'charge', 'brute')
+    for size in support.sizes([10**3, 10**4, 5 * 10**4]):
+        sim = simulation(size, .9).step(steps)
+        charge = support.best(lambda: sim.forces[0].apply(sim))
+        brute = '-'
+        if size <= brute_limit:
+            exact = simulation(size, 0)
+            brute = support.best(lambda: exact.forces[0].apply(exact), 1)
+        support.row(size, float(np.median(sim.timings)), charge, brute)
+
+if __name__ == '__main__':
+    main()
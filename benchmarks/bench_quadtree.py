@@ -0,0 +1,42 @@
+"""Quadtree query throughput against brute force.
+
+For size uniform points in a 1000x1000 square, times the bulk build and
+reports queries per second for nearest(), radius() with r = 10 and rect()
+with a 20x20 box, through the tree and by scanning every point.
+"""
+import time
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Quadtree
+
+queries = 200
+
+def rate(f, qx, qy):
+    start = time.time()
+    for (x,y) in zip(qx, qy):
+        f(x, y)
+    return len(qx) / (time.time() - start)
+
+def main():
+    support.row('size', 'build', 'nearest', 'brute', 'radius', 'brute', 'rect', 'brute')
+    for size in support.sizes([10**4, 10**5, 10**6]):
+        rng = np.random.RandomState(0)
+        px = rng.uniform(0, 1000, size)
+        py = rng.uniform(0, 1000, size)
+        qx = rng.uniform(0, 1000, queries)
+        qy = rng.uniform(0, 1000, queries)
+        tree = pv.Quadtree.Quadtree(px, py)
+        support.row(size,
+            support.best(lambda: pv.Quadtree.Quadtree(px, py)),
+            rate(tree.nearest, qx, qy),
+            rate(lambda x,y: ((px - x) ** 2 + (py - y) ** 2).argmin(), qx, qy),
+            rate(lambda x,y: tree.radius(x, y, 10), qx, qy),
+            rate(lambda x,y: np.flatnonzero((px - x) ** 2 + (py - y) ** 2 <= 100), qx, qy),
+            rate(lambda x,y: tree.rect(x, y, x + 20, y + 20), qx, qy),
+            rate(lambda x,y: np.flatnonzero((px >= x) & (px <= x + 20) & (py >= y) & (py <= y + 20)), qx, qy))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""Exact quantile scales: partial selection vs a full sort.
+
+sort is the old path (np.sort of the domain, then indexing the boundary
+ranks).  fit is constructing the scale, which defers all work; first is
+fit plus the first scale() call with the default (-1) quantiles, which
+still needs the whole sorted domain; select is fit plus quantiles(10)
+and the first scale() call.
+"""
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Scale
+
+def sort_path(data, n):
+    s = np.sort(data)
+    ranks = [int(float(i) * (len(data) - 1) / n) for i in range(n + 1)]
+    return s[ranks].tolist()
+
+def main():
+    support.row('size', 'sort', 'fit', 'first', 'select')
+    for size in support.sizes([10**5, 10**6, 10**7]):
+        data = np.random.RandomState(0).standard_normal(size)
+        support.row(size,
+            support.best(lambda: sort_path(data, 10)),
+            support.best(lambda: pv.Scale.quantile(data)),
+            support.best(lambda: pv.Scale.quantile(data).scale(0.)),
+            support.best(lambda: pv.Scale.quantile(data).quantiles(10).scale(0.)))
+
+if __name__ == '__main__':
+    main()
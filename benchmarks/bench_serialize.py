@@ -0,0 +1,32 @@
+"""Serialization cost of scales with large domains.
+
+Times cPickle (protocol 2) and JSON dumps/loads for ordinal and quantile
+scales whose domains hold size keys or values.
+"""
+import cPickle
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Scale
+
+def scales(size):
+    rng = np.random.RandomState(0)
+    yield 'ordinal', pv.Scale.ordinal(np.arange(size)).range("red", "green", "blue")
+    yield 'quantile', pv.Scale.quantile(rng.standard_normal(size)).quantiles(10).range(0, 100)
+
+def main():
+    support.row('scale', 'size', 'pickle', 'unpickle', 'to_json', 'from_json')
+    for size in support.sizes([10**4, 10**5, 10**6]):
+        for (name,s) in scales(size):
+            p = cPickle.dumps(s, 2)
+            j = s.to_json()
+            support.row(name, size,
+                support.best(lambda: cPickle.dumps(s, 2)),
+                support.best(lambda: cPickle.loads(p)),
+                support.best(lambda: s.to_json()),
+                support.best(lambda: pv.Scale.from_json(j)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""Shared helpers for the benchmark scripts.
+
+Run a benchmark from the repository root, e.g.
+python benchmarks/bench_quantile.py [sizes...]
+"""
+import os
+import imp
+import sys
+import time
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if 'pyprotovis' not in sys.modules:
+    try:
+        import pyprotovis
+    except ImportError:
+        imp.load_module('pyprotovis', None, root, ('', '', imp.PKG_DIRECTORY))
+
+def best(f, repeat=3):
+    """Returns the best wall-clock time of repeat calls to f, in seconds."""
+    times = []
+    for i in xrange(repeat):
+        t = time.time()
+        f()
+        times.append(time.time() - t)
+    return min(times)
+
+def sizes(default):
+    """Returns the problem sizes given on the command line, or default."""
+    return [int(float(a)) for a in sys.argv[1:]] or default
+
+def row(*cells):
+    print ' '.join('%12s' % (('%.4f' % c) if isinstance(c, float) else c) for c in cells)
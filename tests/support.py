@@ -0,0 +1,16 @@
+"""Makes the checkout importable as the pyprotovis package.
+
+The package is the repository root itself, so the tests load it under its
+real name when it is not already on the path.
+"""
+import os
+import imp
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if 'pyprotovis' not in sys.modules:
+    try:
+        import pyprotovis
+    except ImportError:
+        imp.load_module('pyprotovis', None, root, ('', '', imp.PKG_DIRECTORY))
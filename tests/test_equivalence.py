@@ -0,0 +1,94 @@
+"""Batch entry points must agree with their scalar counterparts."""
+import unittest
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Scale
+import pyprotovis.Color
+import pyprotovis.Format
+
+def _channels(c):
+    c = c.rgb()
+    return (int(c.r), int(c.g), int(c.b), int(round(c.a * 255)))
+
+class ScaleEquivalenceTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.x = np.linspace(-5, 105, 221)
+    
+    def assertMapMatches(self, s, x):
+        np.testing.assert_allclose(s.map(x), [s.scale(v) for v in x], rtol=1e-12, atol=1e-9)
+    
+    def test_linear_map(self):
+        self.assertMapMatches(pv.Scale.linear(0, 100).range(0, 640), self.x)
+        self.assertMapMatches(pv.Scale.linear(0, 20, 100).range(0, 50, 640), self.x)
+        self.assertMapMatches(pv.Scale.linear(100, 0).range(10, 640), self.x)
+    
+    def test_log_map(self):
+        x = np.linspace(1, 1000, 300)
+        self.assertMapMatches(pv.Scale.log(1, 1000).range(0, 640), x)
+        self.assertMapMatches(pv.Scale.log(-1000, -1).range(0, 640), -x)
+        self.assertMapMatches(pv.Scale.log(1, 1000).base(2).range(0, 640), x)
+    
+    def test_invert_many(self):
+        y = np.linspace(0, 640, 129)
+        for s in (pv.Scale.linear(0, 100).range(0, 640), pv.Scale.log(1, 1000).range(0, 640), pv.Scale.linear(0, 20, 100).range(0, 50, 640)):
+            np.testing.assert_allclose(s.invert_many(y), [s.invert(v) for v in y], rtol=1e-12)
+    
+    def test_quantile_map(self):
+        s = pv.Scale.quantile(np.arange(100.)).quantiles(4).range(0, 1)
+        self.assertMapMatches(s, self.x)
+    
+    def test_ordinal_map(self):
+        s = pv.Scale.ordinal("a", "b", "c").range(1, 2, 3)
+        keys = ["c", "a", "d", "b", "d", "e"]
+        expect = [s.scale(k) for k in keys]
+        t = pv.Scale.ordinal("a", "b", "c").range(1, 2, 3)
+        self.assertEqual(list(t.map(keys)), expect)
+        self.assertEqual(list(t.domain()), list(s.domain()))
+
+class ColorEquivalenceTest(unittest.TestCase):
+    
+    def test_rgba(self):
+        x = np.linspace(0, 100, 201)   # scale() extrapolates; rgba() clamps
+        for s in (pv.Scale.linear(0, 100).range("white", "steelblue"),
+                  pv.Scale.linear(0, 50, 100).range("red", "rgba(0,0,255,.5)", "transparent"),
+                  pv.Scale.log(1, 100).range("#fff", "hsl(120,50%,50%)")):
+            xs = x[x >= 1] if isinstance(s, pv.Scale.log) else x
+            self.assertEqual([tuple(c) for c in s.rgba(xs)], [_channels(s.scale(v)) for v in xs])
+    
+    def test_packed(self):
+        s = pv.Scale.linear(0, 1).range("black", "orange")
+        x = np.linspace(0, 1, 11)
+        expect = [(r << 24) | (g << 16) | (b << 8) | a for r, g, b, a in map(_channels, map(s.scale, x))]
+        self.assertEqual(list(s.rgba_packed(x)), expect)
+
+class FormatEquivalenceTest(unittest.TestCase):
+    
+    def assertFormatsMatch(self, f, values):
+        self.assertEqual(list(f.format_many(values)), [f.format(v) for v in values])
+    
+    def test_number(self):
+        values = [0, 1, -1, 3.14159, -2.71828, 1234567.891, 1e-7, 42]
+        self.assertFormatsMatch(pv.Format.number(), values)
+        self.assertFormatsMatch(pv.Format.number().fractionDigits(2), values)
+        self.assertFormatsMatch(pv.Format.number().integerDigits(3).group(","), values)
+        self.assertFormatsMatch(pv.Format.number().fractionDigits(1, 3).integerPad("0"), values)
+    
+    def test_number_halves(self):
+        halves = [0.5, 1.5, 2.5, -0.5, -1.5, -2.5, 0.49999999999999994, 1e15 + 0.5]
+        f = pv.Format.number()
+        self.assertEqual(f.format_many(halves[:4]), ['1', '2', '3', '-1'])
+        self.assertFormatsMatch(f, halves)
+        self.assertFormatsMatch(pv.Format.number().fractionDigits(1), [0.25, 0.75, -0.25, 1.25, 2.675])
+        self.assertFormatsMatch(pv.Format.number().fractionDigits(2).group(""), [0.125, -0.125, 1.005, 10.375])
+    
+    def test_number_parse(self):
+        f = pv.Format.number().fractionDigits(1)
+        strings = ['0.25', '-0.25', '1,234.75', '2.5', '-3.05']
+        self.assertEqual(list(f.parse_many(strings)), [f.parse(v) for v in strings])
+
+if __name__ == '__main__':
+    unittest.main()
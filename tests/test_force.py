@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Force
+import pyprotovis.Simulation
+
+def _direct_charge(x, y, k, lo, hi):
+    dx = x[np.newaxis, :] - x[:, np.newaxis]
+    dy = y[np.newaxis, :] - y[:, np.newaxis]
+    d = np.sqrt(dx * dx + dy * dy)
+    dn = 1. / np.maximum(d, lo)
+    kc = np.where(d <= hi, k * dn ** 3, 0.)
+    np.fill_diagonal(kc, 0.)
+    return ((dx * kc).sum(axis=1), (dy * kc).sum(axis=1))
+
+class ChargeTest(unittest.TestCase):
+    
+    def setUp(self):
+        rng = np.random.RandomState(6)
+        self.x = rng.uniform(0, 600, 400)
+        self.y = rng.uniform(0, 600, 400)
+        (self.fx, self.fy) = _direct_charge(self.x, self.y, -40, 2, 500)
+    
+    def charge(self, theta):
+        sim = pv.Simulation.Simulation(self.x, self.y)
+        pv.Force.charge().theta(theta).apply(sim)
+        return sim
+    
+    def test_theta_zero_is_exact(self):
+        sim = self.charge(0)
+        np.testing.assert_allclose(sim.fx, self.fx, rtol=1e-9, atol=1e-12)
+        np.testing.assert_allclose(sim.fy, self.fy, rtol=1e-9, atol=1e-12)
+    
+    def test_barnes_hut_error(self):
+        sim = self.charge(.9)
+        error = np.hypot(sim.fx - self.fx, sim.fy - self.fy) / np.hypot(self.fx, self.fy)
+        self.assertLess(np.median(error), .1)
+
+class SimulationTest(unittest.TestCase):
+    
+    def test_step_records_timings(self):
+        sim = pv.Simulation.Simulation([0, 10, 20], [0, 0, 5])
+        sim.force(pv.Force.charge()).force(pv.Force.spring().links([(0, 1), (1, 2)])).force(pv.Force.drag())
+        sim.step(3)
+        self.assertEqual(len(sim.timings), 3)
+        self.assertTrue(np.isfinite(sim.x).all() and np.isfinite(sim.y).all())
+
+if __name__ == '__main__':
+    unittest.main()
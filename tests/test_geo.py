@@ -0,0 +1,76 @@
+import unittest
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Geo
+
+LatLng = pv.Geo.LatLng
+
+class ProjectionTest(unittest.TestCase):
+    
+    def assertRoundTrips(self, name, lat, lng):
+        p = pv.Geo.projection(name)
+        (x,y) = p.project(lat, lng)
+        (lat2,lng2) = p.invert(x, y)
+        np.testing.assert_allclose(lat2, lat, atol=1e-9)
+        np.testing.assert_allclose(lng2, lng, atol=1e-9)
+    
+    def test_round_trips(self):
+        rng = np.random.RandomState(7)
+        lat = rng.uniform(-80, 80, 200)
+        lng = rng.uniform(-179, 179, 200)
+        for name in ('identity', 'mercator', 'gall-peters', 'sinusoidal', 'hammer'):
+            self.assertRoundTrips(name, lat, lng)
+        self.assertRoundTrips('albers', rng.uniform(20, 55, 200), rng.uniform(-130, -65, 200))
+    
+    def test_albers_usa_round_trips(self):
+        # the lower 48, Alaska, Hawaii and Puerto Rico
+        lat = np.array([40.7, 34.05, 47.6, 25.8, 61.2, 64.8, 21.3, 19.7, 18.4, 18.2])
+        lng = np.array([-74.0, -118.2, -122.3, -80.2, -149.9, -147.7, -157.9, -155.1, -66.1, -67.1])
+        self.assertRoundTrips('albers-usa', lat, lng)
+
+class ScaleTest(unittest.TestCase):
+    
+    def setUp(self):
+        rng = np.random.RandomState(8)
+        self.lat = rng.uniform(25, 49, 100)
+        self.lng = rng.uniform(-124, -67, 100)
+    
+    def test_fit_fills_range(self):
+        for name in ('mercator', 'albers', 'albers-usa'):
+            s = pv.Geo.scale(name).range(800, 500).domain(self.lat, self.lng)
+            (x,y) = s.map(self.lat, self.lng)
+            self.assertGreaterEqual(x.min(), -1e-9)
+            self.assertLessEqual(x.max(), 800 + 1e-9)
+            self.assertGreaterEqual(y.min(), -1e-9)
+            self.assertLessEqual(y.max(), 500 + 1e-9)
+            # the fit touches two opposite sides of the range
+            self.assertTrue(np.isclose(x.max() - x.min(), 800) or np.isclose(y.max() - y.min(), 500))
+    
+    def test_invert(self):
+        s = pv.Geo.scale('albers-usa').range(800, 500).domain(self.lat, self.lng)
+        (x,y) = s.scale(LatLng(40.7, -74.0))
+        c = s.invert(x, y)
+        self.assertAlmostEqual(c.lat, 40.7)
+        self.assertAlmostEqual(c.lng, -74.0)
+    
+    def test_extend_one_point_at_a_time(self):
+        for name in ('mercator', 'albers'):
+            batch = pv.Geo.scale(name).range(800, 500).domain(self.lat, self.lng)
+            s = pv.Geo.scale(name).range(800, 500)
+            for (a,b) in zip(self.lat, self.lng):
+                s.extend(LatLng(a, b))
+            self.assertEqual(s.domain(), batch.domain())
+            np.testing.assert_allclose(s.map(self.lat, self.lng), batch.map(self.lat, self.lng))
+    
+    def test_single_point_domain(self):
+        s = pv.Geo.scale('mercator').range(800, 500).domain(LatLng(10, 20))
+        self.assertEqual(s.domain(), [LatLng(10, 20), LatLng(10, 20)])
+        self.assertEqual(s.scale(LatLng(10, 20)), (400., 250.))
+        s = pv.Geo.scale('mercator').range(800, 500).domain(10, 20)
+        self.assertEqual(s.scale(LatLng(10, 20)), (400., 250.))
+
+if __name__ == '__main__':
+    unittest.main()
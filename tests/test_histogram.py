@@ -0,0 +1,31 @@
+import unittest
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+
+class HistogramTest(unittest.TestCase):
+    
+    def test_bins_are_right_closed(self):
+        bins = pv.histogram([0, 1, 1, 2, 3, 4]).bins(range(5))
+        self.assertEqual(bins.count.tolist(), [3, 1, 1, 1])
+        self.assertEqual(list(bins[0]), [0, 1, 1])
+    
+    def test_out_of_range_and_nan(self):
+        bins = pv.histogram([-5, 0.5, 9, np.nan]).bins([0, 1, 2])
+        self.assertEqual(bins.count.tolist(), [2, 1])
+    
+    def test_streaming_matches_batch(self):
+        data = np.random.RandomState(3).randint(0, 10, 1000).astype(float)
+        ticks = np.arange(0, 11, 2.)
+        streamed = pv.histogram().ticks(ticks)
+        for chunk in np.array_split(data, 6):
+            streamed.extend(chunk)
+        self.assertEqual(streamed.bins().count.tolist(), pv.histogram(data).bins(ticks).count.tolist())
+    
+    def test_bin_is_exported(self):
+        self.assertTrue(issubclass(pv.histogram.Bin, list))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import sys
+import unittest
+import subprocess
+
+import support
+
+# wall-clock budget for a fresh `import pyprotovis.Color`, in seconds;
+# generous, so that it only trips when heavy work moves back to import time
+budget = 0.1
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+def _fresh(code):
+    """Runs code in a new interpreter with the package importable; returns its stdout."""
+    prelude = "import sys; sys.path.insert(0, %r); import support\n" % here
+    return subprocess.check_output([sys.executable, '-c', prelude + code]).strip()
+
+class ImportCostTest(unittest.TestCase):
+    
+    def test_package_import_is_lazy(self):
+        loaded = _fresh("import sys; print ' '.join(sorted(m for m in sys.modules if m.startswith('pyprotovis') and sys.modules[m] or m == 'numpy'))")
+        self.assertEqual(loaded.split(), ['pyprotovis'])
+    
+    def test_deferred_attributes(self):
+        out = _fresh("import sys; import pyprotovis as pv; print 'pyprotovis.Histogram' in sys.modules, pv.histogram.Bin.__name__")
+        self.assertEqual(out.split(), ['False', 'Bin'])
+    
+    def test_color_import_skips_numpy(self):
+        out = _fresh("import sys; import pyprotovis.Color; print 'numpy' in sys.modules")
+        self.assertEqual(out, 'False')
+    
+    def test_named_colors_parse_on_lookup(self):
+        out = _fresh("import pyprotovis.Color as C; print C.parse_cache.info()[3], C.names['steelblue'].color")
+        self.assertEqual(out.split(), ['0', 'rgb(70,130,180)'])
+    
+    def test_import_time_budget(self):
+        elapsed = min(float(_fresh("import time; t = time.time(); import pyprotovis.Color; print time.time() - t")) for i in xrange(3))
+        self.assertLess(elapsed, budget)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+import unittest
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Dom
+import pyprotovis.Layout
+
+def _protovis_stack(dy, x, offset, order, h):
+    """pv.Layout.Stack's buildImplied, loop for loop."""
+    n, m = len(dy), len(dy[0])
+    dy = [list(v) for v in dy]
+    y = [[0.] * m for i in xrange(n)]
+    if order == 'inside-out':
+        peak = [v.index(max(v)) for v in dy]
+        sums = [sum(v) for v in dy]
+        top = bottom = 0
+        tops, bottoms = [], []
+        for j in sorted(range(n), key=lambda i: peak[i]):
+            if top < bottom:
+                top += sums[j]
+                tops.append(j)
+            else:
+                bottom += sums[j]
+                bottoms.append(j)
+        index = bottoms[::-1] + tops
+    elif order == 'reverse':
+        index = range(n - 1, -1, -1)
+    else:
+        index = range(n)
+    if offset == 'silhouette':
+        for j in xrange(m):
+            y[index[0]][j] = (h - sum(dy[i][j] for i in xrange(n))) / 2.
+    elif offset == 'wiggle':
+        o = (h - sum(dy[i][0] for i in xrange(n))) / 2.
+        y[index[0]][0] = o
+        for j in xrange(1, m):
+            s1 = s2 = 0.
+            dx = x[j] - x[j - 1]
+            for i in xrange(n):
+                s1 += dy[i][j]
+            for i in xrange(n):
+                s3 = (dy[index[i]][j] - dy[index[i]][j - 1]) / (2 * dx)
+                for k in xrange(i):
+                    s3 += (dy[index[k]][j] - dy[index[k]][j - 1]) / dx
+                s2 += s3 * dy[index[i]][j]
+            o -= s2 / s1 * dx if s1 else 0
+            y[index[0]][j] = o
+    elif offset == 'expand':
+        for j in xrange(m):
+            k = sum(dy[i][j] for i in xrange(n))
+            for i in xrange(n):
+                dy[i][j] = dy[i][j] * h / k if k else float(h) / n
+    for j in xrange(m):
+        o = y[index[0]][j]
+        for i in xrange(1, n):
+            o += dy[index[i - 1]][j]
+            y[index[i]][j] = o
+    return np.array(y), np.array(dy)
+
+class StackTest(unittest.TestCase):
+    
+    def setUp(self):
+        rng = np.random.RandomState(4)
+        self.values = rng.gamma(2, 10, (7, 40))
+        self.values[2,5:9] = 0
+        self.values[:,12] = 0
+        self.x = np.cumsum(rng.uniform(1, 5, 40))
+    
+    def check(self, offset, order):
+        stack = (pv.Layout.Stack(self.values).x(self.x).offset(offset).order(order).height(300)).layout()
+        (y, dy) = _protovis_stack(self.values.tolist(), self.x.tolist(), offset, order, 300)
+        self.assertTrue(np.allclose(stack.dy, dy, rtol=1e-12, atol=1e-9), (offset, order))
+        self.assertTrue(np.allclose(stack.y, y, rtol=1e-12, atol=1e-9), (offset, order))
+    
+    def test_matches_protovis(self):
+        for offset in ('zero', 'silhouette', 'wiggle', 'expand'):
+            for order in (None, 'inside-out', 'reverse'):
+                self.check(offset, order)
+    
+    def test_small_cases(self):
+        stack = pv.Layout.Stack([[1, 2], [3, 0], [2, 2]]).layout()
+        self.assertEqual(stack.y.tolist(), [[0, 0], [1, 2], [4, 2]])
+        stack.order('reverse').layout()
+        self.assertEqual(stack.y.tolist(), [[5, 2], [2, 2], [0, 0]])
+        stack.order(None).offset('silhouette').height(10).layout()
+        self.assertEqual(stack.y[0].tolist(), [2, 3])
+        stack.offset('expand').layout()
+        self.assertEqual(stack.dy.tolist(), [[10 / 6., 5], [5, 0], [10 / 3., 5]])
+        # expand scales the output, not the layers
+        self.assertEqual(stack.layers().tolist(), [[1, 2], [3, 0], [2, 2]])
+    
+    def test_inside_out_order(self):
+        # layers are placed in order of their peaks, alternately below and above
+        values = np.array([[9, 1, 1, 1], [1, 9, 1, 1], [1, 1, 9, 1], [1, 1, 1, 9]], dtype=float)
+        stack = pv.Layout.Stack(values).order('inside-out').layout()
+        self.assertEqual(np.argsort(stack.y[:,0]).tolist(), [2, 0, 1, 3])
+    
+    def test_rejects_unknown(self):
+        stack = pv.Layout.Stack()
+        self.assertRaises(ValueError, stack.offset, 'bottom')
+        self.assertRaises(ValueError, stack.order, 'random')
+
+def _tree(n, seed=0):
+    rng = np.random.RandomState(seed)
+    parent = np.concatenate(([-1], [rng.randint(0, i) for i in xrange(1, n)]))
+    return pv.Dom.Dom(parent, rng.uniform(1, 10, n))
+
+def _families(dom):
+    for i in xrange(len(dom)):
+        if not dom.leaf[i]:
+            yield i, dom.children(i)
+
+class TreemapTest(unittest.TestCase):
+    
+    def check(self, treemap):
+        dom = treemap.dom
+        sums = dom.sums()
+        area = treemap.dx * treemap.dy
+        self.assertTrue(np.allclose(area, sums / sums[dom.root] * 400 * 300, rtol=1e-9))
+        for (i,kids) in _families(dom):
+            self.assertTrue((treemap.x[kids] >= treemap.x[i] - 1e-9).all())
+            self.assertTrue((treemap.y[kids] >= treemap.y[i] - 1e-9).all())
+            self.assertTrue((treemap.x[kids] + treemap.dx[kids] <= treemap.x[i] + treemap.dx[i] + 1e-9).all())
+            self.assertTrue((treemap.y[kids] + treemap.dy[kids] <= treemap.y[i] + treemap.dy[i] + 1e-9).all())
+    
+    def test_areas_proportional_to_values(self):
+        for mode in ('squarify', 'slice', 'dice', 'slice-and-dice'):
+            self.check(pv.Layout.Treemap(_tree(300)).mode(mode).width(400).height(300).layout())
+    
+    def test_update(self):
+        dom = _tree(300, 1)
+        treemap = pv.Layout.Treemap(dom).width(400).height(300).layout()
+        leaves = np.flatnonzero(dom.leaf)
+        for seed in xrange(3):
+            rng = np.random.RandomState(seed)
+            dom.update(rng.choice(leaves, 10, replace=False), rng.uniform(0, 20, 10))
+            self.check(treemap.layout())
+        fresh = pv.Layout.Treemap(pv.Dom.Dom(dom.parent, dom.value)).width(400).height(300).layout()
+        for name in ('x', 'y', 'dx', 'dy'):
+            self.assertTrue(np.allclose(getattr(treemap, name), getattr(fresh, name)), name)
+
+class PartitionTest(unittest.TestCase):
+    
+    def test_children_cover_parent(self):
+        dom = _tree(300, 2)
+        sums = dom.sums()
+        for orient in ('top', 'left'):
+            partition = pv.Layout.Partition(dom).orient(orient).width(400).height(300).layout()
+            (lo, extent) = (partition.x, partition.dx) if orient == 'top' else (partition.y, partition.dy)
+            (band, size) = (partition.y, partition.dy) if orient == 'top' else (partition.x, partition.dx)
+            self.assertTrue(np.allclose(extent, sums / sums[dom.root] * extent[dom.root]))
+            for (i,kids) in _families(dom):
+                order = kids[np.argsort(lo[kids])]
+                self.assertAlmostEqual(lo[order[0]], lo[i])
+                self.assertTrue(np.allclose(lo[order[1:]], (lo + extent)[order[:-1]]))
+                self.assertAlmostEqual(extent[kids].sum(), extent[i])
+                self.assertTrue(np.allclose(band[kids], band[i] + size[i]))
+
+class PackTest(unittest.TestCase):
+    
+    def check(self, pack):
+        dom = pack.dom
+        leaves = dom.leaf
+        # leaf areas are proportional to their values
+        self.assertTrue(np.allclose(pack.r[leaves] ** 2 / dom.value[leaves], (pack.r[leaves] ** 2 / dom.value[leaves])[0]))
+        for (i,kids) in _families(dom):
+            (x, y, r) = (pack.x[kids], pack.y[kids], pack.r[kids])
+            d = np.hypot(x[:,np.newaxis] - x, y[:,np.newaxis] - y)
+            gap = d - (r[:,np.newaxis] + r)
+            np.fill_diagonal(gap, 0)
+            self.assertTrue((gap >= -1e-6 * pack.r[i]).all(), (i, gap.min()))
+            self.assertTrue((np.hypot(x - pack.x[i], y - pack.y[i]) + r <= pack.r[i] * (1 + 1e-6)).all())
+    
+    def test_circles_do_not_overlap(self):
+        for order in ('ascending', 'descending', None):
+            self.check(pv.Layout.Pack(_tree(200, 3)).order(order).layout())
+    
+    def test_update(self):
+        dom = _tree(200, 4)
+        pack = pv.Layout.Pack(dom).layout()
+        leaves = np.flatnonzero(dom.leaf)
+        dom.update(leaves[:5], [20, 1, 3, 8, 2])
+        self.check(pack.layout())
+
+if __name__ == '__main__':
+    unittest.main()
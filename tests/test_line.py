@@ -0,0 +1,96 @@
+import re
+import unittest
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Panel
+import pyprotovis.Line
+import pyprotovis.Area
+import pyprotovis.SvgScene
+
+def _walk(n, seed=0):
+    random = np.random.RandomState(seed)
+    x = np.sort(random.uniform(0, 200, n))
+    y = np.cumsum(random.normal(0, 2, n))
+    return x, y
+
+def _segment_distance(px,py,ax,ay,bx,by):
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    t = 0 if length == 0 else min(1, max(0, ((px - ax) * dx + (py - ay) * dy) / length))
+    return np.hypot(px - ax - t * dx, py - ay - t * dy)
+
+def _path(root):
+    return re.findall(r'<path d="([^"]*)"', ''.join(pv.SvgScene.svg(root)))
+
+def _path_data(x,y):
+    return 'M' + 'L'.join('%.7g,%.7g' % v for v in zip(x.tolist(), y.tolist()))
+
+class DecimateTest(unittest.TestCase):
+    
+    def test_minmax_keeps_column_extremes(self):
+        x, y = _walk(5000)
+        for tolerance in (1, 2.5):
+            keep = set(pv.Line.minmax(x,y,tolerance).tolist())
+            column = np.floor(x / tolerance)
+            for c in np.unique(column):
+                run = np.flatnonzero(column == c)
+                for i in (run[0], run[-1], run[y[run].argmin()], run[y[run].argmax()]):
+                    self.assertTrue(i in keep)
+            self.assertTrue(len(keep) <= 4 * len(np.unique(column)))
+    
+    def test_rdp_within_tolerance(self):
+        x, y = _walk(2000, 1)
+        for tolerance in (0.5, 1, 4):
+            keep = pv.Line.rdp(x,y,tolerance)
+            self.assertEqual((keep[0], keep[-1]), (0, len(x) - 1))
+            for (a,b) in zip(keep[:-1], keep[1:]):
+                for i in xrange(a + 1, b):
+                    d = _segment_distance(x[i],y[i],x[a],y[a],x[b],y[b])
+                    self.assertTrue(d <= tolerance + 1e-9, (tolerance, i, d))
+            self.assertTrue(len(keep) < len(x))
+    
+    def test_lttb_keeps_endpoints(self):
+        x, y = _walk(1000, 2)
+        keep = pv.Line.lttb(x,y,50)
+        self.assertEqual(len(keep), 50)
+        self.assertEqual((keep[0], keep[-1]), (0, 999))
+        self.assertTrue((np.diff(keep) > 0).all())
+    
+    def test_off_keeps_every_vertex(self):
+        x, y = _walk(100)
+        self.assertEqual(pv.Line.decimate(x,y,None).tolist(), range(100))
+        self.assertRaises(ValueError, pv.Line.decimate, x, y, 'spline')
+
+class PathTest(unittest.TestCase):
+    
+    def _chart(self, mark, n=3000):
+        x, y = _walk(n)
+        y = y - y.min()
+        root = pv.Panel.Panel().width(200).height(400)
+        mark = root.add(mark).data(np.arange(n)).left(lambda i: x[i]).top(lambda i: y[i])
+        return root, mark, x, y
+    
+    def test_line_off_matches_baseline(self):
+        (root, line, x, y) = self._chart(pv.Line.Line)
+        self.assertEqual(_path(root), [_path_data(x,y)])
+        self.assertEqual(line.path_stats, {'vertices_in': 3000, 'vertices_out': 3000})
+    
+    def test_area_off_matches_baseline(self):
+        (root, area, x, y) = self._chart(pv.Area.Area)
+        area.height(10)
+        self.assertEqual(_path(root), [_path_data(np.concatenate((x, x[::-1])), np.concatenate((y, y[::-1] + 10))) + 'Z'])
+    
+    def test_line_decimated(self):
+        (root, line, x, y) = self._chart(pv.Line.Line)
+        for method in ('minmax', 'lttb', 'rdp'):
+            line.decimate(method)
+            keep = pv.Line.decimate(x,y,method)
+            self.assertEqual(_path(root), [_path_data(x[keep],y[keep])])
+            self.assertEqual(line.path_stats, {'vertices_in': 3000, 'vertices_out': len(keep)})
+            self.assertTrue(len(keep) < 3000)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Scale
+import pyprotovis.Panel
+import pyprotovis.Bar
+import pyprotovis.Dot
+import pyprotovis.SvgScene
+
+def _chart(test):
+    """Sets up a bar and a dot mark, built once, on test."""
+    test.root = pv.Panel.Panel().width(200).height(100)
+    test.color = pv.Scale.ordinal("a", "b", "c").range("red", "green", "blue")
+    test.bar = test.root.add(pv.Bar.Bar).data(["a", "b", "c"]).left(pv.index).width(10).bottom(0).height(20).fillStyle(test.color)
+    test.dot = test.root.add(pv.Dot.Dot).data([1, 2, 3]).left(lambda d: d * 10).top(5)
+    test.root.render()
+
+class IncrementalBuildTest(unittest.TestCase):
+    
+    def setUp(self):
+        _chart(self)
+    
+    def test_scale_property_follows_data(self):
+        self.bar.data(["c", "b", "a"])
+        self.root.render()
+        self.assertEqual(self.bar.scene['fillStyle'][:, :3].tolist(), [[0, 0, 255], [0, 128, 0], [255, 0, 0]])
+        self.assertEqual(self.bar.changed.tolist(), [True, False, True])
+        self.assertEqual(self.bar.stats['properties_recomputed'], 1)
+    
+    def test_revision_counts_changing_builds(self):
+        revision = self.bar.revision
+        self.root.render()
+        self.assertEqual(self.bar.revision, revision)
+        self.bar.data(["b", "b", "c"])
+        self.root.render()
+        self.assertEqual(self.bar.revision, revision + 1)
+    
+    def test_svg_follows_updates(self):
+        ''.join(pv.SvgScene.svg(self.root))
+        self.dot.top(50)
+        self.assertIn('cy="50"', ''.join(pv.SvgScene.svg(self.root)))
+        self.assertEqual(self.dot.stats['properties_recomputed'], 1)
+    
+    def test_color_scales(self):
+        data = np.arange(12.)
+        quantile = pv.Scale.quantile(data).quantiles(3).range("white", "red")
+        linear = pv.Scale.linear(0, 11).range("white", "steelblue")
+        for s in (quantile, linear, pv.Scale.ordinal(0., 1., 2.).range("red", "green", "blue")):
+            bar = self.root.add(pv.Bar.Bar).data(data).fillStyle(s)
+            self.root.render()
+            expect = [(c.r, c.g, c.b, int(round(c.a * 255))) for c in (s.scale(d).rgb() for d in data)]
+            self.assertEqual([tuple(c) for c in bar.scene['fillStyle'].tolist()], expect)
+
+class SvgCacheTest(unittest.TestCase):
+    
+    def setUp(self):
+        _chart(self)
+        self.cache_size = pv.SvgScene.cache_size
+        pv.SvgScene._fragments.clear()
+    
+    def tearDown(self):
+        pv.SvgScene.cache_size = self.cache_size
+        pv.SvgScene._fragments.clear()
+    
+    def test_nothing_kept_by_default(self):
+        pv.SvgScene.cache_size = 0
+        ''.join(pv.SvgScene.svg(self.root))
+        self.assertEqual(len(pv.SvgScene._fragments), 0)
+    
+    def test_reserializes_changed_marks_only(self):
+        pv.SvgScene.cache_size = 1 << 20
+        first = ''.join(pv.SvgScene.svg(self.root))
+        dot = pv.SvgScene._fragments[self.dot]
+        bar = pv.SvgScene._fragments[self.bar]
+        self.bar.data(["c", "b", "a"])
+        second = ''.join(pv.SvgScene.svg(self.root))
+        self.assertIs(pv.SvgScene._fragments[self.dot], dot)
+        self.assertIsNot(pv.SvgScene._fragments[self.bar], bar)
+        self.assertEqual(second, first.replace("rgb(255,0,0)", "#").replace("rgb(0,0,255)", "rgb(255,0,0)").replace("#", "rgb(0,0,255)"))
+        self.assertEqual(''.join(pv.SvgScene.svg(self.root)), second)
+    
+    def test_size_limit(self):
+        pv.SvgScene.cache_size = 200
+        document = ''.join(pv.SvgScene.svg(self.root))
+        self.assertNotIn(self.bar, pv.SvgScene._fragments)
+        self.assertLessEqual(sum(entry[3] for entry in pv.SvgScene._fragments.values()), 200)
+        self.assertEqual(''.join(pv.SvgScene.svg(self.root)), document)
+
+if __name__ == '__main__':
+    unittest.main()
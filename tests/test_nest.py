@@ -0,0 +1,132 @@
+import unittest
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Mark
+import pyprotovis.Nest
+
+def _records(n, seed=0):
+    rng = np.random.RandomState(seed)
+    return [{'a': int(a), 'b': 'xyz'[b], 'v': float(v)}
+            for (a,b,v) in zip(rng.randint(0, 12, n), rng.randint(0, 3, n), rng.normal(0, 10, n))]
+
+def _naive(rows, keys):
+    """Groups rows with a dict per level, keeping first-seen key order."""
+    groups = {}
+    order = []
+    for row in rows:
+        path = tuple(row[k] for k in keys)
+        if path not in groups:
+            groups[path] = []
+            order.append(path)
+        groups[path].append(row)
+    return order, groups
+
+def _naive_map(rows, keys, f):
+    (order, groups) = _naive(rows, keys)
+    root = {}
+    for path in order:
+        m = root
+        for k in path[:-1]:
+            m = m.setdefault(k, {})
+        m[path[-1]] = f(groups[path])
+    return root
+
+class NestTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.rows = _records(500)
+    
+    def test_entries_first_seen_order(self):
+        entries = pv.nest(self.rows).key('a').key('b').entries()
+        (order, groups) = _naive(self.rows, ('a', 'b'))
+        flat = [((outer['key'], inner['key']), inner['values']) for outer in entries for inner in outer['values']]
+        # outer keys in first-seen order, then inner keys as first seen under each
+        outer = _naive(self.rows, ('a',))[0]
+        self.assertEqual([path for (path, values) in flat], sorted(order, key=lambda path: outer.index(path[:1])))
+        for (path, values) in flat:
+            self.assertEqual(values, groups[path])
+    
+    def test_entries_sorted_keys(self):
+        entries = pv.nest(self.rows).key('a').sortKeys(pv.reverseOrder).key('b').sortKeys().entries()
+        (order, groups) = _naive(self.rows, ('a', 'b'))
+        self.assertEqual([e['key'] for e in entries], sorted(set(a for (a, b) in order), reverse=True))
+        for outer in entries:
+            self.assertEqual([inner['key'] for inner in outer['values']], sorted(b for (a, b) in order if a == outer['key']))
+            for inner in outer['values']:
+                self.assertEqual(inner['values'], groups[(outer['key'], inner['key'])])
+    
+    def test_map(self):
+        self.assertEqual(pv.nest(self.rows).key('b').key('a').map(), _naive_map(self.rows, ('b', 'a'), lambda g: g))
+    
+    def test_function_rollup(self):
+        spread = lambda g: max(r['v'] for r in g) - min(r['v'] for r in g)
+        self.assertEqual(pv.nest(self.rows).key('a').key('b').rollup(spread).map(),
+                         _naive_map(self.rows, ('a', 'b'), spread))
+        entries = pv.nest(self.rows).key('b').sortKeys().rollup(len).entries()
+        self.assertEqual([(e['key'], e['values']) for e in entries],
+                         sorted(_naive_map(self.rows, ('b',), len).items()))
+    
+    def test_vectorized_key(self):
+        columns = dict((k, np.array([r[k] for r in self.rows])) for k in ('a', 'b', 'v'))
+        parity = pv.Mark.vectorized(lambda data: data['a'] % 2)
+        counts = pv.nest(columns).key(parity).rollup('count').map()
+        self.assertEqual(counts, _naive_map([dict(r, p=r['a'] % 2) for r in self.rows], ('p',), len))
+    
+    def test_named_rollups(self):
+        reducers = {'count': len, 'sum': sum, 'mean': lambda v: sum(v) / len(v), 'min': min, 'max': max}
+        for (name, f) in reducers.items():
+            result = pv.nest(self.rows).key('a').key('b').rollup(name, 'v').map()
+            expected = _naive_map(self.rows, ('a', 'b'), lambda g: f([r['v'] for r in g]))
+            self.assertEqual(sorted(result), sorted(expected))
+            for a in expected:
+                for b in expected[a]:
+                    self.assertAlmostEqual(result[a][b], expected[a][b], 9)
+
+class StreamTest(unittest.TestCase):
+    
+    def setUp(self):
+        rng = np.random.RandomState(5)
+        n = 4000
+        self.data = {'a': rng.randint(0, 30, n), 'b': rng.randint(0, 4, n), 'v': rng.uniform(-5, 5, n)}
+    
+    def chunks(self, k):
+        n = len(self.data['v'])
+        for rows in np.array_split(np.arange(n), k):
+            yield dict((c, v[rows]) for (c, v) in self.data.iteritems())
+    
+    def check(self, streamed, batch):
+        (sk, sv) = streamed.groups()
+        (bk, bv) = batch.groups()
+        for (s, b) in zip(sk, bk):
+            self.assertEqual(s.tolist(), b.tolist())
+        self.assertTrue(np.allclose(sv, bv, rtol=1e-12))
+    
+    def test_extend_matches_batch(self):
+        for name in pv.Nest.rollups:
+            streamed = pv.nest().key('a').key('b').rollup(name, 'v')
+            for chunk in self.chunks(7):
+                streamed.extend(chunk)
+            self.check(streamed, pv.nest(self.data).key('a').key('b').rollup(name, 'v'))
+    
+    def test_merge_matches_batch(self):
+        for name in pv.Nest.rollups:
+            parts = []
+            for chunk in self.chunks(5):
+                # each part sees its own first-seen key order
+                part = pv.nest().key('a').sortKeys().key('b').sortKeys().rollup(name, 'v')
+                parts.append(part.extend(chunk))
+            merged = parts[0]
+            for part in parts[1:]:
+                merged.merge(part)
+            batch = pv.nest(self.data).key('a').sortKeys().key('b').sortKeys().rollup(name, 'v')
+            self.check(merged, batch)
+            self.assertEqual(sorted(merged.map()), sorted(batch.map()))
+    
+    def test_streaming_needs_named_rollup(self):
+        self.assertRaises(ValueError, pv.nest().key('a').rollup(len).extend, self.data)
+
+if __name__ == '__main__':
+    unittest.main()
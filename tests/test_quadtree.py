@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Quadtree
+
+class QuadtreeTest(unittest.TestCase):
+    
+    def setUp(self):
+        rng = np.random.RandomState(5)
+        self.x = rng.uniform(0, 100, 2000)
+        self.y = rng.uniform(0, 100, 2000)
+        # duplicates beyond leaf_size must still split cleanly
+        self.x[:20] = self.y[:20] = 50.
+        self.queries = rng.uniform(-10, 110, (25, 2))
+    
+    def brute_radius(self, x, y, r, alive):
+        return np.flatnonzero(((self.x - x) ** 2 + (self.y - y) ** 2 <= r * r) & alive).tolist()
+    
+    def check(self, tree, alive):
+        for (x,y) in self.queries:
+            d2 = np.where(alive, (self.x - x) ** 2 + (self.y - y) ** 2, np.inf)
+            self.assertEqual(d2[tree.nearest(x, y)], d2.min())
+            self.assertEqual(tree.radius(x, y, 7.5).tolist(), self.brute_radius(x, y, 7.5, alive))
+            inside = (self.x >= x) & (self.x <= x + 15) & (self.y >= y) & (self.y <= y + 9) & alive
+            self.assertEqual(tree.rect(x, y, x + 15, y + 9).tolist(), np.flatnonzero(inside).tolist())
+    
+    def test_queries_match_brute_force(self):
+        self.check(pv.Quadtree.Quadtree(self.x, self.y), np.ones(len(self.x), dtype=bool))
+    
+    def test_insert_and_remove(self):
+        tree = pv.Quadtree.Quadtree(self.x[:1500], self.y[:1500])
+        tree.insert(self.x[1500:], self.y[1500:])
+        alive = np.ones(len(self.x), dtype=bool)
+        alive[::3] = False
+        tree.remove(np.flatnonzero(~alive))
+        self.assertEqual(len(tree), alive.sum())
+        self.check(tree, alive)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Scale
+
+class LinearTest(unittest.TestCase):
+    
+    def test_endpoints_are_exact(self):
+        rng = np.random.RandomState(9)
+        for i in xrange(200):
+            (d0,d1,r0,r1) = rng.uniform(-10, 10, 4).round(rng.randint(1, 4))
+            s = pv.Scale.linear(d0, d1).range(r0, r1)
+            self.assertEqual((s(d0), s(d1)), (r0, r1))
+            self.assertEqual(s.map([d0, d1]).tolist(), [r0, r1])
+        self.assertEqual(pv.Scale.linear(.1, .7).range(3, 17)(.7), 17.)
+    
+    def test_matches_interpolators(self):
+        s = pv.Scale.linear(0, .3, 1.1).range(2, 7.1, -3)
+        x = np.linspace(-.5, 1.5, 41)
+        expect = [s._interpolators[j]((v - s._domain[j]) / (s._domain[j + 1] - s._domain[j]))
+                  for (j,v) in zip((x > .3).astype(int), x)]
+        self.assertEqual([s(v) for v in x], expect)
+        self.assertEqual(s.map(x).tolist(), expect)
+    
+    def test_empty_segment(self):
+        s = pv.Scale.linear(2, 2).range(0, 10)
+        self.assertEqual((s(2), s(5)), (0, 0))
+
+class ExtendTest(unittest.TestCase):
+    
+    def test_extend_widens_fitted_domain(self):
+        self.assertEqual(pv.Scale.linear([3., 7.]).extend([10.]).domain(), [3., 10.])
+        self.assertEqual(pv.Scale.linear(np.array([3., 7.])).extend(np.array([1.])).domain(), [1., 7.])
+    
+    def test_extend_replaces_explicit_domain(self):
+        self.assertEqual(pv.Scale.linear().extend([3., 7.]).domain(), [3., 7.])
+        self.assertEqual(pv.Scale.linear(0, 100).extend([3., 7.]).domain(), [3., 7.])
+    
+    def test_extend_skips_nan(self):
+        s = pv.Scale.linear()
+        s.extend(np.array([2., np.nan, 5.]))
+        s.extend(np.array([np.nan]))
+        s.extend([np.nan, 8.])
+        self.assertEqual(s.domain(), [2., 8.])
+        self.assertEqual(pv.Scale.linear([np.nan, 1., 4.]).domain(), [1., 4.])
+    
+    def test_extend_matches_domain(self):
+        data = np.random.RandomState(1).standard_normal(1000)
+        s = pv.Scale.linear()
+        for chunk in np.array_split(data, 7):
+            s.extend(chunk)
+        self.assertEqual(s.domain(), pv.Scale.linear(data).domain())
+
+class QuantileTest(unittest.TestCase):
+    
+    def test_fit_is_deferred(self):
+        data = np.random.RandomState(2).standard_normal(1001)
+        copy = data.copy()
+        s = pv.Scale.quantile(data)
+        self.assertIsNone(s._sorted)
+        s.quantiles(4)
+        self.assertIsNone(s._sorted)
+        np.testing.assert_array_equal(data, copy)
+        self.assertEqual(s.quantiles(), np.sort(data)[[0, 250, 500, 750, 1000]].tolist())
+        self.assertEqual(s.scale(np.median(data) + 1e-9), 2 / 3.)
+    
+    def test_default_quantiles(self):
+        s = pv.Scale.quantile(3, 1, 2)
+        self.assertEqual(s.quantiles(), [1, 1, 2, 3])
+        self.assertEqual([s.scale(x) for x in (0, 1, 2.5, 9)], [0, .5, 1, 1])
+
+class OrdinalTest(unittest.TestCase):
+    
+    def test_scalar_and_batch_share_the_domain(self):
+        s = pv.Scale.ordinal(1, 2).range(*range(6))
+        self.assertEqual(s.scale("x"), 2)
+        self.assertEqual(list(s.map([3, "x", 1], indices=True)), [3, 2, 0])
+        self.assertEqual(s.scale(3), 3)
+        self.assertEqual(s.scale("y"), 4)
+        self.assertEqual(list(s.domain()), [1, 2, "x", 3, "y"])
+    
+    def test_domain_resets_lookup(self):
+        s = pv.Scale.ordinal("a", "b").range(10, 20, 30)
+        self.assertEqual(s.scale("b"), 20)
+        s.domain("b", "a")
+        self.assertEqual([s.scale(k) for k in "abc"], [20, 10, 30])
+
+class LogScaleTest(unittest.TestCase):
+    
+    def test_scalar_path(self):
+        s = pv.Scale.log(1, 1000).range(0, 300)
+        self.assertIsInstance(s.scale(10), float)
+        self.assertAlmostEqual(s.scale(10), 100)
+        self.assertAlmostEqual(s.invert(200), 100)
+        self.assertEqual(s.scale(0), -np.inf)
+    
+    def test_negative_domain(self):
+        s = pv.Scale.log(-1000, -1).range(0, 300)
+        self.assertAlmostEqual(s.scale(-10), 200)
+        self.assertAlmostEqual(s.invert(100), -100)
+
+class LogTicksTest(unittest.TestCase):
+    
+    def test_ticks(self):
+        self.assertEqual(pv.Scale.log(1, 100).ticks(), [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100])
+    
+    def test_ticks_below_one(self):
+        ticks = pv.Scale.log(0.001, 0.05).ticks()
+        np.testing.assert_allclose(ticks, [.001, .002, .003, .004, .005, .006, .007, .008, .009, .01, .02, .03, .04, .05])
+    
+    def test_negative_ticks_below_one(self):
+        ticks = pv.Scale.log(-0.05, -0.001).ticks()
+        np.testing.assert_allclose(ticks, [-.05, -.04, -.03, -.02, -.01, -.009, -.008, -.007, -.006, -.005, -.004, -.003, -.002, -.001])
+    
+    def test_strided_ticks_below_one(self):
+        np.testing.assert_allclose(pv.Scale.log(1e-6, 1).ticks(7), [1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import cPickle
+import unittest
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Scale
+import pyprotovis.Color
+
+def _round_trips(s):
+    yield cPickle.loads(cPickle.dumps(s, 2))
+    yield pv.Scale.from_json(s.to_json())
+
+class SerializeTest(unittest.TestCase):
+    
+    def test_quantitative(self):
+        x = np.linspace(1, 100, 50)
+        for s in (pv.Scale.linear(0, 50, 100).range(0, 10, 640), pv.Scale.log(1, 100).base(2).range(0, 640)):
+            for t in _round_trips(s):
+                self.assertEqual(type(t), type(s))
+                self.assertEqual(t.map(x).tolist(), s.map(x).tolist())
+                self.assertEqual(t.scale(37.), s.scale(37.))
+    
+    def test_color_range(self):
+        s = pv.Scale.linear(0, 1).range("white", "rgba(70,130,180,.5)")
+        x = np.linspace(0, 1, 11)
+        for t in _round_trips(s):
+            self.assertEqual(t.rgba(x).tolist(), s.rgba(x).tolist())
+    
+    def test_ordinal(self):
+        s = pv.Scale.ordinal("a", "b", "c").range(1, 2, 3)
+        s.scale("d")
+        for t in _round_trips(s):
+            self.assertEqual(list(t.domain()), ["a", "b", "c", "d"])
+            self.assertEqual([t.scale(k) for k in "dcbae"], [1, 3, 2, 1, 2])
+    
+    def test_quantile(self):
+        data = np.random.RandomState(4).standard_normal(500)
+        s = pv.Scale.quantile(data).quantiles(4).range(0, 1)
+        x = np.linspace(-3, 3, 25)
+        for t in _round_trips(s):
+            self.assertEqual(t.map(x).tolist(), s.map(x).tolist())
+    
+    def test_colors(self):
+        for c in (pv.color("steelblue"), pv.color("hsla(120,50%,25%,.5)")):
+            self.assertEqual(cPickle.loads(cPickle.dumps(c, 2)), c)
+            self.assertEqual(pv.Color.from_json(c.to_json()), c)
+
+if __name__ == '__main__':
+    unittest.main()
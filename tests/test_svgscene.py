@@ -0,0 +1,51 @@
+import os
+import unittest
+import StringIO
+
+import numpy as np
+
+import support
+import pyprotovis as pv
+import pyprotovis.Panel
+import pyprotovis.Bar
+import pyprotovis.Dot
+import pyprotovis.Rule
+import pyprotovis.SvgScene
+
+def _grid():
+    root = pv.Panel.Panel().width(400).height(300)
+    root.add(pv.Rule.Rule).data([0, 150]).top(lambda d: d).left(0).width(400)
+    cell = (root.add(pv.Panel.Panel).data(range(13))
+                .left(lambda d: d % 4 * 100).top(lambda d: d // 4 * 75).width(90).height(70)
+                .visible(lambda d: d != 5).strokeStyle("gray"))
+    cell.add(pv.Bar.Bar).data(np.arange(10.)).left(lambda d: d * 9).bottom(0).width(8).height(lambda d: d * 7)
+    cell.add(pv.Dot.Dot).data([1, 2]).left(lambda d: d * 30).top(10)
+    return root
+
+@unittest.skipUnless(hasattr(os, 'fork'), "parallel mode needs fork")
+class ParallelTest(unittest.TestCase):
+    
+    def tearDown(self):
+        pv.SvgScene.close_pool()
+    
+    def test_parallel_matches_serial(self):
+        root = _grid()
+        serial = ''.join(pv.SvgScene.svg(root))
+        self.assertEqual(''.join(pv.SvgScene.svg(root, 3)), serial)
+        f = StringIO.StringIO()
+        pv.SvgScene.write(root, f, buffer_size=100, processes=2)
+        self.assertEqual(f.getvalue(), serial)
+    
+    def test_pool_follows_scene(self):
+        root = _grid()
+        ''.join(pv.SvgScene.svg(root, 2))
+        pool = pv.SvgScene._pool[0]
+        ''.join(pv.SvgScene.svg(root, 2))
+        self.assertIs(pv.SvgScene._pool[0], pool)
+        root.children[1].children[0].data(np.arange(5.))
+        parallel = ''.join(pv.SvgScene.svg(root, 2))
+        self.assertIsNot(pv.SvgScene._pool[0], pool)
+        self.assertEqual(parallel, ''.join(pv.SvgScene.svg(root)))
+
+if __name__ == '__main__':
+    unittest.main()